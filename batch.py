@@ -0,0 +1,14 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+AI_TSC无界面批处理入口
+"""
+
+import sys
+
+from src.batch_analyzer import main
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+连接池基准测试：对比每次 requests.post 新建连接与 ProviderClient 长连接复用的单次请求延迟
+
+运行: python -m benchmarks.bench_http_pool [请求次数]
+"""
+
+import statistics
+import sys
+import time
+
+import requests
+
+from benchmarks.mock_server import start_mock_server
+from src.api_client import ProviderClient
+from src.providers import resolve_provider
+
+
+def measure(send, count):
+    """执行count次请求，返回每次请求的延迟列表（毫秒）"""
+    latencies = []
+    for _ in range(count):
+        start = time.perf_counter()
+        response = send()
+        response.raise_for_status()
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+
+def report(name, latencies):
+    """打印延迟统计"""
+    print(f"{name:<24} 平均 {statistics.mean(latencies):7.3f}ms  "
+          f"中位数 {statistics.median(latencies):7.3f}ms  最大 {max(latencies):7.3f}ms")
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    server, base_url = start_mock_server()
+    url = f"{base_url}/v1/chat/completions"
+    adapter = resolve_provider(url, "gpt-3.5-turbo")
+    headers = adapter.build_headers("benchmark")
+    payload = adapter.build_payload("测试剧本内容" * 50)
+
+    try:
+        print(f"模拟端点: {url}，每组 {count} 次请求")
+        unpooled = measure(lambda: requests.post(url, headers=headers, json=payload, timeout=10), count)
+        with ProviderClient(pool_size=4) as client:
+            pooled = measure(lambda: client.post(url, headers, payload), count)
+        report("requests.post (无连接池)", unpooled)
+        report("ProviderClient (连接池)", pooled)
+        print(f"平均延迟降低: {(1 - statistics.mean(pooled) / statistics.mean(unpooled)) * 100:.1f}%")
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+剧本读取基准测试：逐个编码重新打开解码 vs 读取一次、样本判断编码后解码一次
+
+运行: python -m benchmarks.bench_script_loader [文件大小MB]
+"""
+
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from src.script_loader import ENCODINGS, read_script_file
+
+
+LINE = "场景{n}：雨夜的咖啡馆，侦探推门而入，镜头缓慢推进到他湿透的风衣。\n"
+
+
+def read_by_trial(file_path):
+    """对照实现：按顺序尝试每种编码，每次失败都重新打开文件并完整解码"""
+    for encoding in ENCODINGS:
+        try:
+            with open(file_path, "r", encoding=encoding) as f:
+                return f.read(), encoding
+        except UnicodeDecodeError:
+            continue
+    raise UnicodeDecodeError("无法解析文件编码", b"", 0, 0, "所有尝试的编码都失败")
+
+
+def make_script_file(directory, size_mb, encoding):
+    """生成指定大小和编码的模拟剧本文件"""
+    path = os.path.join(directory, f"script_{encoding}.txt")
+    target = size_mb * 1024 * 1024
+    with open(path, "w", encoding=encoding) as f:
+        written = n = 0
+        while written < target:
+            block = "".join(LINE.format(n=n + i) for i in range(1000))
+            f.write(block)
+            written += len(block.encode(encoding))
+            n += 1000
+    return path
+
+
+def measure(func, path):
+    """返回 (耗时秒数, 峰值内存MB, 编码)，内存单独测一次，避免tracemalloc影响计时"""
+    start = time.perf_counter()
+    content, encoding = func(path)
+    elapsed = time.perf_counter() - start
+    del content
+    tracemalloc.start()
+    content, _ = func(path)
+    peak = tracemalloc.get_traced_memory()[1] / 1024 / 1024
+    tracemalloc.stop()
+    return elapsed, peak, encoding
+
+
+def main():
+    size_mb = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    with tempfile.TemporaryDirectory() as directory:
+        for encoding in ("utf-8", "gbk"):
+            path = make_script_file(directory, size_mb, encoding)
+            print(f"{encoding} 文件: {os.path.getsize(path) / 1024 / 1024:.1f}MB")
+            elapsed, peak, detected = measure(read_by_trial, path)
+            print(f"  逐个编码重试   {elapsed * 1000:8.1f}ms  峰值内存 {peak:7.1f}MB  ({detected})")
+            elapsed, peak, detected = measure(read_script_file, path)
+            print(f"  样本判断编码   {elapsed * 1000:8.1f}ms  峰值内存 {peak:7.1f}MB  ({detected})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+结果拆分基准测试：对比逐个分解词 find、单次扫描的多模式自动机和流式增量拆分
+
+运行: python -m benchmarks.bench_splitter [文本MB数] [分解词数量]
+"""
+
+import sys
+import time
+
+from src.result_splitter import IncrementalSplitter, MultiPatternMatcher, split_text
+
+
+def make_storyboard(target_bytes, shots_per_segment=40):
+    """生成指定大小的模拟分镜输出"""
+    shot = "Shot {n}\nDuration: 1.5 sec\nScene (简述): 主角走进昏暗的房间\nSora Prompt (详细): 电影感，8k，缓慢推镜，冷色调\nCamera: Dolly in\n"
+    segment = "📼 Segment 1 (00:00 - 00:15)\n" + "".join(shot.format(n=i) for i in range(1, shots_per_segment + 1))
+    repeat = max(1, target_bytes // len(segment.encode("utf-8")))
+    return segment * repeat
+
+
+def legacy_find_first(text, separators):
+    """原有实现：每个分解词单独 find 一次，只取第一次出现"""
+    return sorted(text.find(sep) for sep in separators if sep and text.find(sep) != -1)
+
+
+def find_all_per_separator(text, separators):
+    """逐个分解词反复 find 找出全部出现位置（扫描次数 = 分解词数量）"""
+    positions = []
+    for sep in separators:
+        start = text.find(sep)
+        while start != -1:
+            positions.append(start)
+            start = text.find(sep, start + len(sep))
+    return sorted(positions)
+
+
+def split_incrementally(text, separators, chunk_size=20):
+    """模拟流式接收：按小块逐次送入增量拆分器"""
+    splitter = IncrementalSplitter(separators)
+    sections = []
+    for start in range(0, len(text), chunk_size):
+        sections.extend(splitter.feed(text[start:start + chunk_size]))
+    sections.extend(splitter.finish())
+    return sections
+
+
+def timed(func, *args):
+    """返回 (耗时秒数, 结果)"""
+    start = time.perf_counter()
+    result = func(*args)
+    return time.perf_counter() - start, result
+
+
+def main():
+    megabytes = float(sys.argv[1]) if len(sys.argv) > 1 else 4
+    count = int(sys.argv[2]) if len(sys.argv) > 2 else 40
+    separators = [f"Shot {i}" for i in range(1, count + 1)]
+    text = make_storyboard(int(megabytes * 1024 * 1024))
+    size_mb = len(text.encode("utf-8")) / 1024 / 1024
+    print(f"文本大小: {size_mb:.1f}MB，分解词数量: {count}")
+
+    elapsed, found = timed(legacy_find_first, text, separators)
+    print(f"原实现 (每词find首次出现)    {elapsed * 1000:9.1f}ms  找到 {len(found)} 处")
+    elapsed, found = timed(find_all_per_separator, text, separators)
+    print(f"逐词find全部出现 (含误匹配)   {elapsed * 1000:9.1f}ms  找到 {len(found)} 处")
+
+    elapsed, matcher = timed(MultiPatternMatcher, separators)
+    print(f"构建自动机                    {elapsed * 1000:9.1f}ms")
+    elapsed, sections = timed(split_text, text, separators, matcher)
+    print(f"自动机单次扫描并拆分          {elapsed * 1000:9.1f}ms  拆分为 {len(sections)} 段 "
+          f"({size_mb / elapsed:.1f}MB/s)")
+    elapsed, sections = timed(split_incrementally, text, separators)
+    print(f"增量拆分 (每块20字符)         {elapsed * 1000:9.1f}ms  拆分为 {len(sections)} 段 "
+          f"({size_mb / elapsed:.1f}MB/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+冷启动基准测试：模块导入耗时与首帧绘制耗时
+
+每次测量都启动一个新的解释器进程，取多次的中位数。导入耗时不需要图形界面；
+首帧绘制耗时需要图形界面（Linux 下可用 xvfb-run 运行），没有图形界面时跳过。
+
+运行: python -m benchmarks.bench_startup [重复次数]
+"""
+
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 被测模块：界面入口，以及批处理使用的无界面核心
+MODULES = ["src.script_analyzer", "src.api_client", "src.batch_analyzer"]
+
+# 这些模块出现在 sys.modules 中说明启动路径上导入了网络层或界面库
+WATCHED_MODULES = ["requests", "urllib3", "tkinter"]
+
+IMPORT_CODE = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(json.dumps({{"elapsed": elapsed, "loaded": [name for name in {watched!r} if name in sys.modules]}}))
+"""
+
+PAINT_CODE = """
+import json, os, sys, time
+start = time.perf_counter()
+import tkinter as tk
+from src.script_analyzer import ScriptAnalyzerGUI
+imported = time.perf_counter()
+try:
+    root = tk.Tk()
+except tk.TclError as e:
+    print(json.dumps({"error": str(e)}))
+    sys.exit(0)
+app = ScriptAnalyzerGUI(root)
+built = time.perf_counter()
+# 等窗口映射到屏幕并处理完待绘制的空闲任务，视为首帧已绘制
+root.wait_visibility(root)
+root.update_idletasks()
+painted = time.perf_counter()
+print(json.dumps({"import": imported - start, "build": built - imported, "paint": painted - start,
+                  "network_loaded": "requests" in sys.modules}), flush=True)
+os._exit(0)
+"""
+
+
+def run_child(code):
+    """在新的解释器中运行代码，返回其最后一行输出解析出的字典"""
+    output = subprocess.run([sys.executable, "-c", code], cwd=PROJECT_DIR, capture_output=True, text=True,
+                            check=True, timeout=60).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def bench_imports(repeat):
+    """报告每个模块在全新进程中的导入耗时"""
+    print("模块导入耗时（全新进程，中位数）")
+    for module in MODULES:
+        results = [run_child(IMPORT_CODE.format(module=module, watched=WATCHED_MODULES)) for _ in range(repeat)]
+        elapsed = statistics.median(result["elapsed"] for result in results)
+        loaded = ", ".join(results[-1]["loaded"]) or "无"
+        print(f"  {module:<20} {elapsed * 1000:8.1f}ms  已加载: {loaded}")
+
+
+def bench_first_paint(repeat):
+    """报告从进程内开始导入到主窗口首帧绘制完成的耗时"""
+    results = []
+    for _ in range(repeat):
+        result = run_child(PAINT_CODE)
+        if "error" in result:
+            print(f"首帧绘制耗时: 跳过（需要图形界面: {result['error']}）")
+            return
+        results.append(result)
+    print("首帧绘制耗时（全新进程，中位数）")
+    for key, label in (("import", "导入界面模块"), ("build", "创建主窗口控件"), ("paint", "首帧绘制完成")):
+        print(f"  {label:<12} {statistics.median(r[key] for r in results) * 1000:8.1f}ms")
+    loaded = "是" if results[-1]["network_loaded"] else "否"
+    print(f"  首帧前已加载网络层: {loaded}")
+
+
+def main():
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    bench_imports(repeat)
+    bench_first_paint(repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+分镜解析基准测试：逐行拆分解析与单次正则扫描解析的耗时和内存对比
+
+运行: python -m benchmarks.bench_storyboard_parser [镜头数量]
+"""
+
+import sys
+import time
+import tracemalloc
+
+from src.storyboard_parser import parse_storyboard
+
+
+def make_storyboard(shot_count, shots_per_segment=5):
+    """生成指定镜头数量的模拟Sora分镜输出"""
+    shot = ("Shot {n}\nDuration: 3.0 sec\nScene (简述): 主角走进昏暗的房间\n"
+            "Sora Prompt (详细): 电影感，8k，缓慢推镜，冷色调，雨夜街道上的霓虹倒影\nCamera: Dolly in\n")
+    parts = []
+    for index in range(shot_count // shots_per_segment):
+        start = index * 15
+        parts.append(f"📼 Segment {index + 1} ({start // 60:02d}:{start % 60:02d} - "
+                     f"{(start + 15) // 60:02d}:{(start + 15) % 60:02d})\n")
+        parts.extend(shot.format(n=n) for n in range(1, shots_per_segment + 1))
+    return "".join(parts)
+
+
+def parse_by_lines(text):
+    """对照实现：逐行拆分后用字典保存每个镜头"""
+    segments = []
+    shot = None
+    for line in text.splitlines():
+        line = line.strip()
+        if line.startswith("📼 Segment"):
+            segments.append({"title": line, "shots": []})
+        elif line.startswith("Shot "):
+            shot = {"shot": line[5:]}
+            segments[-1]["shots"].append(shot)
+        elif ":" in line and shot is not None:
+            key, value = line.split(":", 1)
+            shot[key.strip()] = value.strip()
+    return segments
+
+
+def measure(func, text):
+    """返回 (耗时秒数, 结果占用内存MB, 结果)，内存单独测一次，避免tracemalloc影响计时"""
+    start = time.perf_counter()
+    result = func(text)
+    elapsed = time.perf_counter() - start
+    del result
+    tracemalloc.start()
+    result = func(text)
+    retained = tracemalloc.get_traced_memory()[0] / 1024 / 1024
+    tracemalloc.stop()
+    return elapsed, retained, result
+
+
+def main():
+    shot_count = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    text = make_storyboard(shot_count)
+    print(f"镜头数量: {shot_count}，文本大小: {len(text.encode('utf-8')) / 1024 / 1024:.1f}MB")
+
+    elapsed, peak, segments = measure(parse_by_lines, text)
+    print(f"逐行拆分 + 字典     {elapsed * 1000:8.1f}ms  结果内存 {peak:6.1f}MB  {len(segments)} 个片段")
+    elapsed, peak, segments = measure(parse_storyboard, text)
+    print(f"单次扫描 + slots    {elapsed * 1000:8.1f}ms  结果内存 {peak:6.1f}MB  {len(segments)} 个片段")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+大文本渲染基准测试：一次性 insert 与分片渲染对主循环的阻塞时间
+
+主循环中每5ms运行一次心跳，记录相邻心跳的最大间隔（即界面最长无响应时间）。
+需要图形界面（Linux 下可用 xvfb-run 运行）。
+
+运行: python -m benchmarks.bench_text_render [MB数 ...]
+"""
+
+import sys
+import time
+
+import tkinter as tk
+
+from src.text_renderer import ChunkedTextRenderer
+
+
+HEARTBEAT_MS = 5
+
+
+def make_text(megabytes):
+    """生成指定大小的模拟分析结果（中英文混合，多行）"""
+    line = "Shot 1 Duration: 2.5 sec 主角走进昏暗的房间，电影感，8k，缓慢推镜，冷色调\n"
+    return line * max(1, int(megabytes * 1024 * 1024 / len(line.encode("utf-8"))))
+
+
+def measure(root, widget, text, chunked):
+    """渲染一次文本，返回 (总耗时秒数, 主循环最长阻塞秒数)"""
+    gaps = []
+    state = {"last": time.perf_counter(), "done": False}
+
+    def heartbeat():
+        now = time.perf_counter()
+        gaps.append(now - state["last"])
+        state["last"] = now
+        if not state["done"]:
+            root.after(HEARTBEAT_MS, heartbeat)
+
+    def finish():
+        state["done"] = True
+        state["end"] = time.perf_counter()
+
+    def start():
+        state["start"] = state["last"] = time.perf_counter()
+        root.after(HEARTBEAT_MS, heartbeat)
+        if chunked:
+            ChunkedTextRenderer(widget, readonly=True).render(text, on_done=finish)
+        else:
+            widget.config(state=tk.NORMAL)
+            widget.delete(1.0, tk.END)
+            widget.insert(1.0, text)
+            widget.config(state=tk.DISABLED)
+            widget.update_idletasks()
+            finish()
+
+    root.after(50, start)
+    while not state["done"]:
+        root.update()
+    # 再运行一会儿，计入插入后布局和重绘造成的阻塞
+    settle = time.perf_counter() + 0.2
+    while time.perf_counter() < settle:
+        root.update()
+    return state["end"] - state["start"], max(gaps) if gaps else 0.0
+
+
+def main():
+    sizes = [float(arg) for arg in sys.argv[1:]] or [1, 10]
+    try:
+        root = tk.Tk()
+    except tk.TclError as e:
+        print(f"无法创建窗口（需要图形界面，可用 xvfb-run 运行）: {str(e)}")
+        return 1
+    root.geometry("900x600")
+    widget = tk.Text(root, wrap=tk.WORD)
+    widget.pack(fill=tk.BOTH, expand=True)
+
+    for megabytes in sizes:
+        text = make_text(megabytes)
+        for label, chunked in (("一次性insert", False), ("分片渲染", True)):
+            total, stall = measure(root, widget, text, chunked)
+            print(f"{megabytes:5.1f}MB  {label:<10}  总耗时 {total * 1000:8.1f}ms  主循环最长阻塞 {stall * 1000:8.1f}ms")
+    root.destroy()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -52,6 +52,7 @@ setup(
     entry_points={
         'console_scripts': [
             'ai_tsc=main:main',
+            'ai_tsc_batch=batch:main',
         ],
     },
 )
@@ -0,0 +1,422 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+大模型API调用核心逻辑（不依赖tkinter，GUI与批处理共用）
+"""
+
+import json
+import socket
+import threading
+import time
+from contextlib import contextmanager
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.exceptions import ReadTimeoutError
+from urllib3.util.retry import Retry
+
+from src.prompt_template import build_full_prompt
+from src.providers import SYSTEM_PROMPT, TEMPERATURE, resolve_provider
+from src.response_cache import make_cache_key
+from src.retry_policy import CircuitOpenError, RetryPolicy
+from src.token_budget import plan_budget
+
+
+# 请求参数
+TIMEOUT = 60  # 超时时间（秒）
+CONNECT_TIMEOUT = 10  # 流式请求的建立连接超时（秒）
+STREAM_IDLE_TIMEOUT = 60  # 流式请求两个数据块之间的最长等待时间（秒）
+
+# 连接池配置
+DEFAULT_POOL_SIZE = 10  # 每个主机保持的长连接数
+CONNECT_RETRIES = 2  # 建立连接失败时由适配器自动重试的次数
+
+
+# 当前线程正在进行的可取消请求
+_active = threading.local()
+
+
+class _RequestScope:
+    """记录一次可取消请求用到的连接，取消时直接关闭其套接字，阻塞中的读写立即出错返回"""
+    def __init__(self, token):
+        self.token = token
+        self.connections = []
+        self._lock = threading.Lock()
+
+    def attach(self, connection):
+        """登记本线程即将使用的连接；任务已取消时不再发送"""
+        with self._lock:
+            if connection not in self.connections:
+                self.connections.append(connection)
+        self.token.raise_if_cancelled()
+
+    def abort(self):
+        """关闭所有已登记连接的套接字"""
+        with self._lock:
+            connections = list(self.connections)
+        for connection in connections:
+            shutdown_connection(connection)
+
+
+def shutdown_connection(connection):
+    """关闭连接的套接字（连接可能尚未建立或已经关闭）"""
+    sock = getattr(connection, "sock", None)
+    if sock is None:
+        return
+    try:
+        sock.shutdown(socket.SHUT_RDWR)
+    except OSError:
+        pass
+
+
+@contextmanager
+def cancel_scope(token):
+    """在with块内，本线程通过 ProviderClient 发出的请求可被 token 中断（可嵌套，以最外层为准）"""
+    if token is None or getattr(_active, "scope", None) is not None:
+        yield
+        return
+    scope = _RequestScope(token)
+    _active.scope = scope
+    token.on_cancel(scope.abort)
+    try:
+        yield
+    finally:
+        _active.scope = None
+        token.remove(scope.abort)
+
+
+class _CancellableMixin:
+    """发送请求前把连接登记到当前线程的取消范围"""
+    def request(self, *args, **kwargs):
+        scope = getattr(_active, "scope", None)
+        if scope is not None:
+            scope.attach(self)
+        return super().request(*args, **kwargs)
+
+    def connect(self):
+        super().connect()
+        # 取消发生在建立连接期间时，套接字在登记时还不存在
+        scope = getattr(_active, "scope", None)
+        if scope is not None and scope.token.cancelled:
+            shutdown_connection(self)
+            scope.token.raise_if_cancelled()
+
+
+class _CancellableHTTPConnection(_CancellableMixin, HTTPConnection):
+    pass
+
+
+class _CancellableHTTPSConnection(_CancellableMixin, HTTPSConnection):
+    pass
+
+
+class _CancellableHTTPPool(HTTPConnectionPool):
+    ConnectionCls = _CancellableHTTPConnection
+
+
+class _CancellableHTTPSPool(HTTPSConnectionPool):
+    ConnectionCls = _CancellableHTTPSConnection
+
+
+class _CancellableAdapter(HTTPAdapter):
+    """连接池使用可被取消范围中断的连接"""
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {"http": _CancellableHTTPPool, "https": _CancellableHTTPSPool}
+
+
+class ProviderClient:
+    """大模型API客户端，持有长连接会话供所有分析、重试和批处理线程复用"""
+    def __init__(self, pool_size=DEFAULT_POOL_SIZE, connect_retries=CONNECT_RETRIES, retry_policy=None):
+        self.pool_size = pool_size
+        # 重试策略（计数器和各端点熔断器在所有使用该客户端的请求间共享）
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.session = requests.Session()
+        self.session.headers["Connection"] = "keep-alive"
+
+        # 只在建立连接阶段自动重试，读超时和HTTP错误交给上层的重试逻辑处理
+        retry = Retry(total=connect_retries, connect=connect_retries, read=0, status=0,
+                      backoff_factor=0.5, raise_on_status=False)
+        adapter = _CancellableAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def post(self, url, headers, payload, timeout=TIMEOUT, stream=False):
+        """通过连接池发送POST请求"""
+        return self.session.post(url, headers=headers, json=payload, timeout=timeout, stream=stream)
+
+    def close(self):
+        """关闭会话，释放所有连接"""
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+_default_client = None
+_default_client_lock = threading.Lock()
+
+
+def get_default_client():
+    """获取进程内共享的默认客户端"""
+    global _default_client
+    with _default_client_lock:
+        if _default_client is None:
+            _default_client = ProviderClient()
+        return _default_client
+
+
+def _log(verbose, message):
+    """输出调试日志"""
+    if verbose:
+        print(message)
+
+
+def iter_sse_text(response, adapter):
+    """逐个解析SSE数据行，产出增量文本"""
+    # SSE规范要求使用UTF-8编码，忽略服务端未声明charset时requests的默认推断
+    response.encoding = "utf-8"
+    for line in response.iter_lines(decode_unicode=True):
+        if not line or not line.startswith("data:"):
+            continue
+        data = line[5:].strip()
+        if data == "[DONE]":
+            break
+        try:
+            event = json.loads(data)
+        except json.JSONDecodeError:
+            continue
+        delta = adapter.extract_delta(event)
+        if delta:
+            yield delta
+
+
+def is_read_timeout(error):
+    """判断流式读取中的异常是否由读取超时引起（requests 会把 urllib3 的读取超时包装为 ConnectionError）"""
+    if isinstance(error, requests.exceptions.ReadTimeout):
+        return True
+    causes = [error.__cause__, error.__context__] + [arg for arg in error.args if isinstance(arg, BaseException)]
+    return any(isinstance(cause, (ReadTimeoutError, socket.timeout)) for cause in causes)
+
+
+def post_with_retry(url, headers, payload, verbose=True, client=None, timeout=TIMEOUT, stream=False,
+                    cancel_token=None):
+    """发送API请求（按客户端的重试策略重试可恢复的错误）
+
+    传入 cancel_token 时，取消会中断正在进行的请求和重试前的等待，并抛出 CancelledError。
+    超时、HTTP错误和端点熔断都转换为 ValueError。
+    """
+    client = client or get_default_client()
+    policy = client.retry_policy
+
+    def send():
+        _log(verbose, f"正在发送API请求: {url}")
+        try:
+            response = client.post(url, headers, payload, timeout=timeout, stream=stream)
+        except requests.exceptions.RequestException:
+            # 取消时连接被关闭，请求以连接错误结束
+            if cancel_token is not None:
+                cancel_token.raise_if_cancelled()
+            raise
+        if cancel_token is not None and cancel_token.cancelled:
+            response.close()
+            cancel_token.raise_if_cancelled()
+        _log(verbose, f"API响应状态码: {response.status_code}")
+        _log(verbose, f"API响应头: {dict(response.headers)}")
+        if response.status_code >= 400:
+            # 失败的流式响应也需要读出错误内容再关闭连接
+            response.content
+        response.raise_for_status()
+        return response
+
+    def on_retry(attempt, error, delay):
+        _log(verbose, f"API请求失败 (尝试 {attempt+1}/{policy.max_retries}): {str(error)}，{delay:.1f}秒后重试...")
+
+    def wait(delay):
+        if cancel_token.wait(delay):
+            cancel_token.raise_if_cancelled()
+
+    try:
+        with cancel_scope(cancel_token):
+            return policy.call(url, send, on_retry=on_retry, sleep=wait if cancel_token is not None else None)
+    except requests.exceptions.Timeout:
+        raise ValueError(f"API请求超时，已尝试{policy.max_retries}次，请检查网络连接或稍后重试")
+    except requests.exceptions.HTTPError as e:
+        detail = e.response.text[:500] if e.response is not None else ""
+        raise ValueError(f"{str(e)}\n{detail}".strip())
+    except CircuitOpenError as e:
+        raise ValueError(str(e))
+
+
+def parse_response(response, adapter, verbose=True):
+    """解析API响应，返回分析文本"""
+    return parse_response_detailed(response, adapter, verbose=verbose)[0]
+
+
+def parse_response_detailed(response, adapter, verbose=True):
+    """解析API响应，返回 (分析文本, token用量)"""
+    response_content = response.text.strip()
+    _log(verbose, f"API响应内容长度: {len(response_content)} 字符")
+    _log(verbose, f"API响应内容预览: {response_content[:200]}...")
+
+    if not response_content:
+        raise ValueError("API返回了空响应")
+
+    try:
+        result = response.json()
+    except json.JSONDecodeError as e:
+        raise ValueError(f"API返回的不是有效的JSON格式: {str(e)}\n原始响应:\n{response_content}")
+    _log(verbose, f"JSON解析成功: {json.dumps(result, ensure_ascii=False)[:200]}...")
+
+    analysis = adapter.extract_text(result)
+    if analysis is None:
+        raise ValueError(f"无法解析API响应格式\n原始响应:\n{json.dumps(result, indent=2)}")
+    return analysis, adapter.extract_usage(result)
+
+
+def request_cache_key(final_api_url, model, full_prompt, max_tokens):
+    """计算一次分析请求的缓存键"""
+    return make_cache_key(final_api_url, model, SYSTEM_PROMPT, full_prompt, TEMPERATURE, max_tokens)
+
+
+def request_budget(model, full_prompt, script, prompt, max_tokens=None, verbose=True):
+    """规划本次请求的token预算，max_tokens不为None时使用指定的输出上限
+
+    提示词超出模型上下文窗口时抛出 ValueError，不发送必然失败的请求。
+    """
+    budget = plan_budget(model, SYSTEM_PROMPT, full_prompt, script, prompt)
+    if not budget["fits"]:
+        raise ValueError(budget["warning"])
+    if max_tokens is not None:
+        budget["max_tokens"] = max_tokens
+    _log(verbose, f"估算输入 {budget['prompt_tokens']} tokens，输出上限 {budget['max_tokens']} tokens "
+                  f"(上下文窗口 {budget['context_window']})")
+    if budget["warning"]:
+        _log(verbose, f"警告: {budget['warning']}")
+    return budget
+
+
+def analyze_script(script, prompt, api_url, api_key, model, verbose=True, client=None, cache=None,
+                   max_tokens=None, cancel_token=None, variables=None):
+    """调用API分析剧本，返回分析结果文本
+
+    传入 cache（ResponseCache）时先查缓存，命中则不发送请求；传入None即绕过缓存。
+    max_tokens 为None时根据剧本长度、模板和模型自动规划输出上限。
+    传入 cancel_token（CancelToken）时可随时取消，取消后抛出 CancelledError。
+    variables 为模板中 {script} 以外的变量（如 {"duration": "3分钟"}）。
+    """
+    return analyze_script_detailed(script, prompt, api_url, api_key, model, verbose=verbose,
+                                   client=client, cache=cache, max_tokens=max_tokens,
+                                   cancel_token=cancel_token, variables=variables)["text"]
+
+
+def analyze_script_detailed(script, prompt, api_url, api_key, model, verbose=True, client=None, cache=None,
+                            max_tokens=None, cancel_token=None, variables=None):
+    """调用API分析剧本，返回包含 text/usage/latency/cached/budget 的结果字典"""
+    start = time.perf_counter()
+    _log(verbose, f"\n=== 调试信息开始 ===")
+    _log(verbose, f"原始提示词完整内容: {repr(prompt)}")
+    _log(verbose, f"提示词中是否包含{{script}}占位符: {'{script}' in prompt}")
+    _log(verbose, f"脚本内容长度: {len(script)} 字符")
+
+    full_prompt = build_full_prompt(prompt, script, variables)
+    _log(verbose, f"替换后完整提示词长度: {len(full_prompt)} 字符")
+    _log(verbose, f"完整提示词预览: {full_prompt[:100]}...")
+
+    _log(verbose, f"当前模型: {model}")
+    _log(verbose, f"API URL: {api_url}")
+
+    adapter = resolve_provider(api_url, model)
+    final_api_url = adapter.endpoint
+    budget = request_budget(model, full_prompt, script, prompt, max_tokens, verbose=verbose)
+    if cache is not None:
+        cache_key = request_cache_key(final_api_url, model, full_prompt, budget["max_tokens"])
+        cached = cache.get(cache_key)
+        if cached is not None:
+            _log(verbose, "命中响应缓存，跳过API请求")
+            return {"text": cached, "usage": None, "latency": time.perf_counter() - start, "cached": True,
+                    "budget": budget}
+
+    headers = adapter.build_headers(api_key)
+    payload = adapter.build_payload(full_prompt, max_tokens=budget["max_tokens"])
+
+    _log(verbose, f"最终API URL: {final_api_url} (格式: {adapter.name})")
+    _log(verbose, f"请求体预览: {json.dumps(payload, ensure_ascii=False)[:200]}...")
+
+    response = post_with_retry(final_api_url, headers, payload, verbose=verbose, client=client,
+                               cancel_token=cancel_token)
+    analysis, usage = parse_response_detailed(response, adapter, verbose=verbose)
+    if cache is not None:
+        cache.put(cache_key, analysis, {"model": model, "api_url": final_api_url, "usage": usage})
+    return {"text": analysis, "usage": usage, "latency": time.perf_counter() - start, "cached": False,
+            "budget": budget}
+
+
+def stream_script(script, prompt, api_url, api_key, model, on_delta, verbose=True, client=None,
+                  idle_timeout=STREAM_IDLE_TIMEOUT, cache=None, max_tokens=None, cancel_token=None,
+                  variables=None):
+    """以流式方式调用API分析剧本
+
+    每收到一段增量文本就调用 on_delta(text)，返回 (完整结果, 首字耗时秒数, 是否命中缓存)。
+    超时针对两个数据块之间的空闲时间，而不是整个响应的耗时。
+    缓存命中时一次性回调完整结果，首字耗时为0。
+    """
+    full_prompt = build_full_prompt(prompt, script, variables)
+    adapter = resolve_provider(api_url, model)
+    base_api_url = adapter.endpoint
+    budget = request_budget(model, full_prompt, script, prompt, max_tokens, verbose=verbose)
+    if cache is not None:
+        # 与非流式请求共用缓存键，两种模式的结果可以互相命中
+        cache_key = request_cache_key(base_api_url, model, full_prompt, budget["max_tokens"])
+        cached = cache.get(cache_key)
+        if cached is not None:
+            _log(verbose, "命中响应缓存，跳过API请求")
+            on_delta(cached)
+            return cached, 0.0, True
+
+    final_api_url = adapter.stream_endpoint
+    headers = adapter.build_headers(api_key)
+    headers["Accept"] = "text/event-stream"
+    payload = adapter.build_payload(full_prompt, stream=True, max_tokens=budget["max_tokens"])
+
+    _log(verbose, f"流式请求 API URL: {final_api_url}，模型: {model}")
+
+    start = time.perf_counter()
+    chunks = []
+    first_token_time = None
+    # 取消范围覆盖整个响应的读取，取消时中断正在阻塞的读取
+    with cancel_scope(cancel_token):
+        response = post_with_retry(final_api_url, headers, payload, verbose=verbose, client=client,
+                                   timeout=(CONNECT_TIMEOUT, idle_timeout), stream=True,
+                                   cancel_token=cancel_token)
+        try:
+            for delta in iter_sse_text(response, adapter):
+                if cancel_token is not None:
+                    cancel_token.raise_if_cancelled()
+                if first_token_time is None:
+                    first_token_time = time.perf_counter() - start
+                    _log(verbose, f"首字耗时: {first_token_time:.2f}s")
+                chunks.append(delta)
+                on_delta(delta)
+        except requests.exceptions.RequestException as e:
+            if cancel_token is not None:
+                cancel_token.raise_if_cancelled()
+            # 只有读取超时才说明空闲时间过长，其它连接错误按原样抛出
+            if is_read_timeout(e):
+                raise ValueError(f"流式响应中断（{idle_timeout}秒内未收到新数据）: {str(e)}")
+            raise
+        finally:
+            response.close()
+
+    if not chunks:
+        raise ValueError("API返回了空的流式响应")
+    analysis = "".join(chunks)
+    if cache is not None:
+        cache.put(cache_key, analysis, {"model": model, "api_url": base_api_url})
+    return analysis, first_token_time, False
@@ -0,0 +1,455 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+无界面批量剧本分析（不依赖tkinter）
+
+用法示例：
+    ai_tsc_batch scripts/ -o results/ --workers 8
+    ai_tsc_batch "scripts/*.txt" --model gpt-4o --prompt-file prompt.txt
+    ai_tsc_batch results/ --split-only --split-mode heading --heading-level 2
+    ai_tsc_batch inbox/ --watch --workers 2
+    ai_tsc_batch scripts/ --template 分镜 --var duration=60秒 --var style=赛博朋克
+"""
+
+import argparse
+import glob
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from dotenv import load_dotenv
+
+from src.api_client import ProviderClient, analyze_script_detailed
+from src.folder_watcher import DEFAULT_WATCH_INTERVAL, RESULT_SUFFIX, FolderWatcher, result_path_for, watch_loop
+from src.prompt_template import DEFAULT_PROMPT, compile_template, parse_variables
+from src.response_cache import DEFAULT_CACHE_DIR, ResponseCache
+from src.result_splitter import SPLIT_MODES, get_matcher, split_text
+from src.scene_chunker import DEFAULT_CHUNK_CHARS, DEFAULT_CHUNK_WORKERS, analyze_long_script
+from src.script_loader import decode_script, read_script_file
+from src.storyboard_generator import DEFAULT_SEGMENT_WORKERS, generate_storyboard
+from src.storyboard_parser import export_storyboard, parse_storyboard
+from src.template_store import get_template_store
+
+
+# 默认并发数
+DEFAULT_WORKERS = 4
+
+# 汇总文件名
+SUMMARY_FILENAME = "summary.json"
+
+
+def collect_scripts(inputs, pattern="*.txt", include_results=False):
+    """根据目录或通配符收集剧本文件路径（去重并排序）
+
+    默认跳过分析结果文件（*.result.txt），避免把上次的结果当作剧本再次分析；
+    拆分已有结果时传入 include_results=True，此时剧本与它的结果文件在同一目录时只保留结果文件。
+    """
+    paths = []
+    for item in inputs:
+        if os.path.isdir(item):
+            paths.extend(glob.glob(os.path.join(item, pattern)))
+        elif os.path.isfile(item):
+            paths.append(item)
+        else:
+            paths.extend(p for p in glob.glob(item) if os.path.isfile(p))
+    paths = set(os.path.abspath(p) for p in paths)
+    if include_results:
+        results = {p[:-len(RESULT_SUFFIX)] for p in paths if p.endswith(RESULT_SUFFIX)}
+        paths = [p for p in paths if p.endswith(RESULT_SUFFIX) or os.path.splitext(p)[0] not in results]
+    else:
+        paths = [p for p in paths if not p.endswith(RESULT_SUFFIX)]
+    return sorted(paths)
+
+
+def output_name(path):
+    """返回输入文件对应的输出文件名前缀（去掉扩展名，结果文件再去掉 .result）"""
+    name = os.path.splitext(os.path.basename(path))[0]
+    if name.endswith(".result"):
+        name = name[:-len(".result")]
+    return name
+
+
+def output_dirs_for(paths, output_dir):
+    """返回 {输入文件路径: 结果目录}
+
+    输出文件名前缀（见 output_name）互不相同时结果都写在 output_dir 下；不同目录中有同名文件时，
+    按文件相对公共上级目录的路径在 output_dir 下建立同样的子目录，避免结果互相覆盖。
+    同一目录中前缀相同的文件（如 ep1.txt 与 ep1.md）无法区分，抛出 ValueError。
+    """
+    names = [output_name(path) for path in paths]
+    if len(set(names)) == len(names):
+        return {path: output_dir for path in paths}
+    root = os.path.commonpath([os.path.dirname(path) for path in paths])
+    dirs = {path: os.path.normpath(os.path.join(output_dir, os.path.relpath(os.path.dirname(path), root)))
+            for path in paths}
+    seen = {}
+    for path in paths:
+        key = (dirs[path], output_name(path))
+        if key in seen:
+            raise ValueError(f"输出文件名冲突: {seen[key]} 与 {path}")
+        seen[key] = path
+    return dirs
+
+
+def shots_path_for(script_path, output_dir, shots_format):
+    """返回剧本对应的分镜镜头导出文件路径"""
+    name = os.path.splitext(os.path.basename(script_path))[0]
+    return os.path.join(output_dir, f"{name}.shots.{shots_format}")
+
+
+def sections_path_for(script_path, output_dir):
+    """返回剧本（或结果文件）对应的拆分结果路径"""
+    return os.path.join(output_dir, f"{output_name(script_path)}.sections.json")
+
+
+def write_sections(text, source_path, output_dir, matcher):
+    """按匹配器拆分文本并写出 <名称>.sections.json，返回段落数"""
+    sections = [{"title": section["separator"], "content": section["content"]}
+                for section in split_text(text, None, matcher)]
+    with open(sections_path_for(source_path, output_dir), "w", encoding="utf-8") as f:
+        json.dump(sections, f, ensure_ascii=False, indent=2)
+    return len(sections)
+
+
+def split_files(paths, output_dir, matcher):
+    """拆分已有的结果文件（不调用API），所有文件共用同一个编译好的匹配器"""
+    output_dirs = output_dirs_for(paths, output_dir)
+    failed = 0
+    for path in paths:
+        try:
+            os.makedirs(output_dirs[path], exist_ok=True)
+            text, _ = read_script_file(path)
+            count = write_sections(text, path, output_dirs[path], matcher)
+            print(f"{os.path.basename(path)}: 拆分为 {count} 段")
+        except Exception as e:
+            failed += 1
+            print(f"{os.path.basename(path)}: 失败 ({type(e).__name__}: {str(e)})")
+    return failed
+
+
+def analyze_file(script_path, output_dir, prompt, api_url, api_key, model, client=None, cache=None,
+                 chunk_options=None, segment_options=None, shots_format=None, split_matcher=None, content=None,
+                 variables=None):
+    """分析单个剧本文件并写出结果，返回该剧本的统计信息
+
+    chunk_options 不为None时按场景切分并行分析，格式为 {"max_chars": ..., "max_workers": ...}；
+    segment_options 不为None时按15秒片段并行生成分镜，格式为 {"max_workers": ...}；
+    shots_format 为 "json" 或 "csv" 时把分镜结果解析为镜头记录并另存一份；
+    split_matcher 不为None时按该匹配器拆分结果并另存为 <剧本名>.sections.json；
+    content 为已读取的文件字节，传入时不再读取文件；
+    variables 为提示词模板中 {script} 以外的变量。
+    """
+    record = {"script": script_path, "ok": False, "latency": 0.0}
+    start = time.perf_counter()
+    try:
+        if content is not None:
+            script, encoding = decode_script(content)
+        else:
+            script, encoding = read_script_file(script_path)
+        record["encoding"] = encoding
+        if segment_options is not None:
+            result = generate_storyboard(script.strip(), prompt, api_url, api_key, model,
+                                         client=client, cache=cache, variables=variables, **segment_options)
+            analysis = result["text"]
+            record["segments"] = len(result["plan"]["segments"])
+            if result["failed"]:
+                record["failed_segments"] = [r["index"] for r in result["segments"] if not r["ok"]]
+        elif chunk_options is not None:
+            result = analyze_long_script(script.strip(), prompt, api_url, api_key, model,
+                                         client=client, cache=cache, variables=variables, **chunk_options)
+            analysis = result["text"]
+            record["chunks"] = len(result["chunks"])
+        else:
+            result = analyze_script_detailed(script.strip(), prompt, api_url, api_key, model,
+                                             verbose=False, client=client, cache=cache, variables=variables)
+            analysis = result["text"]
+            record["prompt_tokens"] = result["budget"]["prompt_tokens"]
+            record["max_tokens"] = result["budget"]["max_tokens"]
+            if result["budget"]["warning"]:
+                record["warning"] = result["budget"]["warning"]
+
+        os.makedirs(output_dir, exist_ok=True)
+        output_path = result_path_for(script_path, output_dir)
+        with open(output_path, "w", encoding="utf-8") as f:
+            f.write(analysis)
+        if shots_format:
+            segments = parse_storyboard(analysis)
+            shots_path = shots_path_for(script_path, output_dir, shots_format)
+            export_storyboard(segments, shots_path)
+            record["shots"] = sum(len(segment.shots) for segment in segments)
+            record["shots_output"] = shots_path
+        if split_matcher is not None:
+            record["sections"] = write_sections(analysis, script_path, output_dir, split_matcher)
+        record["ok"] = True
+        record["output"] = output_path
+    except Exception as e:
+        record["error"] = f"{type(e).__name__}: {str(e)}"
+    record["latency"] = time.perf_counter() - start
+    return record
+
+
+def run_batch(script_paths, output_dir, prompt, api_url, api_key, model, workers=DEFAULT_WORKERS, cache=None,
+              chunk_options=None, segment_options=None, shots_format=None, split_matcher=None, variables=None):
+    """使用有界线程池并发分析所有剧本，返回汇总信息
+
+    不同目录中有同名剧本时结果按相对路径写入 output_dir 的子目录（见 output_dirs_for）。
+    """
+    output_dirs = output_dirs_for(script_paths, output_dir)
+    os.makedirs(output_dir, exist_ok=True)
+    records = []
+    start = time.perf_counter()
+
+    # 所有工作线程共享一个连接池，池大小与最大并发请求数一致
+    inner_options = segment_options or chunk_options
+    pool_size = max(1, workers) * (max(1, inner_options["max_workers"]) if inner_options else 1)
+    client = ProviderClient(pool_size=pool_size)
+    with client, ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        futures = [
+            executor.submit(analyze_file, path, output_dirs[path], prompt, api_url, api_key, model, client, cache,
+                            chunk_options, segment_options, shots_format, split_matcher, None, variables)
+            for path in script_paths
+        ]
+        for done, future in enumerate(as_completed(futures), 1):
+            record = future.result()
+            records.append(record)
+            status = "完成" if record["ok"] else f"失败 ({record['error']})"
+            print(f"[{done}/{len(futures)}] {os.path.basename(record['script'])}: {status} {record['latency']:.2f}s")
+
+    wall_time = time.perf_counter() - start
+    records.sort(key=lambda r: r["script"])
+    latencies = sorted(r["latency"] for r in records)
+    summary = {
+        "model": model,
+        "api_url": api_url,
+        "workers": workers,
+        "total": len(records),
+        "succeeded": sum(1 for r in records if r["ok"]),
+        "failed": sum(1 for r in records if not r["ok"]),
+        "wall_time": wall_time,
+        "scripts_per_minute": (len(records) / wall_time * 60) if wall_time > 0 else 0.0,
+        "latency_avg": (sum(latencies) / len(latencies)) if latencies else 0.0,
+        "latency_p50": _percentile(latencies, 50),
+        "latency_p95": _percentile(latencies, 95),
+        "latency_max": latencies[-1] if latencies else 0.0,
+        "cache": cache.stats() if cache is not None else None,
+        "retry": client.retry_policy.stats(),
+        "scripts": records,
+    }
+
+    with open(os.path.join(output_dir, SUMMARY_FILENAME), "w", encoding="utf-8") as f:
+        json.dump(summary, f, ensure_ascii=False, indent=2)
+    return summary
+
+
+def run_watch(folder, prompt, api_url, api_key, model, workers=DEFAULT_WORKERS, cache=None,
+              interval=DEFAULT_WATCH_INTERVAL, stop_event=None, **options):
+    """监视文件夹，新增或内容变化的剧本最多 workers 个同时分析，结果写在剧本旁边
+
+    options 与 analyze_file 的 chunk_options/segment_options/shots_format/split_matcher/variables 相同。
+    按 Ctrl+C 或设置 stop_event 后停止扫描，等待已提交的剧本分析完成后返回。
+    """
+    watcher = FolderWatcher(folder)
+    stop_event = stop_event or threading.Event()
+    inner_options = options.get("segment_options") or options.get("chunk_options")
+    pool_size = max(1, workers) * (max(1, inner_options["max_workers"]) if inner_options else 1)
+    client = ProviderClient(pool_size=pool_size)
+
+    def process(path, data, digest):
+        record = analyze_file(path, os.path.dirname(path), prompt, api_url, api_key, model, client, cache,
+                              content=data, **options)
+        watcher.mark_done(path, digest, record["ok"], record.get("error"))
+        status = "完成" if record["ok"] else f"失败 ({record['error']})"
+        print(f"{os.path.basename(path)}: {status} {record['latency']:.2f}s")
+
+    with client, ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        def submit(path, data, digest):
+            print(f"发现新剧本: {os.path.basename(path)}")
+            executor.submit(process, path, data, digest)
+
+        print(f"正在监视 {watcher.folder}（每 {interval:g} 秒扫描一次，按 Ctrl+C 停止）")
+        try:
+            watch_loop(watcher, submit, interval, stop_event)
+        except KeyboardInterrupt:
+            print("停止监视，等待正在进行的分析完成...")
+            stop_event.set()
+
+
+def _percentile(sorted_values, percent):
+    """计算已排序列表的百分位数（最近秩法）"""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, int(round(percent / 100 * len(sorted_values))) - 1))
+    return sorted_values[rank]
+
+
+def print_report(summary):
+    """打印吞吐量与延迟报告"""
+    print("\n=== 批量分析报告 ===")
+    print(f"剧本总数: {summary['total']}  成功: {summary['succeeded']}  失败: {summary['failed']}")
+    print(f"总耗时: {summary['wall_time']:.2f}s  并发数: {summary['workers']}")
+    print(f"吞吐量: {summary['scripts_per_minute']:.1f} 个/分钟")
+    print(f"单个剧本延迟: 平均 {summary['latency_avg']:.2f}s  "
+          f"P50 {summary['latency_p50']:.2f}s  P95 {summary['latency_p95']:.2f}s  "
+          f"最大 {summary['latency_max']:.2f}s")
+    retry = summary["retry"]
+    print(f"重试: 尝试 {retry['attempts']}  重试 {retry['retries']}  不可重试错误 {retry['fatal']}  "
+          f"熔断 {retry['breaker_trips']}  熔断拒绝 {retry['short_circuited']}")
+    if summary["cache"]:
+        print(f"缓存: 命中 {summary['cache']['hits']}  未命中 {summary['cache']['misses']}  "
+              f"淘汰 {summary['cache']['evictions']}")
+    for record in summary["scripts"]:
+        mark = "OK " if record["ok"] else "ERR"
+        print(f"  {mark} {record['latency']:7.2f}s  {os.path.basename(record['script'])}")
+
+
+def build_parser():
+    """构建命令行参数解析器"""
+    parser = argparse.ArgumentParser(description="无界面批量分析剧本目录")
+    parser.add_argument("inputs", nargs="+", help="剧本目录、文件或通配符（如 scripts/*.txt）")
+    parser.add_argument("-o", "--output", default="results", help="结果输出目录（默认: results）")
+    parser.add_argument("-w", "--workers", type=int, default=DEFAULT_WORKERS, help=f"并发数（默认: {DEFAULT_WORKERS}）")
+    parser.add_argument("--api-key", default=None, help="API密钥（默认读取环境变量 API_KEY）")
+    parser.add_argument("--api-url", default=None, help="API URL（默认读取环境变量 API_URL）")
+    parser.add_argument("--model", default=None, help="模型名称（默认读取环境变量 MODEL）")
+    parser.add_argument("--prompt-file", default=None, help="提示词文件（默认读取环境变量 PROMPT）")
+    parser.add_argument("--template", default=None, help="使用模板文件（默认为项目目录下的 prompt_templates.json）中的模板名称")
+    parser.add_argument("--var", action="append", default=[], metavar="名称=值",
+                        help="提示词模板变量，可多次指定（如 --var duration=60秒 --var style=赛博朋克）")
+    parser.add_argument("--chunk", action="store_true", help="长剧本按场景切分并行分析")
+    parser.add_argument("--chunk-chars", type=int, default=DEFAULT_CHUNK_CHARS,
+                        help=f"每个场景片段的最大字符数（默认: {DEFAULT_CHUNK_CHARS}）")
+    parser.add_argument("--chunk-workers", type=int, default=DEFAULT_CHUNK_WORKERS,
+                        help=f"单个剧本同时分析的片段数（默认: {DEFAULT_CHUNK_WORKERS}）")
+    parser.add_argument("--segments", action="store_true",
+                        help="分镜模板模式：先生成分段规划，再并行生成每个15秒片段")
+    parser.add_argument("--segment-workers", type=int, default=DEFAULT_SEGMENT_WORKERS,
+                        help=f"单个剧本同时生成的片段数（默认: {DEFAULT_SEGMENT_WORKERS}）")
+    parser.add_argument("--shots", choices=["json", "csv"], default=None,
+                        help="把分镜结果解析为镜头记录，另存为 <剧本名>.shots.json/csv")
+    parser.add_argument("--split-mode", choices=SPLIT_MODES, default=None,
+                        help="按分解词原文/正则表达式/Markdown标题拆分结果，另存为 <剧本名>.sections.json")
+    parser.add_argument("--split-pattern", action="append", default=[],
+                        help="分解词或正则表达式（可重复指定）")
+    parser.add_argument("--heading-level", type=int, default=2, help="heading 模式拆分的最大标题级别（默认: 2）")
+    parser.add_argument("--split-only", action="store_true",
+                        help="只拆分已有的结果文件，不调用API（输入为结果文件或目录）")
+    parser.add_argument("--watch", action="store_true",
+                        help="监视输入目录，自动分析新增或内容变化的剧本，结果写在剧本旁边")
+    parser.add_argument("--watch-interval", type=float, default=DEFAULT_WATCH_INTERVAL,
+                        help=f"监视模式的扫描间隔秒数（默认: {DEFAULT_WATCH_INTERVAL:g}）")
+    parser.add_argument("--no-cache", action="store_true", help="本次运行不使用响应缓存")
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR, help=f"响应缓存目录（默认: {DEFAULT_CACHE_DIR}）")
+    return parser
+
+
+def load_prompt(args):
+    """按 模板 > 提示词文件 > 环境变量 > 默认值 的顺序确定提示词"""
+    if args.template:
+        template = get_template_store().get(args.template)
+        if template is None:
+            raise ValueError(f"模板不存在: {args.template}")
+        return template
+    if args.prompt_file:
+        return read_script_file(args.prompt_file)[0]
+    return os.getenv("PROMPT", DEFAULT_PROMPT)
+
+
+def main(argv=None):
+    """批处理命令行入口"""
+    load_dotenv()
+    args = build_parser().parse_args(argv)
+
+    # 拆分匹配器只编译一次，所有文件和工作线程共用
+    split_matcher = None
+    if args.split_only or args.split_mode:
+        mode = args.split_mode or "literal"
+        if mode != "heading" and not args.split_pattern:
+            print("错误: 请通过 --split-pattern 指定分解词")
+            return 2
+        try:
+            split_matcher = get_matcher(mode, tuple(args.split_pattern), args.heading_level)
+        except ValueError as e:
+            print(f"错误: {str(e)}")
+            return 2
+
+    if args.split_only:
+        paths = collect_scripts(args.inputs, include_results=True)
+        if not paths:
+            print("错误: 没有找到任何结果文件")
+            return 2
+        try:
+            output_dirs_for(paths, args.output)
+        except ValueError as e:
+            print(f"错误: {str(e)}")
+            return 2
+        return 0 if split_files(paths, args.output, split_matcher) == 0 else 1
+
+    api_key = args.api_key or os.getenv("API_KEY", "")
+    api_url = args.api_url or os.getenv("API_URL", "https://ai.t8star.cn")
+    model = args.model or os.getenv("MODEL", "gpt-3.5-turbo")
+    if not api_key:
+        print("错误: 请通过 --api-key 或环境变量 API_KEY 提供API密钥")
+        return 2
+
+    try:
+        prompt = load_prompt(args).strip()
+    except Exception as e:
+        print(f"错误: 加载提示词失败: {str(e)}")
+        return 2
+
+    # 模板只编译一次；缺少变量时在发送任何请求之前退出
+    try:
+        variables = parse_variables("\n".join(args.var))
+    except ValueError as e:
+        print(f"错误: {str(e)}")
+        return 2
+    template = compile_template(prompt)
+    for problem in template.problems:
+        print(f"警告: {problem}")
+    missing = template.missing(dict(variables, script=""))
+    if missing:
+        print(f"错误: 提示词模板缺少变量 {', '.join('{' + name + '}' for name in missing)}，"
+              f"请通过 --var 名称=值 提供")
+        return 2
+
+    cache = None if args.no_cache else ResponseCache(args.cache_dir)
+    chunk_options = None
+    if args.chunk:
+        chunk_options = {"max_chars": args.chunk_chars, "max_workers": args.chunk_workers}
+    segment_options = {"max_workers": args.segment_workers} if args.segments else None
+
+    if args.watch:
+        if len(args.inputs) != 1 or not os.path.isdir(args.inputs[0]):
+            print("错误: 监视模式需要指定一个目录")
+            return 2
+        run_watch(args.inputs[0], prompt, api_url, api_key, model, workers=args.workers, cache=cache,
+                  interval=args.watch_interval, chunk_options=chunk_options, segment_options=segment_options,
+                  shots_format=args.shots, split_matcher=split_matcher, variables=variables)
+        return 0
+
+    script_paths = collect_scripts(args.inputs)
+    if not script_paths:
+        print("错误: 没有找到任何剧本文件")
+        return 2
+    # 输出文件名冲突时在发送任何请求之前退出
+    try:
+        output_dirs_for(script_paths, args.output)
+    except ValueError as e:
+        print(f"错误: {str(e)}")
+        return 2
+
+    print(f"共找到 {len(script_paths)} 个剧本，使用模型 {model}，并发数 {args.workers}")
+    summary = run_batch(script_paths, args.output, prompt, api_url, api_key, model,
+                        workers=args.workers, cache=cache, chunk_options=chunk_options,
+                        segment_options=segment_options, shots_format=args.shots, split_matcher=split_matcher,
+                        variables=variables)
+    print_report(summary)
+    return 0 if summary["failed"] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
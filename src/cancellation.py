@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+任务取消令牌（不依赖tkinter）
+
+取消时依次调用已登记的回调（如关闭正在进行的HTTP连接），
+等待中的重试退避也会立即结束。
+"""
+
+import threading
+
+
+class CancelledError(Exception):
+    """任务已被取消"""
+
+
+class CancelToken:
+    """线程安全的取消令牌"""
+    def __init__(self):
+        self._event = threading.Event()
+        self._callbacks = []
+        self._lock = threading.Lock()
+
+    @property
+    def cancelled(self):
+        """是否已取消"""
+        return self._event.is_set()
+
+    def cancel(self):
+        """取消任务并调用所有已登记的回调"""
+        with self._lock:
+            if self._event.is_set():
+                return
+            self._event.set()
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as e:
+                print(f"取消回调执行失败: {type(e).__name__}: {str(e)}")
+
+    def on_cancel(self, callback):
+        """登记取消时要调用的回调；已取消时立即调用"""
+        with self._lock:
+            if not self._event.is_set():
+                self._callbacks.append(callback)
+                return
+        callback()
+
+    def remove(self, callback):
+        """移除已登记的回调"""
+        with self._lock:
+            if callback in self._callbacks:
+                self._callbacks.remove(callback)
+
+    def wait(self, timeout):
+        """最多等待timeout秒，期间被取消则提前返回True"""
+        return self._event.wait(timeout)
+
+    def raise_if_cancelled(self):
+        """已取消时抛出 CancelledError"""
+        if self._event.is_set():
+            raise CancelledError("任务已取消")
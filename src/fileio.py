@@ -0,0 +1,29 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+原子文件写入（不依赖tkinter）
+
+先写入同目录下的临时文件再替换目标文件，写入中断时目标文件保持原样。
+"""
+
+import os
+import threading
+
+
+def atomic_write(path, write):
+    """先写临时文件再替换目标文件；write(f) 接收以二进制模式打开的文件对象"""
+    tmp_path = f"{path}.{threading.get_ident()}.tmp"
+    try:
+        with open(tmp_path, "wb") as f:
+            write(f)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def atomic_write_text(path, text):
+    """原子写入UTF-8文本文件"""
+    atomic_write(path, lambda f: f.write(text.encode("utf-8")))
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+监视文件夹自动分析（不依赖tkinter）
+
+按固定间隔扫描文件夹中的剧本，索引记录每个文件的 路径 -> (修改时间, 大小, 内容哈希)：
+修改时间和大小都没变的文件不读取；变了才读取并计算哈希，哈希与上次发送的相同则不再发送。
+索引保存在被监视的文件夹中，程序重启后同样不会重复发送。
+"""
+
+import fnmatch
+import hashlib
+import json
+import os
+import threading
+import time
+
+from src.fileio import atomic_write_text
+
+
+# 索引文件名（保存在被监视的文件夹中）
+WATCH_INDEX_NAME = ".ai_tsc_watch.json"
+
+# 默认扫描间隔（秒）
+DEFAULT_WATCH_INTERVAL = 5.0
+
+# 文件最后修改后至少经过多少秒才处理，避免读到正在写入的文件
+DEFAULT_SETTLE_SECONDS = 2.0
+
+# 分析结果文件的后缀，扫描时跳过
+RESULT_SUFFIX = ".result.txt"
+
+# 索引中的状态
+PENDING = "pending"
+DONE = "done"
+FAILED = "failed"
+
+
+def result_path_for(script_path, output_dir):
+    """返回剧本对应的结果文件路径（只取剧本文件名，不同目录的同名剧本需使用不同的 output_dir）"""
+    name = os.path.splitext(os.path.basename(script_path))[0]
+    return os.path.join(output_dir, f"{name}{RESULT_SUFFIX}")
+
+
+def content_hash(data):
+    """计算文件内容的哈希"""
+    return hashlib.sha256(data).hexdigest()
+
+
+class FolderWatcher:
+    """监视单个文件夹，找出新增或内容变化的剧本"""
+    def __init__(self, folder, pattern="*.txt", settle=DEFAULT_SETTLE_SECONDS):
+        self.folder = os.path.abspath(folder)
+        self.pattern = pattern
+        self.settle = settle
+        self.index_path = os.path.join(self.folder, WATCH_INDEX_NAME)
+        self._lock = threading.Lock()
+        self.index = self._load_index()
+
+    def _load_index(self):
+        """读取索引；上次运行中断时仍在处理的文件视为已发送"""
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                index = json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            print(f"监视索引无法读取，将重新建立: {str(e)}")
+            return {}
+        for entry in index.values():
+            if entry.get("status") == PENDING:
+                entry["status"] = FAILED
+                entry["error"] = "上次运行中断"
+        return index
+
+    def save(self):
+        """原子写入索引"""
+        with self._lock:
+            text = json.dumps(self.index, ensure_ascii=False, indent=2)
+        atomic_write_text(self.index_path, text)
+
+    def _candidates(self):
+        """列出符合条件的剧本文件 (文件名, stat)"""
+        for entry in os.scandir(self.folder):
+            name = entry.name
+            if name.endswith(RESULT_SUFFIX) or not fnmatch.fnmatch(name, self.pattern):
+                continue
+            if entry.is_file():
+                yield name, entry.stat()
+
+    def scan(self):
+        """扫描一次，返回需要分析的 [(路径, 内容字节, 哈希), ...]，并在索引中标记为处理中"""
+        changed = []
+        dirty = False
+        now = time.time()
+        for name, stat in self._candidates():
+            with self._lock:
+                entry = self.index.get(name)
+            if entry and entry["mtime"] == stat.st_mtime and entry["size"] == stat.st_size:
+                continue
+            if now - stat.st_mtime < self.settle:
+                continue  # 可能还在写入，下次扫描再处理
+            path = os.path.join(self.folder, name)
+            try:
+                with open(path, "rb") as f:
+                    data = f.read()
+            except OSError as e:
+                print(f"读取 {name} 失败: {str(e)}")
+                continue
+            digest = content_hash(data)
+            with self._lock:
+                if entry and entry["hash"] == digest:
+                    # 只是修改时间变了（如重新保存），内容相同不再发送
+                    entry.update(mtime=stat.st_mtime, size=stat.st_size)
+                else:
+                    self.index[name] = {"mtime": stat.st_mtime, "size": stat.st_size, "hash": digest,
+                                        "status": PENDING, "error": None}
+                    changed.append((path, data, digest))
+            dirty = True
+        if dirty:
+            self.save()
+        return changed
+
+    def mark_done(self, path, digest, ok, error=None):
+        """记录一次分析的结果（文件已再次变化时只保留新的记录）"""
+        name = os.path.basename(path)
+        with self._lock:
+            entry = self.index.get(name)
+            if entry is None or entry["hash"] != digest:
+                return
+            entry["status"] = DONE if ok else FAILED
+            entry["error"] = error
+        self.save()
+
+
+def watch_loop(watcher, submit, interval=DEFAULT_WATCH_INTERVAL, stop_event=None):
+    """持续扫描，把每个需要分析的文件交给 submit(路径, 内容字节, 哈希)，直到 stop_event 被设置"""
+    stop_event = stop_event or threading.Event()
+    while not stop_event.is_set():
+        try:
+            for path, data, digest in watcher.scan():
+                submit(path, data, digest)
+        except OSError as e:
+            print(f"扫描监视文件夹失败: {str(e)}")
+        stop_event.wait(interval)
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+分析历史记录（SQLite，不依赖tkinter）
+
+每次完成的分析连同剧本、提示词/模板、模型、耗时、token用量和结果保存到本地数据库，
+剧本和结果建立 FTS5 全文索引（trigram 分词，适合中文子串搜索），几万条记录中搜索仍在毫秒级。
+"""
+
+import os
+import sqlite3
+import threading
+import time
+
+
+# 默认数据库路径
+DEFAULT_HISTORY_PATH = os.getenv("HISTORY_DB", os.path.join(os.path.expanduser("~"), ".ai_tsc", "history.db"))
+
+# trigram 分词的最短可索引查询长度，更短的关键词退回逐行匹配
+MIN_FTS_QUERY_CHARS = 3
+
+# 列表中剧本预览的字符数
+PREVIEW_CHARS = 60
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    created REAL NOT NULL,
+    script TEXT NOT NULL,
+    prompt TEXT NOT NULL DEFAULT '',
+    template TEXT,
+    model TEXT NOT NULL DEFAULT '',
+    api_url TEXT NOT NULL DEFAULT '',
+    mode TEXT NOT NULL DEFAULT '',
+    latency REAL,
+    prompt_tokens INTEGER,
+    completion_tokens INTEGER,
+    total_tokens INTEGER,
+    cached INTEGER NOT NULL DEFAULT 0,
+    output TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS runs_created ON runs (created);
+CREATE VIRTUAL TABLE IF NOT EXISTS runs_fts USING fts5(
+    script, output, content='runs', content_rowid='id', tokenize='trigram'
+);
+CREATE TRIGGER IF NOT EXISTS runs_ai AFTER INSERT ON runs BEGIN
+    INSERT INTO runs_fts (rowid, script, output) VALUES (new.id, new.script, new.output);
+END;
+CREATE TRIGGER IF NOT EXISTS runs_ad AFTER DELETE ON runs BEGIN
+    INSERT INTO runs_fts (runs_fts, rowid, script, output) VALUES ('delete', old.id, old.script, old.output);
+END;
+"""
+
+# 列表查询只取摘要字段，不读出完整的剧本和结果
+SUMMARY_COLUMNS = (f"runs.id, runs.created, runs.model, runs.template, runs.mode, runs.latency, "
+                   f"runs.total_tokens, runs.cached, substr(runs.script, 1, {PREVIEW_CHARS}) AS preview")
+
+
+def fts_phrase(query):
+    """把用户输入转为 FTS5 短语查询（按空白拆分，各词都需出现）"""
+    terms = query.split()
+    return " ".join('"' + term.replace('"', '""') + '"' for term in terms)
+
+
+class HistoryStore:
+    """分析历史数据库；同一个实例可在界面线程和工作线程间共享"""
+    def __init__(self, path=DEFAULT_HISTORY_PATH):
+        self.path = path
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+
+    def add(self, script, output, model="", prompt="", template=None, api_url="", mode="", latency=None,
+            usage=None, cached=False):
+        """保存一次分析，返回记录编号"""
+        usage = usage or {}
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "INSERT INTO runs (created, script, prompt, template, model, api_url, mode, latency, "
+                "prompt_tokens, completion_tokens, total_tokens, cached, output) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (time.time(), script, prompt, template, model, api_url, mode, latency,
+                 usage.get("prompt_tokens"), usage.get("completion_tokens"), usage.get("total_tokens"),
+                 int(bool(cached)), output))
+            return cursor.lastrowid
+
+    def search(self, query="", limit=200):
+        """按关键词搜索剧本和结果，返回最新的 limit 条摘要（字典列表）；关键词为空时返回最近的记录"""
+        query = query.strip()
+        if not query:
+            sql = f"SELECT {SUMMARY_COLUMNS} FROM runs ORDER BY runs.id DESC LIMIT ?"
+            params = (limit,)
+        elif all(len(term) >= MIN_FTS_QUERY_CHARS for term in query.split()):
+            sql = (f"SELECT {SUMMARY_COLUMNS} FROM runs_fts JOIN runs ON runs.id = runs_fts.rowid "
+                   f"WHERE runs_fts MATCH ? ORDER BY runs.id DESC LIMIT ?")
+            params = (fts_phrase(query), limit)
+        else:
+            # 短关键词无法使用 trigram 索引，在索引表上做子串匹配
+            conditions = " AND ".join("(runs_fts.script LIKE ? OR runs_fts.output LIKE ?)" for _ in query.split())
+            sql = (f"SELECT {SUMMARY_COLUMNS} FROM runs_fts JOIN runs ON runs.id = runs_fts.rowid "
+                   f"WHERE {conditions} ORDER BY runs.id DESC LIMIT ?")
+            params = tuple(p for term in query.split() for p in (f"%{term}%", f"%{term}%")) + (limit,)
+        with self._lock:
+            return [dict(row) for row in self._conn.execute(sql, params)]
+
+    def get(self, run_id):
+        """读取一条完整记录，不存在时返回None"""
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM runs WHERE id = ?", (run_id,)).fetchone()
+        return dict(row) if row else None
+
+    def delete(self, run_id):
+        """删除一条记录"""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM runs WHERE id = ?", (run_id,))
+
+    def count(self):
+        """返回记录总数"""
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM runs").fetchone()[0]
+
+    def close(self):
+        """关闭数据库连接"""
+        with self._lock:
+            self._conn.close()
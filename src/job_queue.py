@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+分析任务队列（不依赖tkinter）
+
+任务按优先级排队（数值越小越先执行，同优先级先到先得），由可调数量的工作线程执行。
+每个任务持有一个取消令牌：排队中的任务直接移出队列，运行中的任务中断正在进行的HTTP请求。
+"""
+
+import heapq
+import itertools
+import threading
+import time
+
+from src.cancellation import CancelledError, CancelToken
+
+
+# 优先级：界面上的交互请求优先于后台批量任务
+PRIORITY_INTERACTIVE = 0
+PRIORITY_NORMAL = 10
+PRIORITY_BACKGROUND = 20
+
+PRIORITY_LABELS = {PRIORITY_INTERACTIVE: "交互", PRIORITY_NORMAL: "普通", PRIORITY_BACKGROUND: "后台"}
+
+# 默认并发数和上限
+DEFAULT_JOB_WORKERS = 2
+MAX_JOB_WORKERS = 8
+
+# 任务状态
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+STATE_LABELS = {QUEUED: "排队中", RUNNING: "运行中", DONE: "已完成", FAILED: "失败", CANCELLED: "已取消"}
+
+
+def job_name(prefix, script):
+    """用剧本的第一行生成任务名称"""
+    first_line = script.strip().split("\n", 1)[0].strip()
+    if len(first_line) > 30:
+        first_line = first_line[:30] + "..."
+    return f"{prefix}: {first_line}"
+
+
+class Job:
+    """一个排队执行的任务，func(job) 的返回值保存为 result"""
+    def __init__(self, job_id, name, func, priority):
+        self.id = job_id
+        self.name = name
+        self.func = func
+        self.priority = priority
+        self.state = QUEUED
+        self.token = CancelToken()
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+
+    @property
+    def finished(self):
+        """是否已结束（完成、失败或取消）"""
+        return self.state in (DONE, FAILED, CANCELLED)
+
+    def elapsed(self):
+        """返回运行耗时（秒），尚未开始时为0"""
+        if self.started_at is None:
+            return 0.0
+        return (self.finished_at or time.time()) - self.started_at
+
+
+class JobManager:
+    """带优先级的任务队列和工作线程
+
+    on_update(job) 在任务状态变化时调用（可能在工作线程中），用于刷新界面。
+    """
+    def __init__(self, workers=DEFAULT_JOB_WORKERS, on_update=None):
+        self.on_update = on_update
+        self.workers = 0
+        self._heap = []
+        self._seq = itertools.count()
+        self._ids = itertools.count(1)
+        self._jobs = {}
+        self._threads = []
+        self._running = 0
+        self._closed = False
+        self._cond = threading.Condition()
+        self.set_workers(workers)
+
+    def _notify(self, job):
+        if self.on_update:
+            try:
+                self.on_update(job)
+            except Exception as e:
+                print(f"任务状态回调失败: {type(e).__name__}: {str(e)}")
+
+    def submit(self, name, func, priority=PRIORITY_NORMAL):
+        """提交任务，返回 Job"""
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("任务队列已关闭")
+            job = Job(next(self._ids), name, func, priority)
+            self._jobs[job.id] = job
+            heapq.heappush(self._heap, (priority, next(self._seq), job))
+            self._cond.notify_all()
+        self._notify(job)
+        return job
+
+    def get(self, job_id):
+        """按编号获取任务，不存在时返回None"""
+        with self._cond:
+            return self._jobs.get(job_id)
+
+    def jobs(self):
+        """返回所有任务（按提交顺序）"""
+        with self._cond:
+            return list(self._jobs.values())
+
+    def cancel(self, job_id):
+        """取消任务，返回是否有任务被取消（已结束的任务不受影响）"""
+        with self._cond:
+            job = self._jobs.get(job_id)
+            if job is None or job.finished:
+                return False
+            if job.state == QUEUED:
+                # 堆中的条目在出队时跳过
+                job.state = CANCELLED
+                job.finished_at = time.time()
+        job.token.cancel()
+        self._notify(job)
+        return True
+
+    def clear_finished(self):
+        """从列表中移除已结束的任务，返回移除的数量"""
+        with self._cond:
+            finished = [job_id for job_id, job in self._jobs.items() if job.finished]
+            for job_id in finished:
+                del self._jobs[job_id]
+            return len(finished)
+
+    def set_workers(self, workers):
+        """调整同时运行的任务数（减少时正在运行的任务不受影响）"""
+        workers = max(1, min(MAX_JOB_WORKERS, int(workers)))
+        with self._cond:
+            self.workers = workers
+            while len(self._threads) < workers:
+                thread = threading.Thread(target=self._worker, name=f"job-worker-{len(self._threads) + 1}", daemon=True)
+                self._threads.append(thread)
+                thread.start()
+            self._cond.notify_all()
+        return workers
+
+    def counts(self):
+        """返回各状态的任务数"""
+        with self._cond:
+            counts = dict.fromkeys(STATE_LABELS, 0)
+            for job in self._jobs.values():
+                counts[job.state] += 1
+            return counts
+
+    def shutdown(self):
+        """关闭队列并取消所有未结束的任务"""
+        with self._cond:
+            self._closed = True
+            pending = [job for job in self._jobs.values() if not job.finished]
+            self._cond.notify_all()
+        for job in pending:
+            self.cancel(job.id)
+
+    def _next_job(self):
+        """弹出下一个待运行的任务（跳过已取消的），没有时返回None"""
+        while self._heap:
+            job = heapq.heappop(self._heap)[2]
+            if job.state == QUEUED:
+                return job
+        return None
+
+    def _has_queued(self):
+        while self._heap and self._heap[0][2].state != QUEUED:
+            heapq.heappop(self._heap)
+        return bool(self._heap)
+
+    def _worker(self):
+        while True:
+            with self._cond:
+                while not self._closed and (self._running >= self.workers or not self._has_queued()):
+                    self._cond.wait()
+                if self._closed:
+                    return
+                job = self._next_job()
+                job.state = RUNNING
+                job.started_at = time.time()
+                self._running += 1
+            self._notify(job)
+            self._run(job)
+
+    def _run(self, job):
+        try:
+            result = job.func(job)
+            state, error = DONE, None
+        except CancelledError:
+            result, state, error = None, CANCELLED, "任务已取消"
+        except Exception as e:
+            result, state, error = None, FAILED, str(e)
+        with self._cond:
+            job.result = result
+            job.error = error
+            job.state = state
+            job.finished_at = time.time()
+            self._running -= 1
+            self._cond.notify_all()
+        self._notify(job)
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+多模型并发对比（不依赖tkinter）
+"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+
+def parse_model_list(text):
+    """解析以逗号或换行分隔的模型列表（去重并保持顺序）"""
+    models = []
+    for item in text.replace("\n", ",").split(","):
+        item = item.strip()
+        if item and item not in models:
+            models.append(item)
+    return models
+
+
+def analyze_one_model(script, prompt, api_url, api_key, model, client=None, cache=None, variables=None):
+    """使用单个模型分析剧本，失败时返回错误信息而不抛出异常"""
+    # 网络层（requests）较重，第一次发送请求时才导入；解析和格式化函数可在界面线程直接使用
+    from src.api_client import analyze_script_detailed
+
+    start = time.perf_counter()
+    try:
+        result = analyze_script_detailed(script, prompt, api_url, api_key, model,
+                                         verbose=False, client=client, cache=cache, variables=variables)
+        result.update({"model": model, "ok": True, "error": None})
+        return result
+    except Exception as e:
+        return {"model": model, "ok": False, "text": "", "usage": None, "cached": False,
+                "error": str(e), "latency": time.perf_counter() - start}
+
+
+def compare_models(script, prompt, api_url, api_key, models, client=None, cache=None, on_result=None,
+                   variables=None):
+    """把同一剧本同时发送给多个模型
+
+    所有模型并发请求，总耗时约等于最慢的模型。每个模型完成时调用 on_result(result)，
+    返回 (按models顺序排列的结果列表, 总耗时秒数)。
+    """
+    start = time.perf_counter()
+    results = {}
+    with ThreadPoolExecutor(max_workers=max(1, len(models))) as executor:
+        futures = [
+            executor.submit(analyze_one_model, script, prompt, api_url, api_key, model, client, cache, variables)
+            for model in models
+        ]
+        for future in as_completed(futures):
+            result = future.result()
+            results[result["model"]] = result
+            if on_result:
+                on_result(result)
+    return [results[model] for model in models], time.perf_counter() - start
+
+
+def format_usage(usage):
+    """格式化token用量说明"""
+    if not usage:
+        return "tokens: -"
+    return (f"tokens: {usage['total_tokens']} "
+            f"(输入 {usage['prompt_tokens']} / 输出 {usage['completion_tokens']})")
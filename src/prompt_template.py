@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+提示词模板编译与渲染（不依赖tkinter）
+
+模板中的 {名称} 是变量（如 {script}、{duration}、{style}、{scene}），{{名称}} 表示字面的 {名称}，
+其它花括号（如模板里的JSON示例）原样保留。模板只编译一次（按内容缓存）为固定文本片段和变量槽位，
+渲染时填入变量后一次 join；缺少变量时在发送请求之前报错。
+本模块不依赖网络库，界面线程可以直接用来估算和检查提示词。
+"""
+
+import re
+from functools import lru_cache
+
+
+# 默认分析提示词
+DEFAULT_PROMPT = """
+请根据剧本内容，生成详细的电影分镜脚本。
+
+要求：
+1. 分镜需包含场景、镜头号、镜头角度、画面内容、台词、时长等关键信息
+2. 分镜设计要考虑镜头语言和叙事节奏
+3. 格式清晰，易于阅读和理解
+"""
+
+# 常用变量（其它名称同样可用，只是不会出现在界面提示中）
+KNOWN_VARIABLES = ("script", "duration", "style", "scene")
+
+# 模板不含 {script} 时，剧本附加在提示词末尾
+SCRIPT_SUFFIX = "\n\n剧本内容：\n"
+
+# 变量名：字母、汉字或下划线开头（{1} 之类的不是变量）
+NAME = r"[^\W\d]\w*"
+
+TOKEN_PATTERN = re.compile(
+    rf"\{{\{{(?P<escaped>{NAME})\}}\}}"
+    rf"|\{{(?P<name>{NAME})\}}"
+    rf"|(?P<suspect>\{{[ \t]*{NAME}(?:[ \t]+\w+)*[ \t]*\}})"
+)
+
+
+class MissingVariablesError(ValueError):
+    """渲染模板时缺少变量"""
+    def __init__(self, missing):
+        self.missing = missing
+        super().__init__(f"提示词模板缺少变量: {', '.join('{' + name + '}' for name in missing)}")
+
+
+class CompiledTemplate:
+    """编译后的模板：文本片段列表，变量位置为None，槽位记录 (下标, 变量名)"""
+    __slots__ = ("source", "pieces", "slots", "variables", "problems", "has_script")
+
+    def __init__(self, source):
+        self.source = source
+        self.pieces = []
+        self.slots = []
+        self.problems = []
+        literal = []
+        position = 0
+        for match in TOKEN_PATTERN.finditer(source):
+            literal.append(source[position:match.start()])
+            position = match.end()
+            escaped, name, suspect = match.group("escaped", "name", "suspect")
+            if name:
+                self.pieces.append("".join(literal))
+                literal = []
+                self.slots.append((len(self.pieces), name))
+                self.pieces.append(None)
+            elif escaped:
+                literal.append("{" + escaped + "}")
+            else:
+                # 带空格的占位符不会被替换，多半是写错了
+                literal.append(suspect)
+                self.problems.append(f"{suspect} 中有空格，不会被当作变量；变量应写作 {{{suspect.strip('{} ').split()[0]}}}")
+        literal.append(source[position:])
+        self.pieces.append("".join(literal))
+        self.variables = tuple(dict.fromkeys(name for _, name in self.slots))
+        self.has_script = "script" in self.variables
+
+    def required(self):
+        """返回渲染所需的全部变量名（剧本总是需要）"""
+        return self.variables if self.has_script else self.variables + ("script",)
+
+    def missing(self, variables):
+        """返回 variables 中缺少的变量名"""
+        return [name for name in self.required() if name not in variables]
+
+    def render(self, variables):
+        """填入变量，返回完整提示词；缺少变量时抛出 MissingVariablesError"""
+        missing = self.missing(variables)
+        if missing:
+            raise MissingVariablesError(missing)
+        pieces = list(self.pieces)
+        for index, name in self.slots:
+            value = variables[name]
+            pieces[index] = value if isinstance(value, str) else str(value)
+        if not self.has_script:
+            pieces.append(SCRIPT_SUFFIX)
+            pieces.append(variables["script"])
+        return "".join(pieces)
+
+
+@lru_cache(maxsize=256)
+def compile_template(source):
+    """编译模板（相同内容复用编译结果）"""
+    return CompiledTemplate(source)
+
+
+def build_full_prompt(prompt, script, variables=None):
+    """构建完整提示词
+
+    提示词按模板编译（相同模板只编译一次），{script} 及 variables 中的其它变量填入对应位置；
+    如果不包含 {script}，则将剧本内容附加到提示词后面。缺少变量时抛出 MissingVariablesError。
+    """
+    values = dict(variables) if variables else {}
+    values["script"] = script
+    return compile_template(prompt).render(values)
+
+
+def replace_variable(source, name, replacement=""):
+    """把模板中的变量 {name} 替换为固定文本，{{name}} 和其它变量保持不变"""
+    def substitute(match):
+        return replacement if match.group("name") == name else match.group(0)
+    return TOKEN_PATTERN.sub(substitute, source)
+
+
+def validate_template(source):
+    """检查模板，返回问题说明列表（为空表示没有问题）"""
+    return list(compile_template(source).problems)
+
+
+def parse_variables(text):
+    """解析 "名称=值" 形式的变量定义（每行一个），返回字典"""
+    variables = {}
+    for line in text.splitlines():
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        name, sep, value = line.partition("=")
+        name = name.strip()
+        if not sep or not re.fullmatch(NAME, name):
+            raise ValueError(f"变量定义格式应为 名称=值: {line}")
+        variables[name] = value.strip()
+    return variables
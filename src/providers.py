@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+大模型服务商适配层
+
+根据 API URL 和模型名称一次性确定请求端点、请求体格式和响应解析方式，
+结果按配置缓存，后续的分析、重试和批处理请求直接使用对应的适配器。
+"""
+
+from abc import ABC, abstractmethod
+from functools import lru_cache
+
+
+# 系统角色提示词
+SYSTEM_PROMPT = "你是一个专业的电影/短视频分镜脚本专家，擅长将文字剧本转化为详细的分镜脚本"
+
+# 默认生成参数
+TEMPERATURE = 0.7
+MAX_TOKENS = 3000
+
+# 常见的API端点路径
+COMMON_ENDPOINTS = [
+    "/v1/chat/completions",
+    "/chat/completions",
+    "/api/chat/completions",
+    "/v1/chatgpt/completions",
+    "/api/v1/chat/completions"
+]
+
+# 使用OpenAI兼容格式的第三方平台
+THIRD_PARTY_HOSTS = ["api.comfly.chat", "anyroutes.cn", "ai.t8star.cn"]
+
+
+def _fallback_text(result):
+    """兼容第三方平台的其他响应格式，无法识别时返回None"""
+    extractors = [
+        lambda r: r["choices"][0]["message"]["content"],
+        lambda r: r["candidates"][0]["content"]["parts"][0]["text"],
+        lambda r: r["data"]["content"],
+        lambda r: r["content"],
+        lambda r: r["result"],
+    ]
+    for extractor in extractors:
+        try:
+            return extractor(result)
+        except (KeyError, IndexError, TypeError):
+            continue
+    return None
+
+
+class ProviderAdapter(ABC):
+    """服务商适配器基类"""
+    name = "generic"
+
+    def __init__(self, endpoint, model):
+        self.endpoint = endpoint
+        self.model = model
+
+    @property
+    def stream_endpoint(self):
+        """流式请求使用的URL"""
+        return self.endpoint
+
+    def build_headers(self, api_key):
+        """构建请求头"""
+        return {
+            "Authorization": f"Bearer {api_key}",
+            "Content-Type": "application/json"
+        }
+
+    @abstractmethod
+    def build_payload(self, full_prompt, stream=False, max_tokens=MAX_TOKENS):
+        """构建请求体"""
+
+    def extract_text(self, result):
+        """从响应JSON中提取分析文本，无法识别时返回None"""
+        return _fallback_text(result)
+
+    def extract_delta(self, event):
+        """从流式事件JSON中提取增量文本"""
+        return ""
+
+    def extract_usage(self, result):
+        """从响应JSON中提取token用量，无用量信息时返回None"""
+        return None
+
+
+class OpenAIAdapter(ProviderAdapter):
+    """OpenAI及兼容平台（chat/completions）"""
+    name = "openai"
+
+    def build_payload(self, full_prompt, stream=False, max_tokens=MAX_TOKENS):
+        payload = {
+            "model": self.model,
+            "messages": [
+                {"role": "system", "content": SYSTEM_PROMPT},
+                {"role": "user", "content": full_prompt}
+            ],
+            "temperature": TEMPERATURE,
+            "max_tokens": max_tokens
+        }
+        if stream:
+            payload["stream"] = True
+        return payload
+
+    def extract_text(self, result):
+        try:
+            return result["choices"][0]["message"]["content"]
+        except (KeyError, IndexError, TypeError):
+            return _fallback_text(result)
+
+    def extract_delta(self, event):
+        try:
+            choice = event["choices"][0]
+        except (KeyError, IndexError, TypeError):
+            return ""
+        delta = choice.get("delta") or {}
+        return delta.get("content") or choice.get("text") or ""
+
+    def extract_usage(self, result):
+        usage = result.get("usage") if isinstance(result, dict) else None
+        if not isinstance(usage, dict):
+            return None
+        return {
+            "prompt_tokens": usage.get("prompt_tokens", 0),
+            "completion_tokens": usage.get("completion_tokens", 0),
+            "total_tokens": usage.get("total_tokens", 0),
+        }
+
+
+class GeminiAdapter(ProviderAdapter):
+    """Google Gemini（generateContent / streamGenerateContent）"""
+    name = "gemini"
+
+    @property
+    def stream_endpoint(self):
+        # 只在流式请求时推导，无法推导的端点不影响普通请求
+        return gemini_stream_url(self.endpoint)
+
+    def build_headers(self, api_key):
+        headers = super().build_headers(api_key)
+        # Gemini官方接口使用x-goog-api-key认证，代理平台使用Bearer认证，两者都带上
+        headers["x-goog-api-key"] = api_key
+        return headers
+
+    def build_payload(self, full_prompt, stream=False, max_tokens=MAX_TOKENS):
+        # 流式模式由URL决定，请求体不变
+        return {
+            "contents": [
+                {
+                    "parts": [
+                        {"text": SYSTEM_PROMPT},
+                        {"text": full_prompt}
+                    ]
+                }
+            ],
+            "generationConfig": {
+                "temperature": TEMPERATURE,
+                "maxOutputTokens": max_tokens
+            }
+        }
+
+    def extract_text(self, result):
+        try:
+            return "".join(part.get("text", "") for part in result["candidates"][0]["content"]["parts"])
+        except (KeyError, IndexError, TypeError, AttributeError):
+            return _fallback_text(result)
+
+    def extract_delta(self, event):
+        try:
+            return "".join(part.get("text", "") for part in event["candidates"][0]["content"]["parts"])
+        except (KeyError, IndexError, TypeError, AttributeError):
+            return ""
+
+    def extract_usage(self, result):
+        metadata = result.get("usageMetadata") if isinstance(result, dict) else None
+        if not isinstance(metadata, dict):
+            return None
+        return {
+            "prompt_tokens": metadata.get("promptTokenCount", 0),
+            "completion_tokens": metadata.get("candidatesTokenCount", 0),
+            "total_tokens": metadata.get("totalTokenCount", 0),
+        }
+
+
+def resolve_endpoint(api_url, model):
+    """根据API URL和模型补全端点路径"""
+    # 检查API URL是否已经包含常见端点
+    if any(endpoint in api_url for endpoint in COMMON_ENDPOINTS):
+        return api_url
+
+    # 如果API URL看起来像基础URL（没有端点），尝试添加合适的端点
+    if any(host in api_url for host in THIRD_PARTY_HOSTS):
+        # "贞贞的AI工坊"等平台通常使用/v1/chat/completions端点
+        return f"{api_url.rstrip('/')}/v1/chat/completions"
+    if "openai" in api_url.lower():
+        # OpenAI官方API
+        return f"{api_url.rstrip('/')}/v1/chat/completions"
+    if model.startswith("gemini-"):
+        # Google Gemini API使用特定端点
+        if "/models/" not in api_url and "/generateContent" not in api_url:
+            return f"{api_url.rstrip('/')}/generateContent"
+    return api_url
+
+
+def gemini_stream_url(endpoint):
+    """返回Gemini流式请求使用的URL（streamGenerateContent端点），无法推导时抛出 ValueError"""
+    if "streamGenerateContent" in endpoint:
+        return endpoint
+    if ":generateContent" in endpoint or "/generateContent" in endpoint:
+        url = endpoint.replace("generateContent", "streamGenerateContent")
+        separator = "&" if "?" in url else "?"
+        return f"{url}{separator}alt=sse"
+    raise ValueError(f"无法从 {endpoint} 推导Gemini流式端点，请使用以 :generateContent 结尾的API URL")
+
+
+@lru_cache(maxsize=64)
+def resolve_provider(api_url, model):
+    """解析API配置对应的适配器（按 api_url + model 缓存，配置不变时不再重复判断）"""
+    endpoint = resolve_endpoint(api_url, model)
+    # gemini模型走OpenAI兼容端点（如第三方聚合平台）时仍使用OpenAI格式
+    if model.startswith("gemini-") and "chat/completions" not in endpoint:
+        return GeminiAdapter(endpoint, model)
+    return OpenAIAdapter(endpoint, model)
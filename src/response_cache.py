@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+按内容寻址的API响应磁盘缓存（LRU淘汰）
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+
+# 默认缓存目录
+DEFAULT_CACHE_DIR = os.getenv("CACHE_DIR", os.path.join(os.path.expanduser("~"), ".ai_tsc", "cache"))
+
+# 默认容量限制
+DEFAULT_MAX_BYTES = 200 * 1024 * 1024  # 200MB
+DEFAULT_MAX_AGE = 30 * 24 * 3600  # 30天
+
+
+def make_cache_key(api_url, model, system_prompt, full_prompt, temperature, max_tokens):
+    """根据请求的全部决定性参数计算缓存键"""
+    material = json.dumps([api_url, model, system_prompt, full_prompt, temperature, max_tokens],
+                          ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """磁盘响应缓存，每个条目一个文件，按最近访问时间淘汰，按创建时间过期
+
+    命中时更新文件的修改时间，只用于重启后恢复LRU顺序；过期判断使用条目中记录的创建时间。
+    """
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES, max_age=DEFAULT_MAX_AGE):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._index = None  # 键 -> (文件大小, 最近访问时间, 创建时间)，按访问顺序排列；创建时间在首次读取前为None
+        self._total_bytes = 0
+
+    def _path(self, key):
+        """返回缓存条目的文件路径"""
+        return os.path.join(self.cache_dir, key[:2], f"{key}.json")
+
+    def _load_index(self):
+        """首次使用时扫描缓存目录建立内存索引"""
+        if self._index is not None:
+            return
+        entries = []
+        if os.path.isdir(self.cache_dir):
+            for shard in os.scandir(self.cache_dir):
+                if not shard.is_dir():
+                    continue
+                for entry in os.scandir(shard.path):
+                    if entry.name.endswith(".json"):
+                        stat = entry.stat()
+                        entries.append((stat.st_mtime, entry.name[:-5], stat.st_size))
+        entries.sort()
+        self._index = OrderedDict((key, (size, mtime, None)) for mtime, key, size in entries)
+        self._total_bytes = sum(item[0] for item in self._index.values())
+
+    def _remove(self, key):
+        """删除一个缓存条目"""
+        size = self._index.pop(key)[0]
+        self._total_bytes -= size
+        try:
+            os.remove(self._path(key))
+        except OSError:
+            pass
+
+    def _expired(self, created, now):
+        """条目自创建起是否已超过最长保留时间"""
+        return bool(self.max_age) and now - created > self.max_age
+
+    def get(self, key):
+        """读取缓存，未命中或已过期（按创建时间）时返回None"""
+        with self._lock:
+            self._load_index()
+            item = self._index.get(key)
+            now = time.time()
+            if item is None:
+                self.misses += 1
+                return None
+            created = item[2]
+            if created is not None and self._expired(created, now):
+                self._remove(key)
+                self.misses += 1
+                return None
+            try:
+                with open(self._path(key), "r", encoding="utf-8") as f:
+                    entry = json.load(f)
+                value = entry["content"]
+                created = float(entry.get("created", 0))
+            except (OSError, ValueError, KeyError, TypeError):
+                self._remove(key)
+                self.misses += 1
+                return None
+            if self._expired(created, now):
+                self._remove(key)
+                self.misses += 1
+                return None
+            # 更新访问时间，移到LRU队尾（创建时间保持不变）
+            self._index[key] = (item[0], now, created)
+            self._index.move_to_end(key)
+            try:
+                os.utime(self._path(key), (now, now))
+            except OSError:
+                pass
+            self.hits += 1
+            return value
+
+    def put(self, key, content, meta=None):
+        """写入缓存（先写临时文件再重命名），并按容量淘汰最久未访问的条目"""
+        created = time.time()
+        data = json.dumps({"content": content, "meta": meta or {}, "created": created},
+                          ensure_ascii=False).encode("utf-8")
+        path = self._path(key)
+        with self._lock:
+            self._load_index()
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+
+            if key in self._index:
+                self._total_bytes -= self._index[key][0]
+            self._index[key] = (len(data), created, created)
+            self._index.move_to_end(key)
+            self._total_bytes += len(data)
+
+            while self._total_bytes > self.max_bytes and len(self._index) > 1:
+                oldest = next(iter(self._index))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def clear(self):
+        """清空全部缓存"""
+        with self._lock:
+            self._load_index()
+            for key in list(self._index):
+                self._remove(key)
+
+    def stats(self):
+        """返回命中统计信息"""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(self._index) if self._index is not None else 0,
+                "bytes": self._total_bytes,
+            }
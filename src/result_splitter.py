@@ -0,0 +1,293 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+分析结果拆分引擎（不依赖tkinter）
+
+使用 Aho-Corasick 自动机一次扫描文本即可找到任意数量分解词的全部出现位置，
+重叠时取最左、最长的匹配（如同时配置 "Shot 1" 和 "Shot 12" 时，"Shot 12" 不会被拆成 "Shot 1" + "2"）。
+另支持正则表达式和 Markdown 标题级别两种拆分方式，编译后的匹配器按配置缓存，多次拆分和批量任务共用。
+"""
+
+import re
+from collections import deque
+from functools import lru_cache
+
+
+# 拆分方式：literal（分解词原文）、regex（正则表达式）、heading（Markdown 标题级别）
+SPLIT_MODES = ("literal", "regex", "heading")
+
+# 标题两侧的 Markdown 修饰，用作段落标题时去掉
+_TITLE_STRIP = " \t\r\n#*_>-"
+
+
+class MultiPatternMatcher:
+    """多模式字符串匹配自动机"""
+    label_with_match = False  # 段落标题直接使用分解词
+
+    def __init__(self, patterns):
+        self.patterns = list(patterns)
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [()]  # 每个状态上结束的模式下标（含失败链上的模式）
+        self._depth = [0]  # 每个状态对应的前缀长度
+        for index, pattern in enumerate(self.patterns):
+            if pattern:
+                self._add(pattern, index)
+        self._build_failure_links()
+
+        # 处于根状态时，用正则直接跳到下一个可能的模式首字符（在C层完成跳过）
+        first_chars = {pattern[0] for pattern in self.patterns if pattern}
+        self._skip = re.compile("[" + "".join(re.escape(c) for c in sorted(first_chars)) + "]") if first_chars else None
+
+    def _add(self, pattern, index):
+        """把模式加入字典树"""
+        state = 0
+        for char in pattern:
+            nxt = self._goto[state].get(char)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append(())
+                self._depth.append(self._depth[state] + 1)
+                self._goto[state][char] = nxt
+            state = nxt
+        if index not in self._out[state]:
+            self._out[state] = self._out[state] + (index,)
+
+    def _build_failure_links(self):
+        """按广度优先构建失败指针，并合并输出集合"""
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(char, 0)
+                self._fail[nxt] = target if target != nxt else 0
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def scan(self, text, state=0, offset=0):
+        """扫描文本，返回 (原始匹配列表, 结束状态)
+
+        原始匹配为 (起始位置, 结束位置, 模式下标)，包含相互重叠的匹配，按结束位置排序。
+        state/offset 用于从上一段文本的结束状态继续扫描。
+        """
+        goto, fail, out, patterns = self._goto, self._fail, self._out, self.patterns
+        matches = []
+        i = 0
+        length = len(text)
+        while i < length:
+            if state == 0:
+                if self._skip is None:
+                    break
+                found = self._skip.search(text, i)
+                if found is None:
+                    break
+                i = found.start()
+            char = text[i]
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if out[state]:
+                end = offset + i + 1
+                for index in out[state]:
+                    matches.append((end - len(patterns[index]), end, index))
+            i += 1
+        return matches, state
+
+    def depth(self, state):
+        """返回状态对应的前缀长度（之后出现的匹配都不会早于 当前位置 - depth 开始）"""
+        return self._depth[state]
+
+    def finditer(self, text):
+        """返回不重叠的最左最长匹配列表 [(起始, 结束, 模式下标), ...]"""
+        return select_leftmost_longest(self.scan(text)[0])
+
+
+class RegexMatcher:
+    """正则表达式匹配器：多个表达式合并为一个编译后的正则，一次扫描完成（多行模式）"""
+    label_with_match = True  # 段落标题使用匹配到的文本
+
+    def __init__(self, patterns):
+        self.patterns = list(patterns)
+        self._groups = {}
+        branches = []
+        for index, pattern in enumerate(self.patterns):
+            if not pattern:
+                continue
+            try:
+                re.compile(pattern)
+            except re.error as e:
+                raise ValueError(f"分解词正则表达式无效 ({pattern}): {str(e)}")
+            name = f"p{index}"
+            self._groups[name] = index
+            branches.append(f"(?P<{name}>{pattern})")
+        self._regex = re.compile("|".join(branches), re.MULTILINE) if branches else None
+
+    def finditer(self, text):
+        """返回不重叠的匹配列表 [(起始, 结束, 模式下标), ...]，空匹配会被忽略"""
+        if self._regex is None:
+            return []
+        return [(m.start(), m.end(), self._groups[m.lastgroup])
+                for m in self._regex.finditer(text) if m.end() > m.start()]
+
+
+def heading_pattern(level):
+    """返回匹配 1~level 级 Markdown 标题整行的正则表达式"""
+    return rf"^[ \t]{{0,3}}#{{1,{max(1, int(level))}}}(?!#)[ \t]+[^\n]*"
+
+
+@lru_cache(maxsize=32)
+def get_matcher(mode, patterns=(), heading_level=2):
+    """按拆分方式和分解词获取编译好的匹配器（按配置缓存，可在多次拆分和多个线程间共用）
+
+    patterns 须为元组；heading 模式忽略 patterns，按 heading_level 匹配标题行。
+    正则表达式无效时抛出 ValueError。
+    """
+    if mode == "literal":
+        return MultiPatternMatcher(patterns)
+    if mode == "regex":
+        return RegexMatcher(patterns)
+    if mode == "heading":
+        return RegexMatcher([heading_pattern(heading_level)])
+    raise ValueError(f"未知的拆分方式: {mode}")
+
+
+def select_leftmost_longest(matches):
+    """从可能重叠的匹配中选出不重叠的最左最长匹配"""
+    selected = []
+    last_end = -1
+    for start, end, index in sorted(matches, key=lambda m: (m[0], -m[1])):
+        if start >= last_end:
+            selected.append((start, end, index))
+            last_end = end
+    return selected
+
+
+def build_sections(text, matches, patterns, label_with_match=False):
+    """根据匹配结果切分文本
+
+    返回按出现顺序排列的段落字典列表，每项包含：
+    separator（分解词，开头内容为None；label_with_match 为True时为去掉修饰的匹配文本）、
+    index（分解词下标，开头内容为-1）、start（分解词起始偏移）、
+    content_start/end（内容偏移）和 content（去除首尾空白的内容）。
+    """
+    sections = []
+    first = matches[0][0] if matches else len(text)
+    if text[:first].strip():
+        sections.append({"separator": None, "index": -1, "start": 0, "content_start": 0,
+                         "end": first, "content": text[:first].strip()})
+    bounds = [m[0] for m in matches[1:]] + [len(text)]
+    for (start, sep_end, index), end in zip(matches, bounds):
+        separator = (text[start:sep_end].strip(_TITLE_STRIP) or patterns[index]) if label_with_match else patterns[index]
+        sections.append({"separator": separator, "index": index, "start": start,
+                         "content_start": sep_end, "end": end, "content": text[sep_end:end].strip()})
+    return sections
+
+
+class IncrementalSplitter:
+    """增量拆分：文本分多次到达时逐块扫描，每块的耗时只与块大小有关
+
+    自动机状态跨块保留；已确定结束位置的段落立即返回，只缓存尚未结束的最后一段文本。
+    返回的段落字典与 build_sections 相同。
+    """
+    def __init__(self, separators, matcher=None):
+        self.matcher = matcher or MultiPatternMatcher(separators)
+        self.sections = []
+        self._state = 0
+        self._length = 0  # 已接收文本的总长度
+        self._parts = []  # 当前未结束段落起点之后的文本块
+        self._base = 0  # _parts 第一块在全文中的偏移
+        self._pending = []  # 尚未确定是否入选的原始匹配
+        self._last_end = -1
+        self._current = None  # 当前未结束段落 (分解词起始, 内容起始, 模式下标)
+
+    def feed(self, chunk):
+        """接收一块新文本，返回本次新完成的段落列表"""
+        if not chunk:
+            return []
+        matches, self._state = self.matcher.scan(chunk, self._state, self._length)
+        self._parts.append(chunk)
+        self._length += len(chunk)
+        self._pending.extend(matches)
+        # 之后的匹配都不会早于 limit 开始，起点在 limit 之前的匹配已可确定
+        limit = self._length - self.matcher.depth(self._state)
+        ready = [m for m in self._pending if m[0] < limit]
+        if not ready:
+            return []
+        self._pending = [m for m in self._pending if m[0] >= limit]
+        return self._commit(ready)
+
+    def finish(self):
+        """文本接收完毕，返回剩余的全部段落"""
+        completed = self._commit(self._pending)
+        self._pending = []
+        completed.extend(self._close(self._length))
+        self._parts = []
+        self._base = self._length
+        return completed
+
+    def _commit(self, matches):
+        """按最左最长规则选出匹配，并结束它们之前的段落"""
+        completed = []
+        for start, end, index in sorted(matches, key=lambda m: (m[0], -m[1])):
+            if start < self._last_end:
+                continue
+            completed.extend(self._close(start))
+            self._current = (start, end, index)
+            self._last_end = end
+        return completed
+
+    def _close(self, boundary):
+        """结束当前段落（开头内容不为空时也作为一段），只保留 boundary 之后的文本"""
+        text = "".join(self._parts)
+        if self._current is None:
+            content = text[:boundary - self._base].strip()
+            sections = [{"separator": None, "index": -1, "start": 0, "content_start": 0,
+                         "end": boundary, "content": content}] if content else []
+        else:
+            start, content_start, index = self._current
+            sections = [{"separator": self.matcher.patterns[index], "index": index, "start": start,
+                         "content_start": content_start, "end": boundary,
+                         "content": text[content_start - self._base:boundary - self._base].strip()}]
+        self._parts = [text[boundary - self._base:]]
+        self._base = boundary
+        self.sections.extend(sections)
+        return sections
+
+
+_CHINESE_DIGITS = "零一二三四五六七八九"
+_CHINESE_UNITS = ["", "十", "百", "千"]
+
+
+def to_chinese_number(n):
+    """把 1~9999 的整数转换为中文数字（如 12 -> 十二，105 -> 一百零五）"""
+    if not 0 < n < 10000:
+        return str(n)
+    digits = [int(d) for d in str(n)]
+    parts = []
+    pending_zero = False
+    for pos, digit in enumerate(digits):
+        unit = _CHINESE_UNITS[len(digits) - pos - 1]
+        if digit == 0:
+            pending_zero = bool(parts)
+            continue
+        if pending_zero:
+            parts.append("零")
+            pending_zero = False
+        # 十几 读作“十X”而不是“一十X”
+        if not (digit == 1 and unit == "十" and pos == 0):
+            parts.append(_CHINESE_DIGITS[digit])
+        parts.append(unit)
+    return "".join(parts)
+
+
+def split_text(text, separators, matcher=None):
+    """一次扫描找出所有分解词并拆分文本，空分解词会被忽略"""
+    if matcher is None:
+        matcher = MultiPatternMatcher(separators)
+    return build_sections(text, matcher.finditer(text), matcher.patterns, matcher.label_with_match)
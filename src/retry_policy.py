@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+API请求重试策略：带抖动的指数退避、Retry-After、错误分类和按端点的熔断器
+"""
+
+import email.utils
+import random
+import threading
+import time
+from urllib.parse import urlsplit
+
+import requests
+
+from src.cancellation import CancelledError
+
+
+# 可重试的HTTP状态码（限流、超时和服务端临时错误）
+RETRYABLE_STATUS = {408, 425, 429, 500, 502, 503, 504}
+
+# 默认重试参数
+DEFAULT_MAX_RETRIES = 3  # 总尝试次数
+DEFAULT_BASE_DELAY = 1.0  # 首次退避秒数
+DEFAULT_MAX_DELAY = 60.0  # 单次退避上限秒数
+
+# 默认熔断参数
+DEFAULT_FAILURE_THRESHOLD = 5  # 连续失败多少次后熔断
+DEFAULT_RESET_TIMEOUT = 30.0  # 熔断后多少秒允许试探请求
+
+
+class CircuitOpenError(Exception):
+    """端点处于熔断状态，请求被直接拒绝"""
+
+
+def endpoint_key(url):
+    """取URL的协议和主机作为熔断器的键"""
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}"
+
+
+def parse_retry_after(value):
+    """解析Retry-After头（秒数或HTTP日期），无法解析时返回None"""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when is None:
+        return None
+    return max(0.0, when.timestamp() - time.time())
+
+
+def is_retryable(error):
+    """判断异常是否值得重试"""
+    if isinstance(error, (requests.exceptions.Timeout, requests.exceptions.ConnectionError)):
+        return True
+    if isinstance(error, requests.exceptions.HTTPError) and error.response is not None:
+        return error.response.status_code in RETRYABLE_STATUS
+    return False
+
+
+class CircuitBreaker:
+    """单个端点的熔断器：closed -> open -> half_open -> closed"""
+    def __init__(self, failure_threshold=DEFAULT_FAILURE_THRESHOLD, reset_timeout=DEFAULT_RESET_TIMEOUT):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self._lock = threading.Lock()
+
+    def allow(self):
+        """判断当前是否允许发送请求"""
+        with self._lock:
+            if self.state == "open":
+                if time.monotonic() - self.opened_at < self.reset_timeout:
+                    return False
+                # 冷却时间已过，只放行一个试探请求
+                self.state = "half_open"
+                return True
+            return self.state == "closed"
+
+    def record_success(self):
+        """记录一次成功，恢复为关闭状态"""
+        with self._lock:
+            self.state = "closed"
+            self.failures = 0
+
+    def abandon(self):
+        """试探请求被取消（既未成功也未失败），允许下一个请求重新试探"""
+        with self._lock:
+            if self.state == "half_open":
+                self.state = "open"
+                self.opened_at = time.monotonic() - self.reset_timeout
+
+    def record_failure(self):
+        """记录一次可重试失败，返回本次是否触发熔断"""
+        with self._lock:
+            self.failures += 1
+            if self.state == "half_open" or (self.state == "closed" and self.failures >= self.failure_threshold):
+                self.state = "open"
+                self.opened_at = time.monotonic()
+                return True
+            return False
+
+
+class RetryPolicy:
+    """可复用的重试策略，所有请求共享计数器和按端点的熔断器"""
+    def __init__(self, max_retries=DEFAULT_MAX_RETRIES, base_delay=DEFAULT_BASE_DELAY, max_delay=DEFAULT_MAX_DELAY,
+                 failure_threshold=DEFAULT_FAILURE_THRESHOLD, reset_timeout=DEFAULT_RESET_TIMEOUT, sleep=time.sleep):
+        self.max_retries = max(1, max_retries)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.sleep = sleep
+        self._breakers = {}
+        self._lock = threading.Lock()
+        self.counters = {"attempts": 0, "retries": 0, "fatal": 0, "exhausted": 0,
+                         "breaker_trips": 0, "short_circuited": 0}
+
+    def _count(self, name):
+        with self._lock:
+            self.counters[name] += 1
+
+    def breaker_for(self, url):
+        """获取URL所属端点的熔断器"""
+        key = endpoint_key(url)
+        with self._lock:
+            if key not in self._breakers:
+                self._breakers[key] = CircuitBreaker(self.failure_threshold, self.reset_timeout)
+            return self._breakers[key]
+
+    def backoff(self, attempt, error=None):
+        """计算第attempt次失败后的等待秒数，优先使用服务端的Retry-After"""
+        response = getattr(error, "response", None)
+        if response is not None:
+            retry_after = parse_retry_after(response.headers.get("Retry-After"))
+            if retry_after is not None:
+                return min(retry_after, self.max_delay)
+        # 全抖动指数退避
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+    def call(self, url, send, on_retry=None, sleep=None):
+        """按策略执行send()，返回其结果
+
+        send 应在失败时抛出异常（HTTP错误需先调用 raise_for_status）。
+        不可重试的错误立即抛出；重试前调用 on_retry(attempt, error, delay)。
+        sleep 可替换本次调用的退避等待（如可被取消的等待），CancelledError 直接抛出且不计入统计。
+        """
+        sleep = sleep or self.sleep
+        breaker = self.breaker_for(url)
+        for attempt in range(self.max_retries):
+            if not breaker.allow():
+                self._count("short_circuited")
+                raise CircuitOpenError(f"端点 {endpoint_key(url)} 已熔断，{self.reset_timeout:.0f}秒内暂停请求")
+            self._count("attempts")
+            try:
+                result = send()
+            except CancelledError:
+                breaker.abandon()
+                raise
+            except Exception as e:
+                if not is_retryable(e):
+                    # 4xx等请求本身的问题，说明服务端可用
+                    breaker.record_success()
+                    self._count("fatal")
+                    raise
+                if breaker.record_failure():
+                    self._count("breaker_trips")
+                if attempt == self.max_retries - 1:
+                    self._count("exhausted")
+                    raise
+                delay = self.backoff(attempt, e)
+                self._count("retries")
+                if on_retry:
+                    on_retry(attempt, e, delay)
+                sleep(delay)
+                continue
+            breaker.record_success()
+            return result
+
+    def stats(self):
+        """返回重试计数器和各端点熔断器状态"""
+        with self._lock:
+            stats = dict(self.counters)
+            stats["breakers"] = {key: breaker.state for key, breaker in self._breakers.items()}
+            return stats
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+长剧本按场景切分并行分析（不依赖tkinter）
+"""
+
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from src.cancellation import CancelledError
+
+
+# 场景起始行：场景1： / 场景一: / 第3场 / Scene 2 / INT. / EXT.
+SCENE_PATTERN = re.compile(
+    r"^[ \t]*(?:场景\s*[0-9一二三四五六七八九十百零〇]+\s*[：:]"
+    r"|第\s*[0-9一二三四五六七八九十百零〇]+\s*场"
+    r"|scene\s+\d+\b"
+    r"|(?:INT|EXT)\.)",
+    re.IGNORECASE | re.MULTILINE)
+
+# 单个片段的默认最大字符数（相邻的小场景会合并到同一片段）
+DEFAULT_CHUNK_CHARS = 4000
+
+# 默认同时分析的片段数
+DEFAULT_CHUNK_WORKERS = 4
+
+
+def split_scenes(script):
+    """按场景标记切分剧本，场景前的开头内容并入第一个场景"""
+    starts = [match.start() for match in SCENE_PATTERN.finditer(script)]
+    if not starts:
+        return [script]
+    bounds = starts[1:] + [len(script)]
+    scenes = [script[start:end].strip() for start, end in zip(starts, bounds)]
+    preamble = script[:starts[0]].strip()
+    if preamble:
+        scenes[0] = f"{preamble}\n\n{scenes[0]}"
+    return [scene for scene in scenes if scene]
+
+
+def group_scenes(scenes, max_chars=DEFAULT_CHUNK_CHARS):
+    """把相邻场景合并为不超过max_chars的片段（单个超长场景单独成段）"""
+    chunks = []
+    current = []
+    current_len = 0
+    for scene in scenes:
+        if current and current_len + len(scene) > max_chars:
+            chunks.append("\n\n".join(current))
+            current = []
+            current_len = 0
+        current.append(scene)
+        current_len += len(scene) + 2
+    if current:
+        chunks.append("\n\n".join(current))
+    return chunks
+
+
+def chunk_script(script, max_chars=DEFAULT_CHUNK_CHARS):
+    """把剧本切分为可并行分析的片段列表"""
+    return group_scenes(split_scenes(script), max_chars)
+
+
+def stitch_part(index, total, result):
+    """返回第index个片段结果在拼接文本中的部分（含与前一部分之间的空行），可按顺序逐个输出"""
+    if total == 1:
+        return result["text"]
+    body = result["text"] if result["ok"] else f"（该部分分析失败: {result['error']}）"
+    part = f"===== 第 {index + 1}/{total} 部分 =====\n{body.strip()}"
+    return part if index == 0 else "\n\n" + part
+
+
+def stitch_results(results):
+    """按原顺序拼接各片段的分析结果"""
+    return "".join(stitch_part(i, len(results), result) for i, result in enumerate(results))
+
+
+def total_usage(results):
+    """合计各片段的token用量，没有任何用量信息时返回None"""
+    usages = [r["usage"] for r in results if r.get("usage")]
+    if not usages:
+        return None
+    return {key: sum(usage.get(key) or 0 for usage in usages)
+            for key in ("prompt_tokens", "completion_tokens", "total_tokens")}
+
+
+def analyze_long_script(script, prompt, api_url, api_key, model, max_chars=DEFAULT_CHUNK_CHARS,
+                        max_workers=DEFAULT_CHUNK_WORKERS, client=None, cache=None, on_chunk=None,
+                        cancel_token=None, variables=None):
+    """按场景切分长剧本并限流并发分析，结果按原顺序拼接
+
+    每个片段完成时调用 on_chunk(index, total, result)。总耗时取决于最慢的片段，而不是剧本长度。
+    取消 cancel_token 时中断所有片段并抛出 CancelledError。
+    返回包含 text/chunks/usage/latency/failed 的结果字典。
+    """
+    # 网络层（requests）较重，第一次发送请求时才导入；切分函数可在界面线程直接使用
+    from src.api_client import analyze_script_detailed
+
+    chunks = chunk_script(script, max_chars)
+    total = len(chunks)
+    start = time.perf_counter()
+
+    def analyze_chunk(index):
+        chunk = chunks[index]
+        if total > 1:
+            chunk = f"（以下为完整剧本的第 {index + 1}/{total} 部分，请只分析这一部分）\n\n{chunk}"
+        chunk_start = time.perf_counter()
+        try:
+            result = analyze_script_detailed(chunk, prompt, api_url, api_key, model,
+                                             verbose=False, client=client, cache=cache,
+                                             cancel_token=cancel_token, variables=variables)
+            result.update({"ok": True, "error": None})
+        except CancelledError:
+            raise
+        except Exception as e:
+            result = {"ok": False, "text": "", "usage": None, "cached": False, "error": str(e),
+                      "latency": time.perf_counter() - chunk_start}
+        if on_chunk:
+            on_chunk(index, total, result)
+        return result
+
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, total))) as executor:
+        results = list(executor.map(analyze_chunk, range(total)))
+
+    failed = sum(1 for r in results if not r["ok"])
+    if failed == total:
+        raise ValueError(f"所有 {total} 个片段均分析失败: {results[0]['error']}")
+    return {
+        "text": stitch_results(results),
+        "chunks": results,
+        "usage": total_usage(results),
+        "failed": failed,
+        "latency": time.perf_counter() - start,
+    }
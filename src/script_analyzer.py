@@ -3,18 +3,51 @@
 
 """
 短视频脚本分析工具
+
+界面模块只在启动时导入不依赖网络库的模块；发送请求用到的网络层（requests）在首帧绘制后
+由后台线程预先导入，工作线程第一次发送请求时也会按需导入，不阻塞窗口显示。
 """
 
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox, Menu
-import requests
 import os
-import json
+import sqlite3
 from dotenv import load_dotenv
 import threading
-import webbrowser
 import time
 
+from src.cancellation import CancelledError
+from src.fileio import atomic_write_text
+from src.folder_watcher import DEFAULT_WATCH_INTERVAL, FolderWatcher, result_path_for, watch_loop
+from src.history_store import HistoryStore
+from src.job_queue import (DEFAULT_JOB_WORKERS, FAILED, MAX_JOB_WORKERS, PRIORITY_BACKGROUND, PRIORITY_INTERACTIVE,
+                           PRIORITY_LABELS, STATE_LABELS, JobManager, job_name)
+from src.model_compare import compare_models, format_usage, parse_model_list
+from src.prompt_template import (DEFAULT_PROMPT, build_full_prompt, compile_template, parse_variables,
+                                 validate_template)
+from src.providers import SYSTEM_PROMPT
+from src.response_cache import ResponseCache
+from src.result_splitter import IncrementalSplitter, MultiPatternMatcher, get_matcher, split_text, to_chinese_number
+from src.scene_chunker import analyze_long_script, chunk_script, stitch_part
+from src.script_loader import decode_script, read_script_file
+from src.section_export import export_sections
+from src.split_view import SplitResultView
+from src.storyboard_parser import export_storyboard, parse_storyboard
+from src.template_store import get_template_store
+from src.text_renderer import ChunkedTextRenderer
+from src.token_budget import plan_budget
+from src.ui_events import EVENT_TICK_MS, UIEventBus
+
+# 分解词数量上限
+MAX_SEPARATORS = 500
+
+# 首帧绘制后等待多久再在后台预先导入网络层（毫秒）
+PRELOAD_DELAY_MS = 300
+
+# 配置对话框中可选的模型（token预算表中都需要有对应的条目）
+MODEL_CHOICES = ["gpt-3.5-turbo", "gpt-4", "gpt-4-turbo", "gpt-4o", "gemini-3-pro", "gemini-3-flash"]
+
+
 class CustomErrorDialog:
     """自定义错误对话框，支持复制错误信息"""
     def __init__(self, parent, title, message):
@@ -110,9 +143,7 @@ class ConfigDialog:
         
         # 模型选择
         ttk.Label(main_frame, text="模型: ").grid(row=1, column=3, sticky=tk.W, padx=5, pady=5)
-        self.model_combobox = ttk.Combobox(main_frame, textvariable=model_var,
-                                          values=["gpt-3.5-turbo", "gpt-4", "gpt-4-turbo", "gpt-4o", 
-                                                  "gemini-3-pro", "gemini-3-flash"])
+        self.model_combobox = ttk.Combobox(main_frame, textvariable=model_var, values=MODEL_CHOICES)
         self.model_combobox.grid(row=1, column=4, sticky=tk.EW, padx=5, pady=5)
         
         # 按钮框架
@@ -156,7 +187,9 @@ class ConfigDialog:
 提示词说明：
 默认提示词用于指导AI将剧本转化为分镜脚本，您可以自定义提示词来调整分镜生成的要求和格式。
 
-提示词模板中的{script}会被实际的剧本内容替换。
+提示词模板中的{script}会被实际的剧本内容替换（不含{script}时剧本附加在末尾）。
+模板中还可以使用其它变量，如{duration}、{style}、{scene}，在提示词配置的"模板变量"中
+按"名称=值"每行填写一个；{{名称}}表示字面的{名称}，JSON示例等其它花括号原样保留。
    
 注意事项：
 - 确保API密钥与选择的模型和平台对应
@@ -215,13 +248,16 @@ class ConfigDialog:
 
 class SplitConfigDialog:
     """分解词配置对话框"""
-    def __init__(self, parent, separators, bulk_add_func, prefix_var, suffix_var, add_number_var):
+    def __init__(self, parent, separators, bulk_add_func, prefix_var, suffix_var, add_number_var,
+                 split_mode_var, heading_level_var):
         self.parent = parent
         self.separators = separators
         self.bulk_add_func = bulk_add_func
         self.prefix_var = prefix_var
         self.suffix_var = suffix_var
         self.add_number_var = add_number_var
+        self.split_mode_var = split_mode_var
+        self.heading_level_var = heading_level_var
         
         # 添加中文数字选择变量
         self.use_chinese_numbers_var = tk.BooleanVar(value=False)
@@ -255,9 +291,31 @@ class SplitConfigDialog:
         self.use_chinese_numbers_check = ttk.Checkbutton(bulk_frame, text="使用中文数字", variable=self.use_chinese_numbers_var)
         self.use_chinese_numbers_check.pack(side=tk.LEFT, padx=5)
         
+        # 分解词数量（不再固定为8个）
+        ttk.Label(bulk_frame, text="数量: ").pack(side=tk.LEFT, padx=5)
+        self.count_var = tk.IntVar(value=len(self.separators))
+        self.count_spinbox = ttk.Spinbox(bulk_frame, from_=1, to=MAX_SEPARATORS, width=5, textvariable=self.count_var,
+                                         command=self.resize_separators)
+        self.count_spinbox.pack(side=tk.LEFT, padx=5)
+        self.count_spinbox.bind("<Return>", lambda event: self.resize_separators())
+        
         self.bulk_add_button = ttk.Button(bulk_frame, text="一键添加", command=self.bulk_add)
         self.bulk_add_button.pack(side=tk.LEFT, padx=5)
         
+        # 拆分方式区域
+        mode_frame = ttk.LabelFrame(main_frame, text="拆分方式", padding="10")
+        mode_frame.pack(fill=tk.X, pady=5)
+        
+        ttk.Radiobutton(mode_frame, text="分解词原文", value="literal", variable=self.split_mode_var).pack(side=tk.LEFT, padx=5)
+        ttk.Radiobutton(mode_frame, text="正则表达式", value="regex", variable=self.split_mode_var).pack(side=tk.LEFT, padx=5)
+        ttk.Radiobutton(mode_frame, text="Markdown标题", value="heading", variable=self.split_mode_var).pack(side=tk.LEFT, padx=5)
+        
+        ttk.Label(mode_frame, text="标题级别≤").pack(side=tk.LEFT, padx=(10, 2))
+        ttk.Spinbox(mode_frame, from_=1, to=6, width=3, textvariable=self.heading_level_var).pack(side=tk.LEFT)
+        
+        # 正则表达式按多行模式匹配，如 ^\**Shot\s*\d+\** 或 ^镜头[一二三四五六七八九十]+
+        ttk.Label(mode_frame, text="（正则模式下每个分解词是一个表达式，^ 匹配行首）").pack(side=tk.LEFT, padx=5)
+        
         # 分解词配置区域
         separator_frame = ttk.LabelFrame(main_frame, text="分解词配置", padding="10")
         separator_frame.pack(fill=tk.BOTH, expand=True, pady=5)
@@ -281,16 +339,10 @@ class SplitConfigDialog:
         canvas.pack(side="left", fill="both", expand=True)
         scrollbar.pack(side="right", fill="y")
         
-        # 创建8个分解词输入框
-        self.separator_entries = []
-        for i in range(8):
-            # 标签
-            ttk.Label(scrollable_frame, text=f"分解词 {i+1}: ").grid(row=i, column=0, sticky=tk.W, padx=5, pady=2)
-            
-            # 输入框
-            entry = ttk.Entry(scrollable_frame, textvariable=self.separators[i], width=50)
-            entry.grid(row=i, column=1, sticky=tk.EW, padx=5, pady=2)
-            self.separator_entries.append(entry)
+        # 创建分解词输入框（数量随分解词列表变化）
+        self.scrollable_frame = scrollable_frame
+        self.separator_rows = []
+        self.build_separator_entries()
         
         # 设置列权重
         scrollable_frame.columnconfigure(1, weight=1)
@@ -307,16 +359,487 @@ class SplitConfigDialog:
         self.cancel_button = ttk.Button(button_frame, text="取消", command=self.dialog.destroy)
         self.cancel_button.pack(side=tk.RIGHT, padx=5)
     
+    def build_separator_entries(self):
+        """按当前分解词列表重建输入框"""
+        for widgets in self.separator_rows:
+            for widget in widgets:
+                widget.destroy()
+        self.separator_rows = []
+        for i, var in enumerate(self.separators):
+            # 标签
+            label = ttk.Label(self.scrollable_frame, text=f"分解词 {i+1}: ")
+            label.grid(row=i, column=0, sticky=tk.W, padx=5, pady=2)
+            
+            # 输入框
+            entry = ttk.Entry(self.scrollable_frame, textvariable=var, width=50)
+            entry.grid(row=i, column=1, sticky=tk.EW, padx=5, pady=2)
+            self.separator_rows.append((label, entry))
+    
+    def resize_separators(self):
+        """按数量增删分解词（直接修改父窗口的分解词列表）"""
+        try:
+            count = max(1, min(MAX_SEPARATORS, int(self.count_var.get())))
+        except (tk.TclError, ValueError):
+            count = len(self.separators)
+        self.count_var.set(count)
+        if count == len(self.separators):
+            return
+        del self.separators[count:]
+        while len(self.separators) < count:
+            self.separators.append(tk.StringVar(value=""))
+        self.build_separator_entries()
+    
     def bulk_add(self):
         """调用父窗口的一键添加功能"""
+        self.resize_separators()
         use_chinese = self.use_chinese_numbers_var.get()
-        self.bulk_add_func(use_chinese)
+        self.bulk_add_func(use_chinese, len(self.separators))
     
     def save_config(self):
         """保存配置并关闭对话框"""
         self.dialog.destroy()
 
 
+class ExportAllDialog:
+    """全部导出对话框：选择格式和附加内容，后台写入并显示进度"""
+    def __init__(self, parent, section_count, on_export):
+        self.on_export = on_export
+        
+        self.dialog = tk.Toplevel(parent)
+        self.dialog.title("全部导出")
+        self.dialog.geometry("420x230")
+        self.dialog.transient(parent)
+        
+        main_frame = ttk.Frame(self.dialog, padding="10")
+        main_frame.pack(fill=tk.BOTH, expand=True)
+        
+        ttk.Label(main_frame, text=f"共 {section_count} 个拆分段落").pack(anchor=tk.W, pady=(0, 5))
+        
+        # 导出格式
+        format_frame = ttk.LabelFrame(main_frame, text="导出格式", padding="5")
+        format_frame.pack(fill=tk.X, pady=5)
+        self.format_var = tk.StringVar(value="zip")
+        ttk.Radiobutton(format_frame, text="目录（每段一个txt）", value="dir", variable=self.format_var).pack(side=tk.LEFT, padx=5)
+        ttk.Radiobutton(format_frame, text="ZIP压缩包", value="zip", variable=self.format_var).pack(side=tk.LEFT, padx=5)
+        ttk.Radiobutton(format_frame, text="JSONL", value="jsonl", variable=self.format_var).pack(side=tk.LEFT, padx=5)
+        
+        # 附加内容
+        self.include_raw_var = tk.BooleanVar(value=True)
+        self.include_script_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(main_frame, text="包含原始分析结果", variable=self.include_raw_var).pack(anchor=tk.W)
+        ttk.Checkbutton(main_frame, text="包含输入剧本", variable=self.include_script_var).pack(anchor=tk.W)
+        
+        # 进度条
+        self.progress = ttk.Progressbar(main_frame, mode="determinate")
+        self.progress.pack(fill=tk.X, pady=5)
+        
+        button_frame = ttk.Frame(main_frame)
+        button_frame.pack(fill=tk.X)
+        ttk.Button(button_frame, text="关闭", command=self.dialog.destroy).pack(side=tk.RIGHT, padx=5)
+        self.export_button = ttk.Button(button_frame, text="选择位置并导出", command=self.export)
+        self.export_button.pack(side=tk.RIGHT, padx=5)
+    
+    def export(self):
+        """选择导出位置后交给主窗口在后台导出"""
+        fmt = self.format_var.get()
+        if fmt == "dir":
+            target = filedialog.askdirectory(parent=self.dialog, title="选择导出目录")
+        elif fmt == "zip":
+            target = filedialog.asksaveasfilename(parent=self.dialog, defaultextension=".zip", initialfile="sections.zip",
+                                                  filetypes=[("ZIP压缩包", "*.zip")], title="导出为ZIP")
+        else:
+            target = filedialog.asksaveasfilename(parent=self.dialog, defaultextension=".jsonl", initialfile="sections.jsonl",
+                                                  filetypes=[("JSONL文件", "*.jsonl")], title="导出为JSONL")
+        if not target:
+            return
+        self.export_button.config(state=tk.DISABLED)
+        self.progress.config(value=0)
+        self.on_export(target, fmt, self.include_raw_var.get(), self.include_script_var.get(), self)
+    
+    def set_progress(self, done, total):
+        """更新进度条（对话框已关闭时忽略）"""
+        if self.dialog.winfo_exists():
+            self.progress.config(maximum=max(1, total), value=done)
+    
+    def finish(self):
+        """导出结束，恢复导出按钮"""
+        if self.dialog.winfo_exists():
+            self.export_button.config(state=tk.NORMAL)
+
+
+class ModelCompareWindow:
+    """多模型对比窗口，并排显示各模型的输出、耗时和token用量"""
+    def __init__(self, parent, models_var, start_func):
+        self.parent = parent
+        self.models_var = models_var
+        self.start_func = start_func
+        self.columns = {}
+        
+        self.window = tk.Toplevel(parent)
+        self.window.title("多模型对比")
+        self.window.geometry("1200x600")
+        self.window.configure(bg='#2b2b2b')
+        
+        # 创建主框架
+        main_frame = ttk.Frame(self.window, padding="10")
+        main_frame.pack(fill=tk.BOTH, expand=True)
+        
+        # 模型列表输入区域
+        top_frame = ttk.Frame(main_frame)
+        top_frame.pack(fill=tk.X, pady=(0, 5))
+        
+        ttk.Label(top_frame, text="模型列表 (逗号分隔): ").pack(side=tk.LEFT, padx=5)
+        self.models_entry = ttk.Entry(top_frame, textvariable=self.models_var)
+        self.models_entry.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=5)
+        
+        self.start_button = ttk.Button(top_frame, text="开始对比", command=self.start)
+        self.start_button.pack(side=tk.LEFT, padx=5)
+        
+        # 汇总信息
+        self.summary_var = tk.StringVar(value="输入模型后点击\"开始对比\"")
+        ttk.Label(main_frame, textvariable=self.summary_var).pack(anchor=tk.W, pady=(0, 5))
+        
+        # 结果列区域
+        self.columns_frame = ttk.Frame(main_frame)
+        self.columns_frame.pack(fill=tk.BOTH, expand=True)
+    
+    def start(self):
+        """根据模型列表创建结果列并开始对比"""
+        models = parse_model_list(self.models_var.get())
+        if not models:
+            messagebox.showwarning("警告", "请输入至少一个模型", parent=self.window)
+            return
+        
+        # 重建结果列
+        for child in self.columns_frame.winfo_children():
+            child.destroy()
+        self.columns = {}
+        for i, model in enumerate(models):
+            self.columns_frame.columnconfigure(i, weight=1, uniform="model")
+            frame = ttk.LabelFrame(self.columns_frame, text=model, padding="5")
+            frame.grid(row=0, column=i, sticky=tk.NSEW, padx=3)
+            
+            info_var = tk.StringVar(value="请求中...")
+            ttk.Label(frame, textvariable=info_var).pack(anchor=tk.W)
+            
+            scrollbar = ttk.Scrollbar(frame)
+            text_widget = tk.Text(frame, wrap=tk.WORD, yscrollcommand=scrollbar.set,
+                                  bg='#1e1e1e', fg='#ffffff', insertbackground='white')
+            scrollbar.config(command=text_widget.yview)
+            text_widget.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+            scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+            text_widget.config(state=tk.DISABLED)
+            
+            self.columns[model] = (info_var, text_widget)
+        self.columns_frame.rowconfigure(0, weight=1)
+        
+        self.start_button.config(state=tk.DISABLED)
+        self.summary_var.set(f"正在并发请求 {len(models)} 个模型...")
+        self.start_func(models, self)
+    
+    def show_result(self, result):
+        """显示单个模型的结果"""
+        if result["model"] not in self.columns:
+            return
+        info_var, text_widget = self.columns[result["model"]]
+        if result["ok"]:
+            source = "缓存" if result["cached"] else "API"
+            info_var.set(f"耗时 {result['latency']:.2f}s | {format_usage(result['usage'])} | 来源: {source}")
+            content = result["text"]
+        else:
+            info_var.set(f"失败 | 耗时 {result['latency']:.2f}s")
+            content = f"API调用失败: {result['error']}"
+        text_widget.config(state=tk.NORMAL)
+        text_widget.delete(1.0, tk.END)
+        text_widget.insert(1.0, content)
+        text_widget.config(state=tk.DISABLED)
+    
+    def show_summary(self, results, wall_time):
+        """显示对比汇总"""
+        slowest = max((r["latency"] for r in results), default=0.0)
+        total = sum(r["latency"] for r in results)
+        succeeded = sum(1 for r in results if r["ok"])
+        self.summary_var.set(f"完成 {succeeded}/{len(results)} 个模型 | 总耗时 {wall_time:.2f}s "
+                             f"(最慢模型 {slowest:.2f}s，串行需 {total:.2f}s)")
+        self.start_button.config(state=tk.NORMAL)
+
+
+class JobQueueWindow:
+    """任务队列窗口：查看排队和运行中的任务，取消任务、查看结果、添加后台任务"""
+    def __init__(self, parent, jobs, on_show, on_add_files, on_toggle_watch, watched_folder):
+        self.jobs = jobs
+        self.on_show = on_show
+        self.on_add_files = on_add_files
+        self.on_toggle_watch = on_toggle_watch
+        self.watched_folder = watched_folder  # 返回正在监视的文件夹，未监视时返回None
+        
+        self.window = tk.Toplevel(parent)
+        self.window.title("任务队列")
+        self.window.geometry("640x360")
+        self.window.transient(parent)
+        
+        main_frame = ttk.Frame(self.window, padding="10")
+        main_frame.pack(fill=tk.BOTH, expand=True)
+        
+        # 并发数
+        top_frame = ttk.Frame(main_frame)
+        top_frame.pack(fill=tk.X, pady=(0, 5))
+        ttk.Label(top_frame, text="同时运行的任务数:").pack(side=tk.LEFT, padx=5)
+        self.workers_var = tk.IntVar(value=jobs.workers)
+        ttk.Spinbox(top_frame, from_=1, to=MAX_JOB_WORKERS, width=5, textvariable=self.workers_var,
+                    command=self.apply_workers).pack(side=tk.LEFT)
+        self.watch_var = tk.StringVar()
+        ttk.Label(top_frame, textvariable=self.watch_var).pack(side=tk.LEFT, padx=10)
+        
+        # 任务列表
+        list_frame = ttk.Frame(main_frame)
+        list_frame.pack(fill=tk.BOTH, expand=True)
+        columns = ("name", "priority", "state", "elapsed")
+        self.tree = ttk.Treeview(list_frame, columns=columns, show="headings", selectmode="extended")
+        for column, heading, width in zip(columns, ("任务", "优先级", "状态", "耗时"), (280, 60, 160, 70)):
+            self.tree.heading(column, text=heading)
+            self.tree.column(column, width=width, stretch=column == "name")
+        scrollbar = ttk.Scrollbar(list_frame, command=self.tree.yview)
+        self.tree.config(yscrollcommand=scrollbar.set)
+        self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.tree.bind("<Double-1>", lambda event: self.show_selected())
+        
+        button_frame = ttk.Frame(main_frame)
+        button_frame.pack(fill=tk.X, pady=(5, 0))
+        ttk.Button(button_frame, text="取消所选", command=self.cancel_selected).pack(side=tk.LEFT, padx=2)
+        ttk.Button(button_frame, text="显示结果", command=self.show_selected).pack(side=tk.LEFT, padx=2)
+        ttk.Button(button_frame, text="添加后台文件", command=self.add_files).pack(side=tk.LEFT, padx=2)
+        self.watch_button = ttk.Button(button_frame, command=self.on_toggle_watch)
+        self.watch_button.pack(side=tk.LEFT, padx=2)
+        ttk.Button(button_frame, text="清除已结束", command=self.clear_finished).pack(side=tk.LEFT, padx=2)
+        ttk.Button(button_frame, text="关闭", command=self.window.destroy).pack(side=tk.RIGHT, padx=2)
+        
+        self.refresh()
+    
+    def alive(self):
+        """窗口是否仍然打开"""
+        return self.window.winfo_exists()
+    
+    def refresh(self):
+        """按当前任务状态重建列表（保留选中项）"""
+        folder = self.watched_folder()
+        self.watch_var.set(f"正在监视: {folder}" if folder else "")
+        self.watch_button.config(text="停止监视" if folder else "监视文件夹")
+        selected = set(self.tree.selection())
+        self.tree.delete(*self.tree.get_children())
+        for job in self.jobs.jobs():
+            state = STATE_LABELS[job.state]
+            if job.state == FAILED and job.error:
+                state = f"{state}: {job.error[:40]}"
+            item = str(job.id)
+            self.tree.insert("", tk.END, iid=item, values=(
+                job.name, PRIORITY_LABELS.get(job.priority, job.priority), state, f"{job.elapsed():.1f}s"))
+            if item in selected:
+                self.tree.selection_add(item)
+    
+    def selected_ids(self):
+        """返回选中任务的编号"""
+        return [int(item) for item in self.tree.selection()]
+    
+    def cancel_selected(self):
+        """取消选中的任务"""
+        for job_id in self.selected_ids():
+            self.jobs.cancel(job_id)
+    
+    def show_selected(self):
+        """在主窗口显示选中任务的结果"""
+        ids = self.selected_ids()
+        if ids:
+            self.on_show(ids[0])
+    
+    def add_files(self):
+        """选择剧本文件，以后台优先级逐个分析"""
+        paths = filedialog.askopenfilenames(parent=self.window, title="选择要在后台分析的剧本",
+                                            filetypes=[("文本文件", "*.txt"), ("所有文件", "*.*")])
+        if paths:
+            self.on_add_files(paths)
+    
+    def clear_finished(self):
+        """从列表中移除已结束的任务"""
+        self.jobs.clear_finished()
+        self.refresh()
+    
+    def apply_workers(self):
+        """应用并发数设置"""
+        try:
+            workers = self.jobs.set_workers(self.workers_var.get())
+        except (tk.TclError, ValueError):
+            return
+        self.workers_var.set(workers)
+
+
+class HistoryWindow:
+    """历史记录窗口：全文搜索过去的分析，重新打开任意一次结果"""
+    def __init__(self, parent, history, on_open):
+        self.history = history
+        self.on_open = on_open
+        self.search_job = None
+        
+        self.window = tk.Toplevel(parent)
+        self.window.title("历史记录")
+        self.window.geometry("760x420")
+        self.window.transient(parent)
+        
+        main_frame = ttk.Frame(self.window, padding="10")
+        main_frame.pack(fill=tk.BOTH, expand=True)
+        
+        # 搜索框（输入停顿后自动搜索）
+        search_frame = ttk.Frame(main_frame)
+        search_frame.pack(fill=tk.X, pady=(0, 5))
+        ttk.Label(search_frame, text="搜索剧本或结果:").pack(side=tk.LEFT, padx=5)
+        self.query_var = tk.StringVar()
+        entry = ttk.Entry(search_frame, textvariable=self.query_var)
+        entry.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=5)
+        entry.bind("<KeyRelease>", lambda event: self.schedule_search())
+        entry.bind("<Return>", lambda event: self.search())
+        self.summary_var = tk.StringVar()
+        ttk.Label(search_frame, textvariable=self.summary_var).pack(side=tk.LEFT, padx=5)
+        
+        # 记录列表
+        list_frame = ttk.Frame(main_frame)
+        list_frame.pack(fill=tk.BOTH, expand=True)
+        columns = ("created", "model", "template", "tokens", "preview")
+        self.tree = ttk.Treeview(list_frame, columns=columns, show="headings", selectmode="browse")
+        for column, heading, width in zip(columns, ("时间", "模型", "模板", "tokens", "剧本开头"),
+                                          (120, 110, 110, 60, 320)):
+            self.tree.heading(column, text=heading)
+            self.tree.column(column, width=width, stretch=column == "preview")
+        scrollbar = ttk.Scrollbar(list_frame, command=self.tree.yview)
+        self.tree.config(yscrollcommand=scrollbar.set)
+        self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.tree.bind("<Double-1>", lambda event: self.open_selected())
+        
+        button_frame = ttk.Frame(main_frame)
+        button_frame.pack(fill=tk.X, pady=(5, 0))
+        ttk.Button(button_frame, text="打开", command=self.open_selected).pack(side=tk.LEFT, padx=2)
+        ttk.Button(button_frame, text="删除", command=self.delete_selected).pack(side=tk.LEFT, padx=2)
+        ttk.Button(button_frame, text="关闭", command=self.window.destroy).pack(side=tk.RIGHT, padx=2)
+        
+        self.search()
+        entry.focus_set()
+    
+    def alive(self):
+        """窗口是否仍然打开"""
+        return self.window.winfo_exists()
+    
+    def schedule_search(self):
+        """输入停顿300毫秒后再搜索，避免每个按键都查询一次"""
+        if self.search_job is not None:
+            self.window.after_cancel(self.search_job)
+        self.search_job = self.window.after(300, self.search)
+    
+    def search(self):
+        """按当前关键词刷新列表"""
+        self.search_job = None
+        start = time.perf_counter()
+        runs = self.history.search(self.query_var.get())
+        elapsed = time.perf_counter() - start
+        self.tree.delete(*self.tree.get_children())
+        for run in runs:
+            self.tree.insert("", tk.END, iid=str(run["id"]), values=(
+                time.strftime("%Y-%m-%d %H:%M", time.localtime(run["created"])), run["model"],
+                run["template"] or "-", run["total_tokens"] if run["total_tokens"] is not None else "-",
+                " ".join(run["preview"].split())))
+        self.summary_var.set(f"{len(runs)} 条 ({elapsed * 1000:.0f}ms)")
+    
+    def selected_id(self):
+        """返回选中记录的编号，未选中时返回None"""
+        selection = self.tree.selection()
+        return int(selection[0]) if selection else None
+    
+    def open_selected(self):
+        """在主窗口打开选中的记录"""
+        run_id = self.selected_id()
+        if run_id is not None:
+            self.on_open(run_id)
+    
+    def delete_selected(self):
+        """删除选中的记录"""
+        run_id = self.selected_id()
+        if run_id is None:
+            return
+        if messagebox.askyesno("确认", "确定要删除这条历史记录吗？", parent=self.window):
+            self.history.delete(run_id)
+            self.search()
+
+
+class TemplateVersionsDialog:
+    """模板历史版本列表，选中的版本交给 on_load 载入编辑框"""
+    def __init__(self, parent, name, versions, on_load):
+        self.versions = list(reversed(versions))  # 最新的在前
+        self.on_load = on_load
+        
+        self.dialog = tk.Toplevel(parent)
+        self.dialog.title(f"历史版本 - {name}")
+        self.dialog.geometry("520x320")
+        self.dialog.transient(parent)
+        
+        main_frame = ttk.Frame(self.dialog, padding="10")
+        main_frame.pack(fill=tk.BOTH, expand=True)
+        
+        columns = ("version", "saved", "preview")
+        self.tree = ttk.Treeview(main_frame, columns=columns, show="headings", selectmode="browse")
+        for column, heading, width in zip(columns, ("版本", "保存时间", "内容开头"), (50, 130, 300)):
+            self.tree.heading(column, text=heading)
+            self.tree.column(column, width=width, stretch=column == "preview")
+        for i, item in enumerate(self.versions):
+            self.tree.insert("", tk.END, iid=str(i), values=(
+                item["version"], time.strftime("%Y-%m-%d %H:%M", time.localtime(item["saved"])),
+                " ".join(item["content"][:60].split())))
+        self.tree.pack(fill=tk.BOTH, expand=True)
+        self.tree.bind("<Double-1>", lambda event: self.load())
+        
+        button_frame = ttk.Frame(main_frame)
+        button_frame.pack(fill=tk.X, pady=(5, 0))
+        ttk.Button(button_frame, text="载入", command=self.load).pack(side=tk.LEFT, padx=2)
+        ttk.Button(button_frame, text="关闭", command=self.dialog.destroy).pack(side=tk.RIGHT, padx=2)
+    
+    def load(self):
+        """把选中的版本载入编辑框"""
+        selection = self.tree.selection()
+        if selection:
+            self.on_load(self.versions[int(selection[0])]["content"])
+            self.dialog.destroy()
+
+
+class JobView:
+    """一个分析任务在主窗口中的输出；只有当前显示的任务会更新结果区和状态栏"""
+    def __init__(self, gui, job_id):
+        self.gui = gui
+        self.job_id = job_id
+    
+    @property
+    def active(self):
+        return self.gui.displayed_job == self.job_id
+    
+    def update_result(self, text):
+        if self.active:
+            self.gui.update_result(text)
+    
+    def append_result(self, text):
+        if self.active:
+            self.gui.append_result(text)
+    
+    def update_status(self, status):
+        if self.active:
+            self.gui.update_status(status)
+    
+    def show_error(self, message):
+        if self.active:
+            CustomErrorDialog(self.gui.root, "分析失败", message)
+    
+    def finish_live_split(self):
+        if self.active:
+            self.gui.finish_live_split()
+
+
 class ScriptAnalyzerGUI:
     def __init__(self, root):
         self.root = root
@@ -335,18 +858,75 @@ class ScriptAnalyzerGUI:
         self.api_url = tk.StringVar(value=os.getenv("API_URL", "https://ai.t8star.cn"))
         self.model = tk.StringVar(value=os.getenv("MODEL", "gpt-3.5-turbo"))
         
+        # 长连接API客户端（所有分析请求和重试共用同一个连接池），第一次使用时创建
+        self.client = None
+        self.client_lock = threading.Lock()
+        
+        # 工作线程发布的界面事件，由界面线程按固定间隔合并执行
+        self.events = UIEventBus()
+        self.root.after(EVENT_TICK_MS, self.process_events)
+        
+        # 分析任务队列（交互请求排在后台任务之前，每个任务可单独取消）
+        self.jobs = JobManager(int(os.getenv("JOB_WORKERS", DEFAULT_JOB_WORKERS)),
+                               on_update=lambda job: self.events.latest("jobs", self.refresh_jobs))
+        self.displayed_job = None  # 结果区正在显示的任务
+        self.job_window = None
+        
+        # 监视文件夹（新增或内容变化的剧本自动以后台优先级分析）
+        self.watch_folder = None
+        self.watch_stop = None
+        
+        # 分析历史记录（数据库无法打开时不记录）
+        try:
+            self.history = HistoryStore()
+        except sqlite3.Error as e:
+            print(f"无法打开历史记录数据库: {str(e)}")
+            self.history = None
+        self.history_window = None
+        self.template_name = None  # 当前提示词对应的模板名称
+        self.template_variables = ""  # 模板变量定义（每行一个 名称=值）
+        
         # 提示词配置 (移除 {script} 占位符)
-        self.prompt = tk.StringVar(value=os.getenv("PROMPT", """
-请根据剧本内容，生成详细的电影分镜脚本。
-
-要求：
-1. 分镜需包含场景、镜头号、镜头角度、画面内容、台词、时长等关键信息
-2. 分镜设计要考虑镜头语言和叙事节奏
-3. 格式清晰，易于阅读和理解
-"""))
+        self.prompt = tk.StringVar(value=os.getenv("PROMPT", DEFAULT_PROMPT))
+        
+        # 流式输出开关
+        self.stream_var = tk.BooleanVar(value=os.getenv("STREAM", "1") != "0")
+        
+        # 长剧本按场景切分并行分析开关
+        self.chunk_var = tk.BooleanVar(value=False)
+        
+        # Sora分镜模板分段并行生成开关
+        self.segment_var = tk.BooleanVar(value=False)
+        
+        # 分解词配置（默认匹配"电影分镜头与提示词专家"模板中的 Shot 标题）
+        self.separators = [tk.StringVar(value=f"Shot {i+1}") for i in range(8)]
+        self.prefix_var = tk.StringVar(value="Shot ")
+        self.suffix_var = tk.StringVar(value="")
+        self.add_number_var = tk.BooleanVar(value=True)
+        
+        # 拆分方式（分解词原文 / 正则表达式 / Markdown标题级别）
+        self.split_mode_var = tk.StringVar(value=os.getenv("SPLIT_MODE", "literal"))
+        self.heading_level_var = tk.IntVar(value=2)
+        
+        # 接收结果时的增量拆分器（每次分析开始时按当前分解词创建）
+        self.live_splitter = None
+        self.live_matcher = None
+        self.live_parts = []
+        
+        # 多模型对比使用的模型列表
+        self.compare_models_var = tk.StringVar(value=os.getenv("COMPARE_MODELS", "gpt-3.5-turbo, gpt-4o, gemini-3-pro"))
+        
+        # 响应缓存（可在配置页关闭，关闭后本次运行直接请求API）
+        self.cache = ResponseCache()
+        self.use_cache_var = tk.BooleanVar(value=True)
         
         # 移除菜单栏，改为使用工具架
         
+        # 创建底部状态栏（先于主框架打包，保证窗口缩小时不被挤出）
+        self.status_var = tk.StringVar(value="就绪")
+        self.status_bar = ttk.Label(root, textvariable=self.status_var, anchor=tk.W, padding=(10, 2))
+        self.status_bar.pack(side=tk.BOTTOM, fill=tk.X)
+        
         # 创建主框架
         self.main_frame = ttk.Frame(root, padding="10")
         self.main_frame.pack(fill=tk.BOTH, expand=True)
@@ -371,27 +951,29 @@ class ScriptAnalyzerGUI:
         self.prompt_button = ttk.Button(self.config_tab, text="提示词配置", command=self.show_prompt_config)
         self.prompt_button.grid(row=0, column=1, padx=10, pady=10)
         
-        # 移除多余的配置说明文字
+        # 流式输出选项
+        self.stream_check = ttk.Checkbutton(self.config_tab, text="流式输出", variable=self.stream_var)
+        self.stream_check.grid(row=0, column=2, padx=10, pady=10)
         
-        # 创建帮助标签页
-        self.help_tab = ttk.Frame(self.tool_frame)
-        self.tool_frame.add(self.help_tab, text="帮助")
+        # 缓存选项
+        self.cache_check = ttk.Checkbutton(self.config_tab, text="使用缓存", variable=self.use_cache_var)
+        self.cache_check.grid(row=0, column=3, padx=10, pady=10)
         
-        # 帮助按钮框架
-        self.help_button_frame = ttk.Frame(self.help_tab)
-        self.help_button_frame.pack(fill=tk.X, pady=10)
+        # 长剧本分场景选项
+        self.chunk_check = ttk.Checkbutton(self.config_tab, text="长剧本分场景", variable=self.chunk_var)
+        self.chunk_check.grid(row=0, column=4, padx=10, pady=10)
         
-        # 添加帮助按钮
-        self.help_button = ttk.Button(self.help_button_frame, text="使用帮助", command=self.show_help)
-        self.help_button.pack(side=tk.LEFT, padx=10, pady=5)
+        # 分镜分段并行生成选项（适用于"电影分镜头与提示词专家"等按15秒分段的模板）
+        self.segment_check = ttk.Checkbutton(self.config_tab, text="分镜分段并行", variable=self.segment_var)
+        self.segment_check.grid(row=0, column=5, padx=10, pady=10)
         
-        # 添加关于按钮
-        self.about_button = ttk.Button(self.help_button_frame, text="关于", command=self.show_about)
-        self.about_button.pack(side=tk.LEFT, padx=10, pady=5)
+        # 移除多余的配置说明文字
         
-        # 添加退出按钮
-        self.exit_button = ttk.Button(self.help_button_frame, text="退出", command=self.root.quit)
-        self.exit_button.pack(side=tk.LEFT, padx=10, pady=5)
+        # 创建帮助标签页（内容在第一次切换到该页时创建）
+        self.help_tab = ttk.Frame(self.tool_frame)
+        self.tool_frame.add(self.help_tab, text="帮助")
+        self.help_button_frame = None
+        self.tool_frame.bind("<<NotebookTabChanged>>", self.on_tool_tab_changed)
         
         # 创建全局滚动区域
         self.canvas_frame_container = ttk.Frame(self.main_frame)
@@ -444,6 +1026,22 @@ class ScriptAnalyzerGUI:
         self.analyze_button = ttk.Button(self.script_button_frame, text="分析剧本", command=self.start_analysis)
         self.analyze_button.pack(side=tk.LEFT, padx=2)
         
+        # 取消当前分析按钮（中断正在进行的请求）
+        self.cancel_button = ttk.Button(self.script_button_frame, text="取消分析", command=self.cancel_analysis)
+        self.cancel_button.pack(side=tk.LEFT, padx=2)
+        
+        # 任务队列按钮
+        self.jobs_button = ttk.Button(self.script_button_frame, text="任务队列", command=self.show_job_queue)
+        self.jobs_button.pack(side=tk.LEFT, padx=2)
+        
+        # 历史记录按钮
+        self.history_button = ttk.Button(self.script_button_frame, text="历史记录", command=self.show_history)
+        self.history_button.pack(side=tk.LEFT, padx=2)
+        
+        # 多模型对比按钮
+        self.compare_button = ttk.Button(self.script_button_frame, text="多模型对比", command=self.show_model_compare)
+        self.compare_button.pack(side=tk.LEFT, padx=2)
+        
         # 清空剧本按钮
         self.clear_button = ttk.Button(self.script_button_frame, text="清空剧本", command=self.clear_content)
         self.clear_button.pack(side=tk.LEFT, padx=2)
@@ -455,6 +1053,7 @@ class ScriptAnalyzerGUI:
         self.script_scrollbar.config(command=self.script_text.yview)
         self.script_text.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
         self.script_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.script_renderer = ChunkedTextRenderer(self.script_text)
         
         # 中间：分析结果
         self.result_frame = ttk.LabelFrame(self.top_paned, text="分析结果", padding="10")
@@ -468,6 +1067,10 @@ class ScriptAnalyzerGUI:
         self.save_button = ttk.Button(self.result_button_frame, text="保存结果", command=self.save_result)
         self.save_button.pack(side=tk.LEFT, padx=2)
         
+        # 导出分镜按钮（Sora分镜模板的结果解析为镜头记录）
+        self.export_shots_button = ttk.Button(self.result_button_frame, text="导出分镜", command=self.export_shots)
+        self.export_shots_button.pack(side=tk.LEFT, padx=2)
+        
         # 结果文本框
         self.result_scrollbar = ttk.Scrollbar(self.result_frame)
         self.result_text = tk.Text(self.result_frame, wrap=tk.WORD, yscrollcommand=self.result_scrollbar.set, state=tk.DISABLED, height=15,
@@ -476,6 +1079,9 @@ class ScriptAnalyzerGUI:
         self.result_text.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
         self.result_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
         
+        # 大段结果分多帧插入，避免界面卡住
+        self.result_renderer = ChunkedTextRenderer(self.result_text, readonly=True, follow=True)
+        
         # 底部：结果分析拆分
         self.split_frame = ttk.LabelFrame(self.main_paned, text="结果分析拆分", padding="10")
         self.main_paned.add(self.split_frame, weight=1)
@@ -492,51 +1098,49 @@ class ScriptAnalyzerGUI:
         self.split_options_button = ttk.Button(self.separator_config_frame, text="分解词配置", command=self.show_split_options)
         self.split_options_button.pack(fill=tk.X, padx=5, pady=2)
         
-        # 创建网格排列的8个结果输出框
-        self.result_output_frame = ttk.Frame(self.split_frame)
-        self.result_output_frame.pack(fill=tk.BOTH, expand=True, pady=5)
-        
-        # 配置列权重，使两列等宽
-        self.result_output_frame.columnconfigure(0, weight=1)
-        self.result_output_frame.columnconfigure(1, weight=1)
+        # 全部导出（目录 / ZIP / JSONL）
+        self.export_all_button = ttk.Button(self.separator_config_frame, text="全部导出", command=self.show_export_all)
+        self.export_all_button.pack(fill=tk.X, padx=5, pady=2)
         
-        self.result_outputs = []
-        self.result_texts = []
-        
-        for i in range(8):
-            # 计算行和列 (2列布局)
-            row = i // 2
-            col = i % 2
-            
-            # 创建输出框框架
-            output_frame = ttk.LabelFrame(self.result_output_frame, text=f"结果 {i+1}", padding="5")
-            output_frame.grid(row=row, column=col, sticky=tk.NSEW, padx=3, pady=3)
-            
-            # 工具栏（保存按钮）
-            toolbar_frame = ttk.Frame(output_frame)
-            toolbar_frame.pack(fill=tk.X, pady=(0, 2))
-            
-            # 这里的 i 是循环变量，在lambda中需要捕获
-            save_btn = ttk.Button(toolbar_frame, text="保存", width=6, command=lambda idx=i: self.save_single_split_result(idx))
-            save_btn.pack(side=tk.RIGHT)
-            
-            # 创建文本框
-            scrollbar = ttk.Scrollbar(output_frame)
-            text_widget = tk.Text(output_frame, wrap=tk.WORD, yscrollcommand=scrollbar.set, height=8,
-                                 bg='#1e1e1e', fg='#ffffff', insertbackground='white')
-            scrollbar.config(command=text_widget.yview)
-            text_widget.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-            scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
-            
-            # 设置文本框为只读
-            text_widget.config(state=tk.DISABLED)
-            
-            self.result_outputs.append(output_frame)
-            self.result_texts.append(text_widget)
+        # 拆分结果分页视图（输出框按需创建，翻页和多次分析之间复用）
+        self.split_view = SplitResultView(self.split_frame, self.save_single_split_result)
+        self.split_view.pack(fill=tk.BOTH, expand=True, pady=5)
         
         # 添加底部Padding，防止内容被遮挡
         ttk.Frame(self.split_frame, height=20).pack(fill=tk.X)
         
+        # 首帧绘制后在后台预先导入网络层并创建客户端，第一次分析不必再等待
+        self.root.after(PRELOAD_DELAY_MS, lambda: threading.Thread(target=self.provider_client, daemon=True).start())
+    
+    def provider_client(self):
+        """返回长连接API客户端，第一次调用时导入网络层并创建（可在工作线程调用）"""
+        with self.client_lock:
+            if self.client is None:
+                from src.api_client import ProviderClient
+                self.client = ProviderClient()
+            return self.client
+    
+    def on_tool_tab_changed(self, event=None):
+        """第一次切换到帮助页时创建其中的按钮"""
+        if self.help_button_frame is not None or self.tool_frame.select() != str(self.help_tab):
+            return
+        
+        # 帮助按钮框架
+        self.help_button_frame = ttk.Frame(self.help_tab)
+        self.help_button_frame.pack(fill=tk.X, pady=10)
+        
+        # 添加帮助按钮
+        self.help_button = ttk.Button(self.help_button_frame, text="使用帮助", command=self.show_help)
+        self.help_button.pack(side=tk.LEFT, padx=10, pady=5)
+        
+        # 添加关于按钮
+        self.about_button = ttk.Button(self.help_button_frame, text="关于", command=self.show_about)
+        self.about_button.pack(side=tk.LEFT, padx=10, pady=5)
+        
+        # 添加退出按钮
+        self.exit_button = ttk.Button(self.help_button_frame, text="退出", command=self.root.quit)
+        self.exit_button.pack(side=tk.LEFT, padx=10, pady=5)
+    
     def configure_dark_mode(self):
         """配置深色主题"""
         style = ttk.Style()
@@ -597,50 +1201,22 @@ class ScriptAnalyzerGUI:
             )
             if file_path:
                 self.status_var.set(f"正在打开文件: {file_path}")
-                # 先测试文件是否存在
-                if not os.path.exists(file_path):
-                    raise FileNotFoundError(f"文件不存在: {file_path}")
+                content, used_encoding = read_script_file(file_path)
                 
-                # 测试文件权限
-                if not os.access(file_path, os.R_OK):
-                    raise PermissionError(f"没有读取权限: {file_path}")
-                
-                # 尝试使用不同编码打开文件
-                encodings = ['utf-8', 'gbk', 'gb2312', 'ascii']
-                content = None
-                used_encoding = None
-                
-                for encoding in encodings:
-                    try:
-                        with open(file_path, "r", encoding=encoding) as f:
-                            content = f.read()
-                        used_encoding = encoding
-                        break
-                    except UnicodeDecodeError:
-                        continue
-                
-                if content is None:
-                    raise UnicodeDecodeError("无法解析文件编码", b"", 0, 0, "所有尝试的编码都失败")
-                
-                # 确保文本框可编辑
-                self.script_text.config(state=tk.NORMAL)
-                self.script_text.delete(1.0, tk.END)
-                self.script_text.insert(1.0, content)
-                # 滚动到顶部
-                self.script_text.see(1.0)
-                # 强制更新UI
-                self.script_text.update_idletasks()
-                
-                self.status_var.set(f"已加载文件: {os.path.basename(file_path)} (编码: {used_encoding})")
+                # 大文件分多帧插入，加载过程中界面保持响应
+                name = os.path.basename(file_path)
+                self.status_var.set(f"正在加载文件: {name}")
+                self.script_renderer.render(content, on_done=lambda: self.status_var.set(
+                    f"已加载文件: {name} (编码: {used_encoding})"))
         except Exception as e:
-            CustomErrorDialog(self.parent, "错误", f"无法打开文件: {str(e)}")
+            CustomErrorDialog(self.root, "错误", f"无法打开文件: {str(e)}")
             self.status_var.set(f"打开文件失败: {str(e)}")
             print(f"文件打开错误详情: {type(e).__name__}: {str(e)}")
             self.status_var.set("就绪")
     
     def start_analysis(self):
         """开始分析脚本"""
-        script = self.script_text.get(1.0, tk.END).strip()
+        script = self.script_content()
         if not script:
             messagebox.showwarning("警告", "请输入或上传脚本内容")
             return
@@ -655,314 +1231,470 @@ class ScriptAnalyzerGUI:
             messagebox.showwarning("警告", "请输入分析提示词")
             return
         
-        # 禁用分析按钮
-        self.analyze_button.config(state=tk.DISABLED)
-        self.status_var.set("正在分析，请稍候...")
+        # 缺少模板变量时在发送请求之前提示
+        variables = self.variables_for(prompt)
+        if variables is None:
+            return
         
-        # 在新线程中执行API调用
-        threading.Thread(target=self.call_api, args=(script, prompt), daemon=True).start()
+        # 选择分析方式
+        if self.segment_var.get():
+            target, mode = self.call_api_segmented, "segmented"
+        elif self.chunk_var.get() and len(chunk_script(script)) > 1:
+            target, mode = self.call_api_chunked, "chunked"
+        elif self.stream_var.get():
+            target, mode = self.call_api_stream, "stream"
+        else:
+            target, mode = self.call_api, "normal"
+        
+        # 整篇发送时先在本地估算token，放不下时提示用户并不发送
+        status = "正在分析，请稍候..."
+        if target in (self.call_api, self.call_api_stream):
+            full_prompt = build_full_prompt(prompt, script, variables)
+            budget = plan_budget(self.model.get(), SYSTEM_PROMPT, full_prompt, script, prompt)
+            if not budget["fits"]:
+                messagebox.showwarning("警告", budget["warning"])
+                return
+            status = (f"正在分析，请稍候... (预计输入 {budget['prompt_tokens']} tokens，"
+                      f"输出上限 {budget['max_tokens']} tokens)")
+        
+        # 提交到任务队列（Tk变量只在界面线程读取，工作线程使用快照）；
+        # 新任务接管结果区，之前的任务继续运行，结果可在任务队列中查看
+        config = self.api_config()
+        config["variables"] = variables
+        cache = self.cache if self.use_cache_var.get() else None
+        job = self.jobs.submit(job_name("分析", script),
+                               lambda job: self.run_analysis_job(job, target, mode, script, prompt, config, cache),
+                               PRIORITY_INTERACTIVE)
+        self.begin_job_display(job.id)
+        self.status_var.set(status)
     
-    def call_api(self, script, prompt):
-        """调用API进行脚本分析"""
+    def api_config(self):
+        """在界面线程读取当前API配置，返回供工作线程使用的快照"""
+        return {"api_url": self.api_url.get(), "api_key": self.api_key.get(), "model": self.model.get(),
+                "template": self.template_name}
+    
+    def variables_for(self, prompt, parent=None):
+        """解析模板变量并检查提示词所需的变量是否齐全，有问题时提示并返回None"""
         try:
-            # 添加详细调试日志
-            print(f"\n=== 调试信息开始 ===")
-            print(f"原始提示词完整内容: {repr(prompt)}")  # 使用repr显示所有特殊字符
-            print(f"提示词中是否包含{{script}}占位符: {'{script}' in prompt}")
-            print(f"脚本内容长度: {len(script)} 字符")
-            
-            # 构建完整提示词
-            # 如果提示词中包含 {script} 占位符，则替换
-            # 如果不包含，则将剧本内容附加到提示词后面
-            if '{script}' in prompt:
-                full_prompt = prompt.replace("{script}", script)
-                print("已替换{script}占位符")
-            else:
-                full_prompt = f"{prompt}\n\n剧本内容：\n{script}"
-                print("未找到占位符，已将剧本内容附加到末尾")
-                
-            print(f"替换后完整提示词长度: {len(full_prompt)} 字符")
-            print(f"完整提示词预览: {full_prompt[:100]}...")
-            
-            current_model = self.model.get()
-            api_url = self.api_url.get()
-            api_key = self.api_key.get()
-
-            
-            print(f"当前模型: {current_model}")
-            print(f"API URL: {api_url}")
-            
-            # 通用请求头
-            headers = {
-                "Authorization": f"Bearer {api_key}",
-                "Content-Type": "application/json"
-            }
-            
-            # 检查API URL是否包含必要的端点路径
-            # 常见的API端点路径
-            common_endpoints = [
-                "/v1/chat/completions",
-                "/chat/completions",
-                "/api/chat/completions",
-                "/v1/chatgpt/completions",
-                "/api/v1/chat/completions"
-            ]
-            
-            # 检查API URL是否已经包含常见端点
-            url_has_endpoint = any(endpoint in api_url for endpoint in common_endpoints)
-            
-            # 如果API URL看起来像基础URL（没有端点），尝试添加合适的端点
-            final_api_url = api_url
-            if not url_has_endpoint:
-                # 对于特定平台的特殊处理
-                if "api.comfly.chat" in api_url or "anyroutes.cn" in api_url or "ai.t8star.cn" in api_url:
-                    # "贞贞的AI工坊"等平台通常使用/v1/chat/completions端点
-                    final_api_url = f"{api_url.rstrip('/')}/v1/chat/completions"
-                elif "openai" in api_url.lower():
-                    # OpenAI官方API
-                    final_api_url = f"{api_url.rstrip('/')}/v1/chat/completions"
-                elif current_model.startswith("gemini-"):
-                    # Google Gemini API使用特定端点
-                    if "/models/" not in api_url and "/generateContent" not in api_url:
-                        final_api_url = f"{api_url.rstrip('/')}/generateContent"
-            
-            # 根据API URL或模型类型判断使用哪种请求格式
-            # 支持常见的第三方平台API格式
-            payload = None
-            
-            # 检查是否是Gemini API
-            if current_model.startswith("gemini-"):
-                # Google Gemini API格式
-                payload = {
-                    "contents": [
-                        {
-                            "parts": [
-                                {"text": "你是一个专业的电影/短视频分镜脚本专家，擅长将文字剧本转化为详细的分镜脚本"},
-                                {"text": full_prompt}
-                            ]
-                        }
-                    ],
-                    "generationConfig": {
-                        "temperature": 0.7,
-                        "maxOutputTokens": 3000
-                    }
-                }
-            # 检查是否是OpenAI兼容API（包括大多数第三方平台）
-            elif "openai" in final_api_url.lower() or "chat/completions" in final_api_url.lower() or "api.comfly.chat" in final_api_url or "anyroutes.cn" in final_api_url or "ai.t8star.cn" in final_api_url:
-                # OpenAI标准格式（适用于大多数第三方平台）
-                payload = {
-                    "model": current_model,
-                    "messages": [
-                        {"role": "system", "content": "你是一个专业的电影/短视频分镜脚本专家，擅长将文字剧本转化为详细的分镜脚本"},
-                        {"role": "user", "content": full_prompt}
-                    ],
-                    "temperature": 0.7,
-                    "max_tokens": 3000
-                }
-            else:
-                # 默认使用OpenAI兼容格式（大多数第三方平台支持）
-                payload = {
-                    "model": current_model,
-                    "messages": [
-                        {"role": "system", "content": "你是一个专业的电影/短视频分镜脚本专家，擅长将文字剧本转化为详细的分镜脚本"},
-                        {"role": "user", "content": full_prompt}
-                    ],
-                    "temperature": 0.7,
-                    "max_tokens": 3000
-                }
-            
-            # 输出最终API URL和请求体信息
-            print(f"最终API URL: {final_api_url}")
-            print(f"请求头包含Authorization: {'Bearer ' in str(headers)}")
-            print(f"请求体类型: {type(payload)}")
-            print(f"请求体预览: {json.dumps(payload, ensure_ascii=False)[:200]}...")
-            
-            # 发送API请求（添加重试机制）
-            max_retries = 3
-            retry_delay = 5  # 重试间隔秒数
-            timeout = 60  # 增加超时时间到60秒
-            response = None
-            
-            for retry in range(max_retries):
-                try:
-                    print(f"正在发送API请求 (尝试 {retry+1}/{max_retries})...")
-                    response = requests.post(final_api_url, headers=headers, json=payload, timeout=timeout)
-                    print(f"API响应状态码: {response.status_code}")
-                    print(f"API响应头: {dict(response.headers)}")
-                    
-                    response.raise_for_status()
-                    break  # 成功获取响应，跳出循环
-                except requests.exceptions.Timeout:
-                    print(f"API请求超时 (尝试 {retry+1}/{max_retries})，{retry_delay}秒后重试...")
-                    time.sleep(retry_delay)
-                    if retry == max_retries - 1:  # 最后一次尝试失败
-                        raise ValueError(f"API请求超时，已尝试{max_retries}次，请检查网络连接或稍后重试")
-                except Exception as e:
-                    print(f"API请求错误 (尝试 {retry+1}/{max_retries}): {str(e)}")
-                    if retry == max_retries - 1:  # 最后一次尝试失败
-                        raise
-            
-            # 获取并检查响应内容
-            response_content = response.text.strip()
-            print(f"API响应内容长度: {len(response_content)} 字符")
-            print(f"API响应内容预览: {response_content[:200]}...")
-            
-            if not response_content:
-                raise ValueError("API返回了空响应")
-            
-            # 解析响应内容
-            try:
-                result = response.json()
-                print(f"JSON解析成功: {json.dumps(result, ensure_ascii=False)[:200]}...")
-                
-                # 尝试多种响应格式解析
-                analysis = None
-                
-                # 1. OpenAI格式
-                try:
-                    analysis = result["choices"][0]["message"]["content"]
-                except KeyError:
-                    pass
-                
-                # 2. Gemini格式
-                if analysis is None:
-                    try:
-                        analysis = result["candidates"][0]["content"]["parts"][0]["text"]
-                    except KeyError:
-                        pass
-                
-                # 3. 第三方平台可能的简化格式
-                if analysis is None:
-                    try:
-                        analysis = result["data"]["content"]
-                    except KeyError:
-                        pass
-                
-                # 4. 直接内容格式
-                if analysis is None:
-                    try:
-                        analysis = result["content"]
-                    except KeyError:
-                        pass
-                
-                # 5. 其他可能的格式
-                if analysis is None:
-                    try:
-                        analysis = result["result"]
-                    except KeyError:
-                        pass
-                
-                # 如果还是无法解析，尝试直接返回响应内容或给出更详细的错误信息
-                if analysis is None:
-                    raise ValueError(f"无法解析API响应格式\n原始响应:\n{json.dumps(result, indent=2)}")
-                    
-            except json.JSONDecodeError as e:
-                raise ValueError(f"API返回的不是有效的JSON格式: {str(e)}\n原始响应:\n{response_content}")
-            except Exception as e:
-                raise ValueError(f"解析API响应时出错: {str(e)}\n原始响应:\n{response_content}")
-            
-            # 更新结果
-            self.root.after(0, self.update_result, analysis)
-            self.root.after(0, self.update_status, "分析完成")
-            
+            variables = parse_variables(self.template_variables)
+        except ValueError as e:
+            messagebox.showwarning("警告", f"模板变量格式错误: {str(e)}", parent=parent)
+            return None
+        missing = compile_template(prompt).missing(dict(variables, script=""))
+        if missing:
+            messagebox.showwarning("警告", f"提示词模板缺少变量: {', '.join('{' + name + '}' for name in missing)}\n\n"
+                                   f"请在 提示词配置 -> 模板变量 中按 名称=值 填写", parent=parent)
+            return None
+        return variables
+    
+    def begin_job_display(self, job_id):
+        """让结果区改为显示指定任务，并按当前配置准备边接收边拆分"""
+        self.displayed_job = job_id
+        self.result_renderer.render("")
+        self.start_live_split()
+    
+    def run_analysis_job(self, job, target, mode, script, prompt, config, cache):
+        """在任务队列的工作线程中执行分析并保存到历史记录，返回分析结果文本"""
+        view = JobView(self, job.id)
+        start = time.perf_counter()
+        try:
+            result = target(view, job.token, script, prompt, config, cache)
+            self.record_history(script, prompt, config, mode, result, time.perf_counter() - start)
+            return result["text"]
+        except CancelledError:
+            self.events.status(view.update_status, "分析已取消")
+            raise
         except Exception as e:
-            self.root.after(0, CustomErrorDialog, self.root, "分析失败", f"API调用失败: {str(e)}")
-            self.root.after(0, self.update_status, "分析失败")
+            self.events.call(view.show_error, f"API调用失败: {str(e)}")
+            self.events.status(view.update_status, "分析失败")
+            raise
         finally:
-            self.root.after(0, self.enable_analyze_button)
+            self.events.call(view.finish_live_split)
+    
+    def record_history(self, script, prompt, config, mode, result, latency):
+        """把完成的分析写入历史记录（可在工作线程调用，写入失败不影响分析结果）"""
+        if self.history is None:
+            return
+        try:
+            self.history.add(script, result["text"], model=config["model"], prompt=prompt,
+                             template=config.get("template"), api_url=config["api_url"], mode=mode,
+                             latency=latency, usage=result.get("usage"), cached=result.get("cached", False))
+        except sqlite3.Error as e:
+            print(f"保存历史记录失败: {str(e)}")
+            return
+        self.events.latest("history", self.refresh_history)
+    
+    def show_history(self):
+        """打开历史记录窗口（已打开时置于前台）"""
+        if self.history is None:
+            messagebox.showwarning("警告", "历史记录数据库不可用")
+            return
+        if self.history_window is not None and self.history_window.alive():
+            self.history_window.window.lift()
+            return
+        self.history_window = HistoryWindow(self.root, self.history, self.open_history_run)
+    
+    def refresh_history(self):
+        """有新的历史记录时刷新历史记录窗口"""
+        if self.history_window is not None and self.history_window.alive():
+            self.history_window.search()
+    
+    def open_history_run(self, run_id):
+        """重新打开一条历史记录：恢复剧本和结果并重新拆分，不调用API"""
+        run = self.history.get(run_id)
+        if run is None:
+            messagebox.showwarning("警告", "该记录已被删除")
+            return
+        self.script_renderer.render(run["script"])
+        self.begin_job_display(None)
+        self.update_result(run["output"])
+        self.finish_live_split()
+        created = time.strftime("%Y-%m-%d %H:%M", time.localtime(run["created"]))
+        self.status_var.set(f"已打开历史记录: {created} ({run['model']})")
+    
+    def cancel_analysis(self):
+        """取消结果区正在显示的分析任务"""
+        if self.displayed_job is not None and self.jobs.cancel(self.displayed_job):
+            self.status_var.set("正在取消分析...")
+        else:
+            self.status_var.set("没有正在进行的分析")
+    
+    def show_job_queue(self):
+        """打开任务队列窗口（已打开时置于前台）"""
+        if self.job_window is not None and self.job_window.alive():
+            self.job_window.window.lift()
+            return
+        self.job_window = JobQueueWindow(self.root, self.jobs, self.show_job, self.add_background_jobs,
+                                         self.toggle_watch, lambda: self.watch_folder)
+    
+    def refresh_jobs(self):
+        """任务状态变化后刷新任务队列窗口"""
+        if self.job_window is not None and self.job_window.alive():
+            self.job_window.refresh()
+    
+    def show_job(self, job_id):
+        """在结果区显示已完成任务的结果并重新拆分"""
+        job = self.jobs.get(job_id)
+        if job is None or not isinstance(job.result, str):
+            messagebox.showinfo("提示", "该任务还没有可显示的结果", parent=self.job_window.window if self.job_window else None)
+            return
+        self.begin_job_display(job_id)
+        self.update_result(job.result)
+        self.finish_live_split()
+        self.status_var.set(f"正在显示任务结果: {job.name}")
+    
+    def background_settings(self):
+        """读取后台任务使用的 (提示词, API配置, 缓存)，未配置API密钥或提示词时提示并返回None"""
+        prompt = self.prompt.get().strip()
+        if not self.api_key.get().strip() or not prompt:
+            messagebox.showwarning("警告", "请先配置API密钥和分析提示词")
+            return None
+        variables = self.variables_for(prompt)
+        if variables is None:
+            return None
+        config = self.api_config()
+        config["variables"] = variables
+        return prompt, config, self.cache if self.use_cache_var.get() else None
+    
+    def analyze_file_job(self, job, path, prompt, config, cache, mode="file", content=None):
+        """分析一个剧本文件（工作线程），结果写到剧本旁边的 .result.txt，返回结果文本"""
+        from src.api_client import analyze_script_detailed
+        
+        script, _ = decode_script(content) if content is not None else read_script_file(path)
+        result = analyze_script_detailed(script, prompt, config["api_url"], config["api_key"], config["model"],
+                                         verbose=False, client=self.provider_client(), cache=cache, cancel_token=job.token,
+                                         variables=config.get("variables"))
+        atomic_write_text(result_path_for(path, os.path.dirname(path)), result["text"])
+        self.record_history(script, prompt, config, mode, result, result["latency"])
+        return result["text"]
+    
+    def add_background_jobs(self, paths):
+        """以后台优先级分析多个剧本文件"""
+        settings = self.background_settings()
+        if settings is None:
+            return
+        for path in paths:
+            self.jobs.submit(f"文件: {os.path.basename(path)}",
+                             lambda job, path=path: self.analyze_file_job(job, path, *settings),
+                             PRIORITY_BACKGROUND)
+        self.status_var.set(f"已加入 {len(paths)} 个后台任务")
+    
+    def toggle_watch(self):
+        """开始或停止监视文件夹"""
+        if self.watch_stop is not None:
+            self.watch_stop.set()
+            self.watch_stop = None
+            self.watch_folder = None
+            self.status_var.set("已停止监视文件夹")
+            self.refresh_jobs()
+            return
+        settings = self.background_settings()
+        if settings is None:
+            return
+        folder = filedialog.askdirectory(title="选择要监视的文件夹")
+        if not folder:
+            return
+        try:
+            watcher = FolderWatcher(folder)
+        except OSError as e:
+            CustomErrorDialog(self.root, "错误", f"无法监视文件夹: {str(e)}")
+            return
+        
+        def analyze(job, path, data, digest):
+            try:
+                text = self.analyze_file_job(job, path, *settings, mode="watch", content=data)
+            except Exception as e:
+                watcher.mark_done(path, digest, False, str(e))
+                raise
+            watcher.mark_done(path, digest, True)
+            return text
+        
+        def submit(path, data, digest):
+            self.jobs.submit(f"监视: {os.path.basename(path)}",
+                             lambda job: analyze(job, path, data, digest), PRIORITY_BACKGROUND)
+        
+        # 扫描（读取变化的文件、计算哈希）在后台线程进行，并发数由任务队列控制
+        self.watch_stop = threading.Event()
+        self.watch_folder = watcher.folder
+        threading.Thread(target=watch_loop, args=(watcher, submit, DEFAULT_WATCH_INTERVAL, self.watch_stop),
+                         daemon=True).start()
+        self.status_var.set(f"正在监视文件夹: {watcher.folder}")
+        self.refresh_jobs()
+    
+    def process_events(self):
+        """按固定间隔执行工作线程发布的界面事件"""
+        for func, args in self.events.drain():
+            try:
+                func(*args)
+            except Exception as e:
+                print(f"界面事件处理失败: {type(e).__name__}: {str(e)}")
+        self.root.after(EVENT_TICK_MS, self.process_events)
+    
+    def cache_status(self, hits_before):
+        """返回本次分析的缓存状态说明"""
+        stats = self.cache.stats()
+        source = "缓存命中" if stats["hits"] > hits_before else "API"
+        return f"来源: {source}，缓存命中 {stats['hits']} / 未命中 {stats['misses']}"
+    
+    def call_api(self, view, token, script, prompt, config, cache=None):
+        """调用API进行脚本分析"""
+        from src.api_client import analyze_script_detailed
+        
+        hits_before = self.cache.hits
+        result = analyze_script_detailed(script, prompt, config["api_url"], config["api_key"], config["model"],
+                                         client=self.provider_client(), cache=cache, cancel_token=token,
+                                         variables=config.get("variables"))
+        
+        # 更新结果
+        self.events.call(view.update_result, result["text"])
+        self.events.status(view.update_status, f"分析完成 ({self.cache_status(hits_before)})")
+        return result
+    
+    def call_api_stream(self, view, token, script, prompt, config, cache=None):
+        """以流式方式调用API，边接收边显示分析结果"""
+        from src.api_client import stream_script
+        
+        hits_before = self.cache.hits
+        start = time.perf_counter()
+        first_token = []
+        
+        def on_delta(text):
+            if not first_token:
+                first_token.append(time.perf_counter() - start)
+                self.events.status(view.update_status, f"正在接收结果... (首字耗时 {first_token[0]:.2f}s)")
+            self.events.append(view.append_result, text)
+        
+        analysis, first_token_time, cached = stream_script(script, prompt, config["api_url"], config["api_key"],
+                                                           config["model"], on_delta, client=self.provider_client(),
+                                                           cache=cache,
+                                                           cancel_token=token, variables=config.get("variables"))
+        total = time.perf_counter() - start
+        self.events.status(view.update_status,
+                           f"分析完成 (首字耗时 {first_token_time:.2f}s，总耗时 {total:.2f}s，{self.cache_status(hits_before)})")
+        # 流式响应不含用量信息
+        return {"text": analysis, "usage": None, "cached": cached}
+    
+    def call_api_chunked(self, view, token, script, prompt, config, cache=None):
+        """按场景切分长剧本并行分析，前面的片段都完成后即按顺序显示结果"""
+        def on_chunk(index, total, result):
+            with lock:
+                ready[index] = result
+                self.events.status(view.update_status, f"正在分析... 已完成 {len(ready)}/{total} 个场景片段")
+                # 只输出连续完成的前缀，保证显示顺序与最终拼接结果一致
+                while next_index[0] in ready:
+                    self.events.append(view.append_result, stitch_part(next_index[0], total, ready[next_index[0]]))
+                    next_index[0] += 1
+        
+        ready = {}
+        next_index = [0]
+        lock = threading.Lock()
+        result = analyze_long_script(script, prompt, config["api_url"], config["api_key"], config["model"],
+                                     client=self.provider_client(), cache=cache, on_chunk=on_chunk, cancel_token=token,
+                                     variables=config.get("variables"))
+        status = f"分析完成 ({len(result['chunks'])} 个场景片段，总耗时 {result['latency']:.2f}s"
+        if result["failed"]:
+            status += f"，{result['failed']} 个片段失败"
+        self.events.status(view.update_status, status + ")")
+        return {"text": result["text"], "usage": result["usage"], "cached": False}
+    
+    def call_api_segmented(self, view, token, script, prompt, config, cache=None):
+        """先生成分段规划，再并行生成每个15秒片段"""
+        from src.storyboard_generator import generate_storyboard
+        
+        def on_segment(index, total):
+            done.append(index)
+            self.events.status(view.update_status, f"正在生成分镜... 已完成 {len(done)}/{total} 个片段")
+        
+        done = []
+        self.events.status(view.update_status, "正在生成分段规划...")
+        result = generate_storyboard(script, prompt, config["api_url"], config["api_key"], config["model"],
+                                     client=self.provider_client(), cache=cache, on_segment=on_segment, cancel_token=token,
+                                     variables=config.get("variables"))
+        self.events.call(view.update_result, result["text"])
+        status = f"分析完成 ({len(result['plan']['segments'])} 个片段，总耗时 {result['latency']:.2f}s"
+        if result["failed"]:
+            status += f"，{result['failed']} 个片段失败"
+        self.events.status(view.update_status, status + ")")
+        return {"text": result["text"], "usage": None, "cached": False}
+    
+    def show_model_compare(self):
+        """打开多模型对比窗口"""
+        ModelCompareWindow(self.root, self.compare_models_var, self.start_model_compare)
+    
+    def start_model_compare(self, models, window):
+        """在后台线程中把当前剧本并发发送给多个模型"""
+        script = self.script_content()
+        api_key = self.api_key.get().strip()
+        prompt = self.prompt.get().strip()
+        if not script or not api_key or not prompt:
+            messagebox.showwarning("警告", "请先输入剧本内容、API密钥和分析提示词", parent=window.window)
+            window.show_summary([], 0.0)
+            return
+        variables = self.variables_for(prompt, parent=window.window)
+        if variables is None:
+            window.show_summary([], 0.0)
+            return
+        
+        api_url = self.api_url.get()
+        cache = self.cache if self.use_cache_var.get() else None
+        
+        def worker():
+            results, wall_time = compare_models(
+                script, prompt, api_url, api_key, models, client=self.provider_client(), cache=cache,
+                on_result=lambda result: self.events.call(window.show_result, result), variables=variables)
+            self.events.call(window.show_summary, results, wall_time)
+        
+        threading.Thread(target=worker, daemon=True).start()
     
     def update_result(self, result):
-        """更新分析结果"""
-        self.result_text.config(state=tk.NORMAL)
-        self.result_text.delete(1.0, tk.END)
-        self.result_text.insert(1.0, result)
-        self.result_text.config(state=tk.DISABLED)
+        """更新分析结果（长结果分多帧插入）"""
+        self.result_renderer.render(result)
+        self.feed_live_split(result)
+    
+    def append_result(self, text):
+        """在分析结果末尾追加文本"""
+        self.result_renderer.append(text)
+        self.feed_live_split(text)
+    
+    def result_content(self):
+        """返回完整的分析结果（先插入尚未渲染的部分）"""
+        self.result_renderer.flush()
+        return self.result_text.get(1.0, tk.END).strip()
+    
+    def script_content(self):
+        """返回完整的剧本内容（先插入尚未渲染的部分）"""
+        self.script_renderer.flush()
+        return self.script_text.get(1.0, tk.END).strip()
+    
+    def current_matcher(self):
+        """按当前拆分方式和分解词获取编译好的匹配器（相同配置复用缓存），配置无效时抛出 ValueError"""
+        mode = self.split_mode_var.get()
+        used = tuple(sep for sep in (var.get().strip() for var in self.separators) if sep)
+        if mode != "heading":
+            if not used:
+                raise ValueError("请至少配置一个分解词")
+            # 检查分解词是否重复
+            if len(set(used)) != len(used):
+                raise ValueError("分解词不能重复")
+        return get_matcher(mode, used, self.heading_level_var.get())
+    
+    def show_sections(self, raw_result, sections):
+        """把拆分结果显示到分页视图（开头内容不显示），返回显示的段落数"""
+        view_sections = [{"title": section["separator"], "content": section["content"]}
+                         for section in sections if section["separator"] is not None]
+        
+        # 如果没有找到任何分解词，将整个结果显示在第一个输出框
+        if not view_sections and raw_result:
+            view_sections = [{"title": "结果 1", "content": raw_result}]
+        
+        # 每个段落一个输出框，段落较多时分页显示
+        self.split_view.set_sections(view_sections)
+        return len(view_sections)
+    
+    def start_live_split(self):
+        """按当前拆分配置准备边接收边拆分（配置无效时不做实时拆分）"""
+        self.split_view.clear()
+        try:
+            self.live_matcher = self.current_matcher()
+        except ValueError:
+            self.live_matcher = None
+        # 分解词原文模式可逐块增量拆分；正则和标题模式在结果接收完毕后整体拆分一次
+        self.live_splitter = None
+        self.live_parts = []
+        if isinstance(self.live_matcher, MultiPatternMatcher):
+            self.live_splitter = IncrementalSplitter(None, matcher=self.live_matcher)
+    
+    def feed_live_split(self, text):
+        """把新到达的结果交给增量拆分器，已结束的段落立即显示"""
+        if self.live_matcher is not None:
+            self.live_parts.append(text)
+        if self.live_splitter is not None:
+            for section in self.live_splitter.feed(text):
+                if section["separator"] is not None:
+                    self.split_view.append_section({"title": section["separator"], "content": section["content"]})
+    
+    def finish_live_split(self):
+        """结果接收完毕，显示剩余段落"""
+        matcher, self.live_matcher = self.live_matcher, None
+        splitter, self.live_splitter = self.live_splitter, None
+        if matcher is None:
+            return
+        # 直接使用接收到的文本，不必等结果文本框渲染完成
+        raw_result = "".join(self.live_parts).strip()
+        self.live_parts = []
+        if splitter is not None:
+            splitter.finish()
+            self.show_sections(raw_result, splitter.sections)
+        else:
+            self.show_sections(raw_result, split_text(raw_result, None, matcher))
     
     def update_status(self, status):
         """更新状态"""
         self.status_var.set(status)
     
-    def enable_analyze_button(self):
-        """启用分析按钮"""
-        self.analyze_button.config(state=tk.NORMAL)
-    
     def analyze_result(self):
-        """分析结果，将其拆分为8个部分"""
+        """分析结果，按分解词拆分到各个输出框"""
         # 获取原始分析结果
-        raw_result = self.result_text.get(1.0, tk.END).strip()
+        raw_result = self.result_content()
         if not raw_result:
             messagebox.showwarning("警告", "没有可分析的结果")
             return
         
-        # 获取所有分解词
-        separators = [var.get().strip() for var in self.separators]
-        
-        # 检查分解词是否重复
-        if len(set(separators)) != len(separators):
-            messagebox.showwarning("警告", "分解词不能重复")
+        # 按拆分方式获取编译好的匹配器（相同配置直接复用）
+        try:
+            matcher = self.current_matcher()
+        except ValueError as e:
+            messagebox.showwarning("警告", str(e))
             return
         
-        # 清空所有输出框
-        for text_widget in self.result_texts:
-            text_widget.config(state=tk.NORMAL)
-            text_widget.delete(1.0, tk.END)
-            text_widget.config(state=tk.DISABLED)
-        
-        # 查找所有分解词的位置
-        positions = []
-        for i, sep in enumerate(separators):
-            if sep:
-                start = raw_result.find(sep)
-                if start != -1:
-                    positions.append((start, start + len(sep), i, sep))
-        
-        # 按位置排序
-        positions.sort()
-        
-        # 拆分结果
-        last_pos = 0
-        for i, (start, end, idx, sep) in enumerate(positions):
-            # 处理上一个分解词到当前分解词之间的内容
-            if i > 0:
-                prev_end = positions[i-1][1]
-                content = raw_result[prev_end:start].strip()
-                prev_idx = positions[i-1][2]
-                
-                if content:
-                    self.result_texts[prev_idx].config(state=tk.NORMAL)
-                    self.result_texts[prev_idx].insert(1.0, content)
-                    self.result_texts[prev_idx].config(state=tk.DISABLED)
-                    
-                    # 更新结果框标题
-                    self.result_outputs[prev_idx].config(text=f"{separators[prev_idx]}")
-            
-            # 处理最后一个分解词到文本结尾的内容
-            if i == len(positions) - 1:
-                content = raw_result[end:].strip()
-                if content:
-                    self.result_texts[idx].config(state=tk.NORMAL)
-                    self.result_texts[idx].insert(1.0, content)
-                    self.result_texts[idx].config(state=tk.DISABLED)
-                    
-                    # 更新结果框标题
-                    self.result_outputs[idx].config(text=f"{separators[idx]}")
-            
-            last_pos = end
+        # 一次扫描找出所有分解词的全部出现位置
+        count = self.show_sections(raw_result, split_text(raw_result, None, matcher))
         
-        # 如果没有找到任何分解词，将整个结果显示在第一个输出框
-        if not positions:
-            self.result_texts[0].config(state=tk.NORMAL)
-            self.result_texts[0].insert(1.0, raw_result)
-            self.result_texts[0].config(state=tk.DISABLED)
-            
-            # 更新结果框标题
-            self.result_outputs[0].config(text=f"{separators[0]}")
-        
-        messagebox.showinfo("分析完成", "结果已成功拆分")
+        messagebox.showinfo("分析完成", f"结果已成功拆分为 {count} 段")
     
     def save_result(self):
         """保存分析结果"""
-        result = self.result_text.get(1.0, tk.END).strip()
+        result = self.result_content()
         if not result:
             messagebox.showwarning("警告", "没有可保存的分析结果")
             return
@@ -979,9 +1711,35 @@ class ScriptAnalyzerGUI:
                     f.write(result)
                 self.status_var.set(f"结果已保存到: {os.path.basename(file_path)}")
             except Exception as e:
-                CustomErrorDialog(self.parent, "错误", f"保存文件失败: {str(e)}")
+                CustomErrorDialog(self.root, "错误", f"保存文件失败: {str(e)}")
                 self.status_var.set("就绪")
     
+    def export_shots(self):
+        """把分镜结果解析为镜头记录并导出为JSON或CSV"""
+        result = self.result_content()
+        if not result:
+            messagebox.showwarning("警告", "没有可导出的分析结果")
+            return
+        
+        segments = parse_storyboard(result)
+        shot_count = sum(len(segment.shots) for segment in segments)
+        if not shot_count:
+            messagebox.showwarning("警告", "结果中没有找到 Shot 镜头，请使用分镜模板生成结果")
+            return
+        
+        file_path = filedialog.asksaveasfilename(
+            defaultextension=".json",
+            filetypes=[("JSON文件", "*.json"), ("CSV文件", "*.csv")],
+            title="导出分镜"
+        )
+        
+        if file_path:
+            try:
+                export_storyboard(segments, file_path)
+                self.status_var.set(f"已导出 {len(segments)} 个片段、{shot_count} 个镜头到: {os.path.basename(file_path)}")
+            except Exception as e:
+                CustomErrorDialog(self.root, "错误", f"导出分镜失败: {str(e)}")
+    
     def create_context_menus(self):
         """创建右键菜单"""
         # 创建通用的文本框右键菜单
@@ -1015,7 +1773,7 @@ class ScriptAnalyzerGUI:
         # 创建提示词配置对话框
         dialog = tk.Toplevel(self.root)
         dialog.title("提示词配置")
-        dialog.geometry("600x450")
+        dialog.geometry("600x560")
         dialog.transient(self.root)
         dialog.grab_set()
         
@@ -1037,16 +1795,15 @@ class ScriptAnalyzerGUI:
         template_combo = ttk.Combobox(template_frame, textvariable=template_var)
         template_combo.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=5)
         
-        # 加载模板列表
-        templates = self.load_prompt_templates()
-        template_names = list(templates.keys())
-        template_combo['values'] = template_names
+        # 加载模板列表（模板文件未变化时直接使用内存中的缓存）
+        store = get_template_store()
+        template_combo['values'] = store.names()
         
         def load_selected_template(event=None):
-            name = template_var.get()
-            if name in templates:
+            content = store.get(template_var.get())
+            if content is not None:
                 prompt_text.delete(1.0, tk.END)
-                prompt_text.insert(1.0, templates[name])
+                prompt_text.insert(1.0, content)
         
         template_combo.bind("<<ComboboxSelected>>", load_selected_template)
         
@@ -1055,20 +1812,38 @@ class ScriptAnalyzerGUI:
             name = template_var.get()
             if not name:
                 return
-            if name in templates:
+            if store.get(name) is not None:
                 if messagebox.askyesno("确认", f"确定要删除模板 '{name}' 吗？"):
-                    del templates[name]
-                    self.save_prompt_templates(templates)
+                    try:
+                        store.delete(name)
+                    except (OSError, ValueError) as e:
+                        messagebox.showerror("错误", f"删除模板失败: {str(e)}")
+                        return
                     # 刷新列表
-                    current_names = list(templates.keys())
-                    template_combo['values'] = current_names
+                    template_combo['values'] = store.names()
                     template_var.set("")
         
         delete_btn = ttk.Button(template_frame, text="删除", command=delete_template)
         delete_btn.pack(side=tk.RIGHT, padx=5)
         
+        # 历史版本按钮（选择一个版本载入到编辑框，保存后成为新版本）
+        def show_versions():
+            name = template_var.get() or new_template_name.get().strip()
+            try:
+                versions = store.history(name) if name else []
+            except ValueError as e:
+                messagebox.showerror("错误", f"读取历史版本失败: {str(e)}", parent=dialog)
+                return
+            if not versions:
+                messagebox.showinfo("提示", "该模板没有历史版本", parent=dialog)
+                return
+            TemplateVersionsDialog(dialog, name, versions, lambda content: (
+                prompt_text.delete(1.0, tk.END), prompt_text.insert(1.0, content)))
+        
+        ttk.Button(template_frame, text="历史版本", command=show_versions).pack(side=tk.RIGHT, padx=5)
+        
         # 提示词说明
-        ttk.Label(main_frame, text="分析提示词 (系统会自动在末尾附加剧本内容): ").pack(anchor=tk.W, pady=(0, 5))
+        ttk.Label(main_frame, text="分析提示词 ({script} 处填入剧本内容，不含 {script} 时附加在末尾): ").pack(anchor=tk.W, pady=(0, 5))
         
         # 提示词文本框
         text_frame = ttk.Frame(main_frame)
@@ -1084,6 +1859,14 @@ class ScriptAnalyzerGUI:
         # 插入当前提示词
         prompt_text.insert(1.0, self.prompt.get())
         
+        # 模板变量（每行一个 名称=值，模板中用 {名称} 引用）
+        variables_frame = ttk.LabelFrame(main_frame, text="模板变量 (每行一个 名称=值，如 duration=60秒)", padding="5")
+        variables_frame.pack(fill=tk.X, pady=(10, 0))
+        variables_text = tk.Text(variables_frame, wrap=tk.NONE, height=4,
+                                 bg='#1e1e1e', fg='#ffffff', insertbackground='white')
+        variables_text.pack(fill=tk.X)
+        variables_text.insert(1.0, self.template_variables)
+        
         # 底部按钮区域
         button_frame = ttk.Frame(main_frame)
         button_frame.pack(fill=tk.X, pady=10)
@@ -1105,15 +1888,21 @@ class ScriptAnalyzerGUI:
             if not content:
                 messagebox.showwarning("警告", "提示词内容不能为空")
                 return
+            problems = validate_template(content)
+            if problems and not messagebox.askyesno(
+                    "提示", "模板中可能有写错的变量：\n" + "\n".join(problems) + "\n\n是否仍然保存？", parent=dialog):
+                return
             
-            templates[name] = content
-            self.save_prompt_templates(templates)
+            try:
+                version = store.save(name, content)
+            except (OSError, ValueError) as e:
+                messagebox.showerror("错误", f"保存模板失败: {str(e)}")
+                return
             
             # 刷新列表
-            current_names = list(templates.keys())
-            template_combo['values'] = current_names
+            template_combo['values'] = store.names()
             template_var.set(name)
-            messagebox.showinfo("成功", f"模板 '{name}' 已保存")
+            messagebox.showinfo("成功", f"模板 '{name}' 已保存（版本 {version}）")
             
         ttk.Button(save_template_frame, text="保存模板", command=save_as_template).pack(side=tk.LEFT, padx=5)
         
@@ -1124,35 +1913,28 @@ class ScriptAnalyzerGUI:
         # 应用并关闭按钮
         def apply_prompt():
             new_prompt = prompt_text.get(1.0, tk.END).strip()
+            variables = variables_text.get(1.0, tk.END).strip()
+            try:
+                parse_variables(variables)
+            except ValueError as e:
+                messagebox.showwarning("警告", f"模板变量格式错误: {str(e)}", parent=dialog)
+                return
+            self.template_variables = variables
             if new_prompt:
                 self.prompt.set(new_prompt)
+                # 记录模板名称供历史记录使用（修改过内容则不再属于该模板）
+                name = template_var.get()
+                self.template_name = name if store.get(name) == new_prompt else None
                 dialog.destroy()
         
         ttk.Button(right_btn_frame, text="应用", command=apply_prompt).pack(side=tk.LEFT, padx=5)
         ttk.Button(right_btn_frame, text="取消", command=dialog.destroy).pack(side=tk.LEFT, padx=5)
 
-    def load_prompt_templates(self):
-        """加载提示词模板"""
-        try:
-            if os.path.exists("prompt_templates.json"):
-                with open("prompt_templates.json", "r", encoding="utf-8") as f:
-                    return json.load(f)
-        except Exception as e:
-            print(f"加载模板失败: {e}")
-        return {}
-
-    def save_prompt_templates(self, templates):
-        """保存提示词模板"""
-        try:
-            with open("prompt_templates.json", "w", encoding="utf-8") as f:
-                json.dump(templates, f, ensure_ascii=False, indent=2)
-        except Exception as e:
-            messagebox.showerror("错误", f"保存模板失败: {str(e)}")
-            
     def show_split_options(self):
         """显示分解词配置对话框"""
         # 显示分解词配置对话框
-        SplitConfigDialog(self.root, self.separators, self.bulk_add_separators, self.prefix_var, self.suffix_var, self.add_number_var)
+        SplitConfigDialog(self.root, self.separators, self.bulk_add_separators, self.prefix_var, self.suffix_var, self.add_number_var,
+                          self.split_mode_var, self.heading_level_var)
     
     def create_split_options_dialog(self):
         """创建分解词配置对话框"""
@@ -1208,47 +1990,39 @@ class ScriptAnalyzerGUI:
         # 退出快捷键 Ctrl+Q
         self.root.bind("<Control-q>", lambda event: self.root.quit())
     
-    def bulk_add_separators(self, use_chinese_numbers=False):
+    def bulk_add_separators(self, use_chinese_numbers=False, count=None):
         """一键添加分解词"""
         prefix = self.prefix_var.get()
         suffix = self.suffix_var.get()
         add_number = self.add_number_var.get()
+        count = count or len(self.separators)
         
-        # 中文数字映射
-        chinese_numbers = ['一', '二', '三', '四', '五', '六', '七', '八']
+        def number(n):
+            # 根据参数选择数字格式
+            return to_chinese_number(n) if use_chinese_numbers else str(n)
         
-        # 生成8个分解词
-        for i in range(8):
+        # 生成count个分解词
+        del self.separators[count:]
+        while len(self.separators) < count:
+            self.separators.append(tk.StringVar(value=""))
+        for i, var in enumerate(self.separators):
             if add_number:
-                # 根据参数选择数字格式
-                if use_chinese_numbers:
-                    separator = f"{prefix}{chinese_numbers[i]}{suffix}"
-                else:
-                    separator = f"{prefix}{i+1}{suffix}"
+                var.set(f"{prefix}{number(i + 1)}{suffix}")
             else:
-                separator = f"{prefix}{suffix}"
-            self.separators[i].set(separator)
+                var.set(f"{prefix}{suffix}")
         
         if add_number:
-            if use_chinese_numbers:
-                self.status_var.set(f"已生成分解词: {prefix}{chinese_numbers[0]}{suffix} - {prefix}{chinese_numbers[7]}{suffix}")
-            else:
-                self.status_var.set(f"已生成分解词: {prefix}1{suffix} - {prefix}8{suffix}")
+            self.status_var.set(f"已生成分解词: {prefix}{number(1)}{suffix} - {prefix}{number(count)}{suffix}")
         else:
-            self.status_var.set(f"已生成分解词: {prefix}{suffix} (重复8次)")
+            self.status_var.set(f"已生成分解词: {prefix}{suffix} (重复{count}次)")
     
     def clear_content(self):
         """清空内容"""
-        self.script_text.delete(1.0, tk.END)
-        self.result_text.config(state=tk.NORMAL)
-        self.result_text.delete(1.0, tk.END)
-        self.result_text.config(state=tk.DISABLED)
-        
-        # 清空所有结果输出框
-        for text_widget in self.result_texts:
-            text_widget.config(state=tk.NORMAL)
-            text_widget.delete(1.0, tk.END)
-            text_widget.config(state=tk.DISABLED)
+        self.script_renderer.render("")
+        self.result_renderer.render("")
+        
+        # 清空拆分结果（输出框保留复用）
+        self.split_view.clear()
             
         self.status_var.set("已清空")
     
@@ -1312,16 +2086,44 @@ class ScriptAnalyzerGUI:
             elif event.num == 4 or (hasattr(event, "delta") and event.delta > 0):
                 self.canvas.yview_scroll(-1, "units")
 
+    def show_export_all(self):
+        """打开全部导出对话框"""
+        if not self.split_view.sections:
+            messagebox.showwarning("警告", "没有可导出的拆分结果，请先分析结果")
+            return
+        ExportAllDialog(self.root, len(self.split_view.sections), self.start_export_all)
+    
+    def start_export_all(self, target, fmt, include_raw, include_script, dialog):
+        """在主线程取出要导出的内容，然后在后台线程写入"""
+        sections = list(self.split_view.sections)
+        raw_result = self.result_content() if include_raw else None
+        script = self.script_content() if include_script else None
+        self.status_var.set("正在导出...")
+        
+        def run():
+            try:
+                count = export_sections(sections, target, fmt, raw_result, script,
+                                        on_progress=lambda done, total: self.events.latest(dialog, dialog.set_progress, done, total))
+                self.events.status(self.update_status, f"已导出 {count} 个文件到: {os.path.basename(target) or target}")
+            except Exception as e:
+                self.events.call(CustomErrorDialog, self.root, "错误", f"导出失败: {str(e)}")
+                self.events.status(self.update_status, "导出失败")
+            finally:
+                self.events.call(dialog.finish)
+        
+        threading.Thread(target=run, daemon=True).start()
+    
     def save_single_split_result(self, index):
         """保存单个拆分结果"""
         try:
-            content = self.result_texts[index].get(1.0, tk.END).strip()
+            sections = self.split_view.sections
+            content = sections[index]["content"].strip() if index < len(sections) else ""
             if not content:
                 messagebox.showwarning("警告", "没有可保存的内容")
                 return
             
             # 获取默认文件名（使用标题）
-            default_name = self.separators[index].get()
+            default_name = sections[index]["title"]
             # 清理文件名中的非法字符
             default_name = "".join([c for c in default_name if c.isalnum() or c in (' ', '-', '_')]).strip()
             if not default_name:
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+剧本文件读取工具（不依赖tkinter，GUI与批处理共用）
+
+文件只读取一次（大文件使用内存映射），先检查BOM，再用开头的一小段样本判断编码，
+最后整体解码一次；样本判断错误时才会换下一个编码重新解码。
+"""
+
+import codecs
+import mmap
+import os
+
+
+# 依次尝试的文件编码（gb2312 和 ascii 分别是 gbk 和 utf-8 的子集，保留用于兜底）
+ENCODINGS = ['utf-8', 'gbk', 'gb2312', 'ascii']
+
+# 超过该大小的文件使用内存映射读取
+MMAP_THRESHOLD = 4 * 1024 * 1024
+
+# 判断编码时使用的样本字节数
+PROBE_BYTES = 64 * 1024
+
+# BOM -> 编码（UTF-32 的 BOM 以 UTF-16 的 BOM 开头，需先检查）
+BOMS = [
+    (codecs.BOM_UTF32_LE, "utf-32"),
+    (codecs.BOM_UTF32_BE, "utf-32"),
+    (codecs.BOM_UTF8, "utf-8-sig"),
+    (codecs.BOM_UTF16_LE, "utf-16"),
+    (codecs.BOM_UTF16_BE, "utf-16"),
+]
+
+
+def _probe(sample, encoding):
+    """判断样本能否按encoding解码（样本末尾被截断的多字节字符不算错误）"""
+    decoder = codecs.getincrementaldecoder(encoding)()
+    try:
+        decoder.decode(sample, final=False)
+    except UnicodeDecodeError:
+        return False
+    return True
+
+
+def detect_encoding(data):
+    """根据BOM和开头的样本推断编码，返回按可能性排序的候选编码列表"""
+    head = bytes(data[:4])
+    for bom, encoding in BOMS:
+        if head.startswith(bom):
+            return [encoding]
+    sample = bytes(data[:PROBE_BYTES])
+    candidates = [encoding for encoding in ENCODINGS if _probe(sample, encoding)]
+    # 样本通过不代表整个文件都能解码，其余编码作为兜底
+    return candidates + [encoding for encoding in ENCODINGS if encoding not in candidates]
+
+
+def decode_script(data):
+    """解码剧本字节内容，返回 (内容, 编码)；换行统一为 \\n"""
+    for encoding in detect_encoding(data):
+        try:
+            content = str(data, encoding)
+        except UnicodeDecodeError:
+            continue
+        if "\r" in content:
+            # 与文本模式读取一致的换行处理
+            content = content.replace("\r\n", "\n").replace("\r", "\n")
+        return content, encoding
+    raise UnicodeDecodeError("无法解析文件编码", b"", 0, 0, "所有尝试的编码都失败")
+
+
+def read_script_file(file_path):
+    """读取剧本文件，返回 (内容, 编码)"""
+    # 先测试文件是否存在
+    if not os.path.exists(file_path):
+        raise FileNotFoundError(f"文件不存在: {file_path}")
+
+    # 测试文件权限
+    if not os.access(file_path, os.R_OK):
+        raise PermissionError(f"没有读取权限: {file_path}")
+
+    with open(file_path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if size < MMAP_THRESHOLD:
+            return decode_script(f.read())
+        # 大文件直接解码映射的页面，不先复制一份字节串
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            return decode_script(data)
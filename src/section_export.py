@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+拆分结果批量导出（不依赖tkinter）
+
+一次把所有段落（可选原始结果和输入剧本）导出为目录、ZIP压缩包或JSONL文件。
+每个文件先写入同目录下的临时文件再原子替换，导出中断时不会留下写了一半的文件。
+"""
+
+import json
+import os
+import zipfile
+
+from src.fileio import atomic_write, atomic_write_text
+
+
+# 导出格式
+EXPORT_FORMATS = ("dir", "zip", "jsonl")
+
+RAW_RESULT_NAME = "raw_result.txt"
+SCRIPT_NAME = "script.txt"
+
+
+def safe_filename(title, index):
+    """根据段落标题生成文件名（去除非法字符，按序号排序）"""
+    name = "".join(c for c in (title or "") if c.isalnum() or c in (" ", "-", "_")).strip()
+    return f"{index + 1:02d}_{name or 'section'}.txt"
+
+
+def export_entries(sections, raw_result=None, script=None):
+    """返回待导出的 (文件名, 类型, 标题, 内容) 列表"""
+    entries = [(safe_filename(section["title"], i), "section", section["title"], section["content"])
+               for i, section in enumerate(sections)]
+    if raw_result:
+        entries.append((RAW_RESULT_NAME, "result", None, raw_result))
+    if script:
+        entries.append((SCRIPT_NAME, "script", None, script))
+    return entries
+
+
+def export_sections(sections, target, fmt="dir", raw_result=None, script=None, on_progress=None):
+    """导出所有段落，返回导出的条目数
+
+    sections 为 [{"title": ..., "content": ...}, ...]；fmt 为 dir（target为目录）、
+    zip 或 jsonl（target为文件路径）。每写完一个条目调用 on_progress(已完成, 总数)。
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"未知的导出格式: {fmt}")
+    entries = export_entries(sections, raw_result, script)
+    total = len(entries)
+
+    def progress(done):
+        if on_progress:
+            on_progress(done, total)
+
+    if fmt == "dir":
+        os.makedirs(target, exist_ok=True)
+        for done, (name, _, _, content) in enumerate(entries, 1):
+            atomic_write_text(os.path.join(target, name), content)
+            progress(done)
+    elif fmt == "zip":
+        def write_zip(f):
+            with zipfile.ZipFile(f, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+                for done, (name, _, _, content) in enumerate(entries, 1):
+                    archive.writestr(name, content.encode("utf-8"))
+                    progress(done)
+        atomic_write(target, write_zip)
+    else:
+        def write_jsonl(f):
+            for done, (_, kind, title, content) in enumerate(entries, 1):
+                record = {"index": done - 1, "type": kind, "title": title, "content": content}
+                f.write(json.dumps(record, ensure_ascii=False).encode("utf-8") + b"\n")
+                progress(done)
+        atomic_write(target, write_jsonl)
+    return total
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+拆分结果分页视图
+
+只为当前页创建输出框，输出框在翻页和多次分析之间复用，
+启动时不创建任何输出框，段落数量再多内存占用也只取决于每页的输出框数量。
+"""
+
+import tkinter as tk
+from tkinter import ttk
+
+from src.text_renderer import ChunkedTextRenderer
+
+
+class SplitResultView:
+    """分页显示拆分段落的输出框列表"""
+    def __init__(self, parent, on_save, page_size=8, columns=2):
+        self.on_save = on_save
+        self.page_size = page_size
+        self.columns = columns
+        self.sections = []  # [{"title": ..., "content": ...}, ...]
+        self.page = 0
+        self.panels = []  # [(output_frame, renderer), ...]，按需创建并复用
+
+        self.frame = ttk.Frame(parent)
+
+        # 翻页栏
+        nav_frame = ttk.Frame(self.frame)
+        nav_frame.pack(fill=tk.X, pady=(0, 3))
+
+        self.prev_button = ttk.Button(nav_frame, text="上一页", width=8, command=lambda: self.show_page(self.page - 1))
+        self.prev_button.pack(side=tk.LEFT, padx=2)
+
+        self.next_button = ttk.Button(nav_frame, text="下一页", width=8, command=lambda: self.show_page(self.page + 1))
+        self.next_button.pack(side=tk.LEFT, padx=2)
+
+        self.page_var = tk.StringVar()
+        ttk.Label(nav_frame, textvariable=self.page_var).pack(side=tk.LEFT, padx=10)
+
+        # 输出框网格
+        self.grid_frame = ttk.Frame(self.frame)
+        self.grid_frame.pack(fill=tk.BOTH, expand=True)
+        for col in range(self.columns):
+            self.grid_frame.columnconfigure(col, weight=1, uniform="split")
+
+        # 没有段落时的提示
+        self.placeholder = ttk.Label(self.grid_frame, text="点击\"分析结果\"后在此显示拆分结果")
+
+        self.render()
+
+    def pack(self, **kwargs):
+        """打包视图框架"""
+        self.frame.pack(**kwargs)
+
+    def page_count(self):
+        """返回总页数"""
+        return max(1, (len(self.sections) + self.page_size - 1) // self.page_size)
+
+    def set_sections(self, sections):
+        """设置全部段落并回到第一页"""
+        self.sections = list(sections)
+        self.page = 0
+        self.render()
+
+    def append_section(self, section):
+        """追加一个段落，只在它落在当前页时刷新对应输出框"""
+        self.sections.append(section)
+        slot = len(self.sections) - 1 - self.page * self.page_size
+        if 0 <= slot < self.page_size:
+            while len(self.panels) <= slot:
+                self._create_panel(len(self.panels))
+            self._fill(slot, section)
+            self.placeholder.grid_remove()
+        self.update_nav()
+
+    def clear(self):
+        """清空所有段落（保留已创建的输出框供下次复用）"""
+        self.set_sections([])
+
+    def show_page(self, page):
+        """切换到指定页"""
+        self.page = max(0, min(page, self.page_count() - 1))
+        self.render()
+
+    def section_index(self, slot):
+        """返回输出框位置对应的段落下标"""
+        return self.page * self.page_size + slot
+
+    def _create_panel(self, slot):
+        """创建一个输出框（只在当前页需要更多输出框时调用）"""
+        output_frame = ttk.LabelFrame(self.grid_frame, text="", padding="5")
+
+        # 工具栏（保存按钮）
+        toolbar_frame = ttk.Frame(output_frame)
+        toolbar_frame.pack(fill=tk.X, pady=(0, 2))
+        save_btn = ttk.Button(toolbar_frame, text="保存", width=6,
+                              command=lambda: self.on_save(self.section_index(slot)))
+        save_btn.pack(side=tk.RIGHT)
+
+        # 创建文本框
+        scrollbar = ttk.Scrollbar(output_frame)
+        text_widget = tk.Text(output_frame, wrap=tk.WORD, yscrollcommand=scrollbar.set, height=8,
+                              bg='#1e1e1e', fg='#ffffff', insertbackground='white')
+        scrollbar.config(command=text_widget.yview)
+        text_widget.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+
+        # 设置文本框为只读
+        text_widget.config(state=tk.DISABLED)
+
+        self.panels.append((output_frame, ChunkedTextRenderer(text_widget, readonly=True)))
+
+    def _fill(self, slot, section):
+        """把段落内容写入指定位置的输出框并显示"""
+        output_frame, renderer = self.panels[slot]
+        output_frame.config(text=section["title"])
+        renderer.render(section["content"])
+        output_frame.grid(row=slot // self.columns, column=slot % self.columns,
+                          sticky=tk.NSEW, padx=3, pady=3)
+
+    def render(self):
+        """刷新当前页的输出框"""
+        start = self.page * self.page_size
+        visible = self.sections[start:start + self.page_size]
+        while len(self.panels) < len(visible):
+            self._create_panel(len(self.panels))
+
+        for slot, (output_frame, _) in enumerate(self.panels):
+            if slot < len(visible):
+                self._fill(slot, visible[slot])
+            else:
+                output_frame.grid_remove()
+
+        if visible:
+            self.placeholder.grid_remove()
+        else:
+            self.placeholder.grid(row=0, column=0, columnspan=self.columns, pady=20)
+        self.update_nav()
+
+    def update_nav(self):
+        """更新翻页按钮和页码"""
+        pages = self.page_count()
+        self.page_var.set(f"第 {self.page + 1}/{pages} 页，共 {len(self.sections)} 段")
+        self.prev_button.config(state=tk.NORMAL if self.page > 0 else tk.DISABLED)
+        self.next_button.config(state=tk.NORMAL if self.page < pages - 1 else tk.DISABLED)
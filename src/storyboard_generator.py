@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Sora分镜模板的分段并行生成（不依赖tkinter）
+
+流程：先请求一份简短的分段规划，再把每个15秒片段作为独立请求并行生成，
+最后按模板的输出格式拼接。
+"""
+
+import json
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from src.api_client import analyze_script_detailed
+from src.cancellation import CancelledError
+from src.prompt_template import replace_variable
+
+
+# 每个生成单元的时长（秒）
+SEGMENT_SECONDS = 15.0
+
+# 默认同时生成的片段数
+DEFAULT_SEGMENT_WORKERS = 4
+
+# 镜头时长行，如 "Duration: 2.5 sec" 或 "Duration: [2.5] sec"
+DURATION_PATTERN = re.compile(r"(Duration\s*[:：]\s*\[?)(\d+(?:\.\d+)?)(\]?\s*(?:sec|s|秒))", re.IGNORECASE)
+
+PLAN_PROMPT = """你是一位电影导演。请根据用户提供的主体或故事梗概，先做一份简短的分段规划，不要写具体镜头。
+
+要求：
+1. 总时长必须是15秒的倍数{duration_hint}
+2. 每15秒为一个片段（Segment），为每个片段写一句话的剧情节拍
+3. 只输出JSON，不要输出其它内容，格式如下：
+{{"theme": "主题名称", "style": "风格基调", "total_duration": 30,
+  "segments": [{{"index": 1, "beats": "本段剧情节拍"}}, {{"index": 2, "beats": "本段剧情节拍"}}]}}
+
+用户输入：
+{script}"""
+
+SEGMENT_PROMPT = """{template}
+
+---
+现在只生成完整影片中的一个片段，不要输出影片概览或其它片段。
+影片主题: {theme}
+风格基调: {style}
+完整分段规划:
+{outline}
+
+请生成 📼 Segment {index} ({start} - {end})，本段剧情节拍: {beats}
+要求：所有 Shot 的 Duration 精确到小数点后一位，且总和必须正好等于 15.0 秒。
+输出以 "📼 Segment {index} ({start} - {end})" 开头，严格遵守上面模板中 Segment 部分的格式。{correction}
+
+用户输入：
+{{script}}"""
+
+CORRECTION_NOTE = "\n注意：上一次生成的镜头时长总和为 {total:.1f} 秒，不等于 15.0 秒，请重新分配时长。"
+
+# 用户模板自带的 {script} 替换为该说明，剧本只在片段提示词末尾发送一次
+TEMPLATE_SCRIPT_NOTE = "（见文末用户输入）"
+
+
+def format_timestamp(seconds):
+    """把秒数格式化为 mm:ss"""
+    seconds = int(round(seconds))
+    return f"{seconds // 60:02d}:{seconds % 60:02d}"
+
+
+def parse_plan(text):
+    """解析分段规划JSON（兼容 ```json 代码块包裹）"""
+    match = re.search(r"\{.*\}", text, re.DOTALL)
+    if not match:
+        raise ValueError(f"无法解析分段规划:\n{text}")
+    try:
+        plan = json.loads(match.group(0))
+    except json.JSONDecodeError as e:
+        raise ValueError(f"分段规划不是有效的JSON: {str(e)}\n{text}")
+
+    segments = plan.get("segments") or []
+    if not segments:
+        raise ValueError(f"分段规划中没有片段:\n{text}")
+    plan["segments"] = [
+        {"index": i, "beats": str(segment.get("beats", "")).strip() if isinstance(segment, dict) else str(segment)}
+        for i, segment in enumerate(segments, 1)
+    ]
+    plan["total_duration"] = int(len(plan["segments"]) * SEGMENT_SECONDS)
+    plan.setdefault("theme", "")
+    plan.setdefault("style", "")
+    return plan
+
+
+def shot_durations(text):
+    """提取片段文本中所有镜头的时长"""
+    return [float(match.group(2)) for match in DURATION_PATTERN.finditer(text)]
+
+
+def apportion_tenths(durations, target=SEGMENT_SECONDS):
+    """把target按各时长的比例分配为以0.1秒为单位的整数（每个至少0.1秒，总和正好等于target）"""
+    units = int(round(target * 10))
+    if len(durations) > units:
+        raise ValueError(f"镜头数 {len(durations)} 过多，无法在 {target:.1f} 秒内每个至少分配0.1秒")
+    total = sum(durations)
+    if total <= 0:
+        durations, total = [1.0] * len(durations), float(len(durations))
+    ideal = [d / total * units for d in durations]
+    tenths = [max(1, int(x)) for x in ideal]
+    # 最大余数法：不足的部分按小数部分从大到小补齐，超出的部分（最少0.1秒导致）从最长的镜头扣除
+    by_remainder = sorted(range(len(ideal)), key=lambda i: ideal[i] - int(ideal[i]), reverse=True)
+    shortfall = units - sum(tenths)
+    for i in range(max(0, shortfall)):
+        tenths[by_remainder[i % len(tenths)]] += 1
+    while shortfall < 0:
+        longest = max(range(len(tenths)), key=lambda i: tenths[i])
+        tenths[longest] -= 1
+        shortfall += 1
+    return tenths
+
+
+def normalize_durations(text, target=SEGMENT_SECONDS):
+    """按比例调整所有镜头时长，使其精确到0.1秒且总和等于target；没有镜头时长时抛出 ValueError"""
+    durations = shot_durations(text)
+    if not durations:
+        raise ValueError("片段中没有解析到任何镜头时长（Duration）")
+    values = iter(apportion_tenths(durations, target))
+    return DURATION_PATTERN.sub(lambda m: f"{m.group(1)}{next(values) / 10:.1f}{m.group(3)}", text)
+
+
+def generate_segment(script, template, plan, segment, api_url, api_key, model, client=None, cache=None,
+                     cancel_token=None, variables=None):
+    """生成单个片段，时长不符时重试一次，仍不符则按比例修正（没有任何镜头时长时抛出 ValueError）"""
+    index = segment["index"]
+    start = (index - 1) * SEGMENT_SECONDS
+    outline = "\n".join(f"Segment {s['index']}: {s['beats']}" for s in plan["segments"])
+    # 模板自带剧本占位符时去掉，避免剧本发送两次
+    template = replace_variable(template, "script", TEMPLATE_SCRIPT_NOTE)
+    correction = ""
+    for attempt in range(2):
+        prompt = SEGMENT_PROMPT.format(
+            template=template, theme=plan["theme"], style=plan["style"], outline=outline,
+            index=index, start=format_timestamp(start), end=format_timestamp(start + SEGMENT_SECONDS),
+            beats=segment["beats"], correction=correction)
+        text = analyze_script_detailed(script, prompt, api_url, api_key, model, verbose=False, client=client,
+                                       cache=cache, cancel_token=cancel_token, variables=variables)["text"].strip()
+        total = sum(shot_durations(text))
+        if abs(total - SEGMENT_SECONDS) < 0.05:
+            return text
+        correction = CORRECTION_NOTE.format(total=total)
+    return normalize_durations(text)
+
+
+def failed_segment_text(index, error):
+    """生成失败的片段在拼接结果中的占位文本"""
+    start = (index - 1) * SEGMENT_SECONDS
+    return (f"📼 Segment {index} ({format_timestamp(start)} - {format_timestamp(start + SEGMENT_SECONDS)})\n"
+            f"（该片段生成失败: {error}）")
+
+
+def assemble_storyboard(plan, segment_texts):
+    """按模板的输出格式拼接影片概览和所有片段"""
+    header = (
+        "🎬 影片概览\n"
+        f"影片主题: {plan['theme']}\n"
+        f"总时长: {plan['total_duration']} 秒 (包含 {len(segment_texts)} 个 15秒片段)\n"
+        f"风格基调: {plan['style']}\n"
+        "旁白: 中文"
+    )
+    return "\n\n".join([header] + segment_texts)
+
+
+def generate_storyboard(script, template, api_url, api_key, model, max_workers=DEFAULT_SEGMENT_WORKERS,
+                        total_duration=None, client=None, cache=None, on_segment=None, cancel_token=None,
+                        variables=None):
+    """分段并行生成Sora分镜脚本
+
+    每个片段完成时调用 on_segment(index, total)。variables 为用户模板中 {script} 以外的变量。
+    单个片段失败时在结果中标注，其它片段照常保留；全部失败时抛出 ValueError。
+    返回包含 text/plan/segments/failed/latency 的结果字典。
+    """
+    start = time.perf_counter()
+    duration_hint = f"，本次总时长为 {int(total_duration)} 秒" if total_duration else ""
+    plan_prompt = PLAN_PROMPT.format(duration_hint=duration_hint, script="{script}")
+    plan_text = analyze_script_detailed(script, plan_prompt, api_url, api_key, model, verbose=False, client=client,
+                                        cache=cache, cancel_token=cancel_token)["text"]
+    plan = parse_plan(plan_text)
+    segments = plan["segments"]
+
+    def run(segment):
+        try:
+            text = generate_segment(script, template, plan, segment, api_url, api_key, model,
+                                    client=client, cache=cache, cancel_token=cancel_token, variables=variables)
+            result = {"index": segment["index"], "ok": True, "text": text, "error": None}
+        except CancelledError:
+            raise
+        except Exception as e:
+            result = {"index": segment["index"], "ok": False, "text": failed_segment_text(segment["index"], e),
+                      "error": str(e)}
+        if on_segment:
+            on_segment(segment["index"], len(segments))
+        return result
+
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(segments)))) as executor:
+        results = list(executor.map(run, segments))
+
+    failed = sum(1 for r in results if not r["ok"])
+    if failed == len(results):
+        raise ValueError(f"所有 {failed} 个片段均生成失败: {results[0]['error']}")
+    return {
+        "text": assemble_storyboard(plan, [r["text"] for r in results]),
+        "plan": plan,
+        "segments": results,
+        "failed": failed,
+        "latency": time.perf_counter() - start,
+    }
@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Sora分镜结果解析与导出（不依赖tkinter）
+
+一次正则扫描定位所有 Segment / Shot / 字段标题行，字段值直接按相邻两个标题的偏移切片，
+不做逐行拆分；记录使用 __slots__，批量结果中有数万个镜头时内存占用也保持紧凑。
+"""
+
+import csv
+import json
+import re
+
+
+# 标题行：允许 Markdown 修饰（#、*、-、>）和字段名后的括号说明，如 "Scene (简述):"
+TOKEN_PATTERN = re.compile(
+    r"^[ \t#>*\-]*"
+    r"(?:"
+    r"(?:📼\s*)?Segment\s+(?P<segment>\d+)\s*\(\s*(?P<start>\d+:\d+)\s*[-–~]\s*(?P<end>\d+:\d+)\s*\)[^\n]*"
+    r"|Shot\s+(?P<shot>\d+)\b[ \t*]*(?:[:：][ \t]*)?"
+    r"|(?P<field>Duration|Scene|Sora\s*Prompt|Camera|中文旁白|旁白)[ \t]*(?:\([^)\n]*\)|（[^）\n]*）)?[ \t*]*[:：][ \t*]*"
+    r")",
+    re.MULTILINE | re.IGNORECASE)
+
+DURATION_VALUE = re.compile(r"\d+(?:\.\d+)?")
+
+# 字段标题 -> Shot 属性名
+FIELD_NAMES = {
+    "duration": "duration",
+    "scene": "scene",
+    "soraprompt": "prompt",
+    "camera": "camera",
+    "中文旁白": "narration",
+    "旁白": "narration",
+}
+
+CSV_COLUMNS = ["segment", "segment_start", "segment_end", "shot", "duration", "scene", "prompt", "camera", "narration"]
+
+
+class Shot:
+    """单个镜头记录"""
+    __slots__ = ("segment", "index", "duration", "scene", "prompt", "camera", "narration")
+
+    def __init__(self, segment, index):
+        self.segment = segment
+        self.index = index
+        self.duration = None
+        self.scene = ""
+        self.prompt = ""
+        self.camera = ""
+        self.narration = ""
+
+    def to_dict(self):
+        """转换为字典（不含所属片段）"""
+        return {"shot": self.index, "duration": self.duration, "scene": self.scene,
+                "prompt": self.prompt, "camera": self.camera, "narration": self.narration}
+
+
+class Segment:
+    """一个15秒片段及其镜头"""
+    __slots__ = ("index", "start", "end", "shots")
+
+    def __init__(self, index, start, end):
+        self.index = index
+        self.start = start
+        self.end = end
+        self.shots = []
+
+    def total_duration(self):
+        """返回本片段所有镜头的时长总和"""
+        return sum(shot.duration or 0.0 for shot in self.shots)
+
+    def to_dict(self):
+        """转换为字典"""
+        return {"segment": self.index, "start": self.start, "end": self.end,
+                "duration": round(self.total_duration(), 1),
+                "shots": [shot.to_dict() for shot in self.shots]}
+
+
+_field_cache = {}
+
+
+def _field_name(raw):
+    """把字段标题规范化为 Shot 属性名（按原始写法缓存）"""
+    name = _field_cache.get(raw)
+    if name is None:
+        name = _field_cache[raw] = FIELD_NAMES.get(re.sub(r"\s+", "", raw).lower(), "")
+    return name
+
+
+def _set_field(shot, field, value):
+    """写入一个字段值"""
+    if field == "duration":
+        number = DURATION_VALUE.search(value)
+        shot.duration = float(number.group(0)) if number else None
+    elif value or field != "narration":
+        setattr(shot, field, value)
+
+
+def parse_storyboard(text):
+    """解析分镜结果，返回 Segment 列表
+
+    没有 Segment 标题的镜头归入一个 index 为 0 的片段；无法识别的行会被忽略。
+    """
+    segments = []
+    segment = None
+    shot = None
+    field = None
+    value_start = 0
+
+    for match in TOKEN_PATTERN.finditer(text):
+        if field:
+            # 上一个字段标题之后到当前标题之前的内容即字段值
+            _set_field(shot, field, text[value_start:match.start()].strip())
+        segment_index, start, end, shot_index, raw_field = match.groups()
+        if raw_field:
+            field = _field_name(raw_field) if shot is not None else None
+            value_start = match.end()
+        elif shot_index:
+            if segment is None:
+                segment = Segment(0, "", "")
+                segments.append(segment)
+            shot = Shot(segment.index, int(shot_index))
+            segment.shots.append(shot)
+            field = None
+        else:
+            segment = Segment(int(segment_index), start, end)
+            segments.append(segment)
+            shot = None
+            field = None
+    if field:
+        _set_field(shot, field, text[value_start:].strip())
+    return segments
+
+
+def iter_shots(segments):
+    """按顺序遍历所有镜头，返回 (片段, 镜头)"""
+    for segment in segments:
+        for shot in segment.shots:
+            yield segment, shot
+
+
+def export_json(segments, path):
+    """把解析结果导出为JSON文件"""
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump([segment.to_dict() for segment in segments], f, ensure_ascii=False, indent=2)
+
+
+def export_csv(segments, path):
+    """把解析结果导出为CSV文件（每个镜头一行，逐行写入）"""
+    # utf-8-sig 便于 Excel 直接识别中文
+    with open(path, "w", encoding="utf-8-sig", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(CSV_COLUMNS)
+        for segment, shot in iter_shots(segments):
+            writer.writerow([segment.index, segment.start, segment.end, shot.index,
+                             "" if shot.duration is None else f"{shot.duration:.1f}",
+                             shot.scene, shot.prompt, shot.camera, shot.narration])
+
+
+def export_storyboard(segments, path):
+    """按扩展名（.json / .csv）导出解析结果"""
+    if str(path).lower().endswith(".csv"):
+        export_csv(segments, path)
+    else:
+        export_json(segments, path)
@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+提示词模板存储（不依赖tkinter，GUI与批处理共用）
+
+模板缓存在内存中，文件修改时间或大小变化时才重新读取；路径默认取项目目录，与当前工作目录无关。
+每次保存先写临时文件再原子替换，写到一半崩溃不会损坏已有模板；每个模板的历史版本另存一份。
+模板文件或历史文件无法解析时存储变为只读，保存、删除和恢复都会被拒绝，不会覆盖原文件。
+"""
+
+import json
+import os
+import threading
+import time
+
+from src.fileio import atomic_write_text
+
+
+# 默认模板文件（项目根目录），可通过环境变量 PROMPT_TEMPLATES 修改
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_TEMPLATES_PATH = os.getenv("PROMPT_TEMPLATES", os.path.join(PROJECT_DIR, "prompt_templates.json"))
+
+# 每个模板保留的历史版本数
+MAX_VERSIONS = 20
+
+
+def history_path_for(path):
+    """返回模板文件对应的历史版本文件路径"""
+    root, _ = os.path.splitext(path)
+    return f"{root}.history.json"
+
+
+def _file_signature(path):
+    """返回 (修改时间, 大小)，文件不存在时返回None"""
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def _read_json(path):
+    """读取JSON文件，不存在时返回空字典，无法读取或内容损坏时抛出 ValueError"""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError) as e:
+        raise ValueError(f"{path} 无法读取或已损坏: {e}")
+    if not isinstance(data, dict):
+        raise ValueError(f"{path} 已损坏: 内容不是 {{名称: 内容}} 格式")
+    return data
+
+
+class TemplateStore:
+    """线程安全的模板存储，模板文件仍是 {名称: 内容} 格式"""
+    def __init__(self, path=DEFAULT_TEMPLATES_PATH):
+        self.path = path
+        self.history_path = history_path_for(path)
+        self._lock = threading.Lock()
+        self._templates = {}
+        self._signature = None
+        self.error = None  # 模板文件损坏时的说明，此时存储只读
+        self.loads = 0  # 实际读取文件的次数
+
+    def _refresh(self):
+        """文件变化时重新读取（调用方需持有锁）"""
+        signature = _file_signature(self.path)
+        if signature == self._signature:
+            return
+        try:
+            self._templates = _read_json(self.path) if signature else {}
+            self.error = None
+        except ValueError as e:
+            print(f"加载模板失败: {e}")
+            self._templates = {}
+            self.error = str(e)
+        self._signature = signature
+        self.loads += 1
+
+    def _check_writable(self):
+        """模板文件损坏时拒绝写入，避免用空内容覆盖原文件（调用方需持有锁）"""
+        self._refresh()
+        if self.error:
+            raise ValueError(f"{self.error}\n请先修复或移走该文件，模板存储在此之前为只读")
+
+    def templates(self):
+        """返回全部模板 {名称: 内容} 的副本"""
+        with self._lock:
+            self._refresh()
+            return dict(self._templates)
+
+    def names(self):
+        """返回模板名称列表"""
+        with self._lock:
+            self._refresh()
+            return list(self._templates)
+
+    def get(self, name):
+        """返回模板内容，不存在时返回None"""
+        with self._lock:
+            self._refresh()
+            return self._templates.get(name)
+
+    def _write(self, templates):
+        """原子写入模板文件并更新缓存（调用方需持有锁）"""
+        atomic_write_text(self.path, json.dumps(templates, ensure_ascii=False, indent=2))
+        self._templates = templates
+        self._signature = _file_signature(self.path)
+
+    def save(self, name, content):
+        """保存模板并记录一个新版本，返回版本号（内容未变化时返回当前版本号）
+
+        模板文件或历史文件损坏时抛出 ValueError，不写入任何文件。
+        """
+        with self._lock:
+            self._check_writable()
+            history = _read_json(self.history_path)
+            versions = history.setdefault(name, [])
+            existing = self._templates.get(name)
+            if existing is not None and not versions and existing != content:
+                # 模板已存在但还没有历史记录（如手工编辑的模板文件），先把原内容记为版本1
+                versions.append({"version": 1, "saved": time.time(), "content": existing})
+            if self._templates.get(name) == content and versions:
+                return versions[-1]["version"]
+            version = versions[-1]["version"] + 1 if versions else 1
+            versions.append({"version": version, "saved": time.time(), "content": content})
+            del versions[:-MAX_VERSIONS]
+            # 先写历史再写模板：中途失败时模板文件保持原样
+            atomic_write_text(self.history_path, json.dumps(history, ensure_ascii=False, indent=2))
+            templates = dict(self._templates)
+            templates[name] = content
+            self._write(templates)
+            return version
+
+    def delete(self, name):
+        """删除模板（历史版本保留，可恢复），返回是否存在该模板"""
+        with self._lock:
+            self._check_writable()
+            if name not in self._templates:
+                return False
+            templates = dict(self._templates)
+            del templates[name]
+            self._write(templates)
+            return True
+
+    def history(self, name):
+        """返回模板的历史版本列表（从旧到新），每项包含 version/saved/content
+
+        历史文件损坏时抛出 ValueError。
+        """
+        with self._lock:
+            return list(_read_json(self.history_path).get(name, []))
+
+    def restore(self, name, version):
+        """把模板恢复为指定版本（作为一个新版本保存），返回新版本号"""
+        for item in self.history(name):
+            if item["version"] == version:
+                return self.save(name, item["content"])
+        raise ValueError(f"模板 {name} 没有版本 {version}")
+
+
+_default_store = None
+_default_store_lock = threading.Lock()
+
+
+def get_template_store():
+    """获取进程内共享的默认模板存储"""
+    global _default_store
+    with _default_store_lock:
+        if _default_store is None:
+            _default_store = TemplateStore()
+        return _default_store
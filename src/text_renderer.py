@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+大文本分片渲染
+
+把长文本拆成小块，用 after() 分多帧插入 Text 控件，每帧插入耗时不超过预算，
+界面在插入几MB文本时仍能响应；新的渲染会取消尚未完成的旧渲染。
+"""
+
+import time
+
+import tkinter as tk
+
+
+# 每帧用于插入文本的时间预算（秒），约为60Hz一帧的一半
+DEFAULT_FRAME_BUDGET = 0.008
+
+# 首块字符数，之后按实测插入速度调整
+DEFAULT_CHUNK_CHARS = 16384
+MIN_CHUNK_CHARS = 1024
+
+# 小于该长度的文本直接一次插入
+DIRECT_INSERT_CHARS = 65536
+
+
+class ChunkedTextRenderer:
+    """Text 控件的分片渲染器"""
+    def __init__(self, widget, frame_budget=DEFAULT_FRAME_BUDGET, readonly=False, follow=False):
+        self.widget = widget
+        self.frame_budget = frame_budget
+        self.readonly = readonly  # 渲染结束后恢复为只读
+        self.follow = follow  # 追加文本时滚动到末尾
+        self.chunk_chars = DEFAULT_CHUNK_CHARS
+        self._pending = []  # 尚未插入的文本块
+        self._offset = 0  # _pending[0] 中已插入的字符数
+        self._job = None
+        self._on_done = None
+
+    @property
+    def busy(self):
+        """是否还有尚未插入的文本"""
+        return bool(self._pending)
+
+    def render(self, text, on_done=None):
+        """替换控件全部内容（取消正在进行的渲染）"""
+        self.cancel()
+        self._edit(lambda: self.widget.delete(1.0, tk.END))
+        self._on_done = on_done
+        if len(text) <= DIRECT_INSERT_CHARS:
+            self._edit(lambda: self.widget.insert(tk.END, text))
+            self.widget.see(1.0)
+            self._finish()
+            return
+        self._pending.append(text)
+        self._schedule()
+
+    def append(self, text):
+        """在末尾追加文本；正在渲染时排在未插入的文本之后"""
+        if not text:
+            return
+        if self._pending:
+            self._pending.append(text)
+            return
+        self._edit(lambda: self.widget.insert(tk.END, text))
+        if self.follow:
+            self.widget.see(tk.END)
+
+    def cancel(self):
+        """取消正在进行的渲染，丢弃尚未插入的文本"""
+        if self._job is not None:
+            self.widget.after_cancel(self._job)
+            self._job = None
+        self._pending = []
+        self._offset = 0
+        self._on_done = None
+
+    def flush(self):
+        """立即插入剩余的全部文本（需要读取完整内容时调用）"""
+        if not self._pending:
+            return
+        if self._job is not None:
+            self.widget.after_cancel(self._job)
+            self._job = None
+        rest = self._pending[0][self._offset:] + "".join(self._pending[1:])
+        self._pending = []
+        self._offset = 0
+        self._edit(lambda: self.widget.insert(tk.END, rest))
+        self._finish()
+
+    def _schedule(self):
+        self._job = self.widget.after(1, self._step)
+
+    def _step(self):
+        """在一帧的预算内尽量多插入文本，剩余部分留到下一帧"""
+        self._job = None
+        start = time.perf_counter()
+        self.widget.config(state=tk.NORMAL)
+        while self._pending and time.perf_counter() - start < self.frame_budget:
+            text = self._pending[0]
+            chunk = text[self._offset:self._offset + self.chunk_chars]
+            chunk_start = time.perf_counter()
+            self.widget.insert(tk.END, chunk)
+            elapsed = time.perf_counter() - chunk_start
+            # 按实测速度调整块大小，使单次插入约占半个预算
+            if elapsed > 0:
+                self.chunk_chars = max(MIN_CHUNK_CHARS, int(len(chunk) / elapsed * self.frame_budget / 2))
+            self._offset += len(chunk)
+            if self._offset >= len(text):
+                self._pending.pop(0)
+                self._offset = 0
+        if self.readonly:
+            self.widget.config(state=tk.DISABLED)
+        if self._pending:
+            self._schedule()
+        else:
+            self._finish()
+
+    def _finish(self):
+        on_done, self._on_done = self._on_done, None
+        if on_done:
+            on_done()
+
+    def _edit(self, action):
+        """在可编辑状态下执行修改，完成后按需恢复只读"""
+        self.widget.config(state=tk.NORMAL)
+        action()
+        if self.readonly:
+            self.widget.config(state=tk.DISABLED)
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+本地token估算与输出预算规划（不联网）
+
+估算规则参考主流分词器的经验值：汉字等CJK字符约1个token，
+英文及其它ASCII文本约4个字符1个token。结果用于发送前的容量检查和max_tokens规划，
+不追求与服务端计费完全一致。
+"""
+
+import re
+
+
+# 模型上下文窗口（按名称前缀匹配，越具体的前缀越靠前；每个模型系列单独一项，
+# 不认识的模型使用保守的默认值，避免按过大的上限发送请求）
+MODEL_CONTEXT = [
+    ("gpt-4o", 128000),
+    ("gpt-4-turbo", 128000),
+    ("gpt-4", 8192),
+    ("gpt-3.5-turbo", 16385),
+    ("gemini-3-pro", 1048576),
+    ("gemini-3-flash", 1048576),
+    ("gemini-2.5-pro", 1048576),
+    ("gemini-2.5-flash", 1048576),
+    ("gemini-2.0-flash", 1048576),
+    ("gemini-1.5-pro", 2097152),
+    ("gemini-1.5-flash", 1048576),
+    ("gemini-1.0-pro", 32760),
+    ("gemini-pro", 32760),
+]
+
+# 模型单次输出上限
+MODEL_MAX_OUTPUT = [
+    ("gpt-4o", 16384),
+    ("gpt-4-turbo", 4096),
+    ("gpt-4", 8192),
+    ("gpt-3.5-turbo", 4096),
+    ("gemini-3-pro", 65536),
+    ("gemini-3-flash", 65536),
+    ("gemini-2.5-pro", 65536),
+    ("gemini-2.5-flash", 65536),
+    ("gemini-2.0-flash", 8192),
+    ("gemini-1.5-pro", 8192),
+    ("gemini-1.5-flash", 8192),
+    ("gemini-1.0-pro", 8192),
+    ("gemini-pro", 8192),
+]
+
+DEFAULT_CONTEXT = 8192
+DEFAULT_MAX_OUTPUT = 4096
+
+# 每条消息的格式开销（角色、分隔符等）
+MESSAGE_OVERHEAD = 4
+REPLY_OVERHEAD = 3
+
+# 输出预算：输出token数约为剧本token数的倍数，再加上模板固定结构的开销
+DEFAULT_EXPANSION = 2.0
+STORYBOARD_EXPANSION = 4.0  # 分镜模板会把每个场景扩写为多个详细镜头
+MIN_OUTPUT_TOKENS = 1024
+STORYBOARD_MIN_OUTPUT = 3000  # 分镜模板即使剧本很短也要输出多个片段，不低于原来固定的3000
+SAFETY_MARGIN = 256  # 预留给估算误差的token数
+
+# 分镜类模板的关键词
+STORYBOARD_KEYWORDS = ("分镜", "Shot", "Sora", "镜头")
+
+_CJK_PATTERN = re.compile(r"[\u3000-\u303f\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uff00-\uffef]")
+
+
+def _lookup(table, model, default):
+    """按模型名称前缀查表"""
+    for prefix, value in table:
+        if model.startswith(prefix):
+            return value
+    return default
+
+
+def context_window(model):
+    """返回模型的上下文窗口大小"""
+    return _lookup(MODEL_CONTEXT, model, DEFAULT_CONTEXT)
+
+
+def max_output_tokens(model):
+    """返回模型的单次输出上限"""
+    return _lookup(MODEL_MAX_OUTPUT, model, DEFAULT_MAX_OUTPUT)
+
+
+def estimate_tokens(text):
+    """估算文本的token数"""
+    if not text:
+        return 0
+    cjk = len(_CJK_PATTERN.findall(text))
+    other = len(text) - cjk
+    return cjk + (other + 3) // 4
+
+
+def estimate_prompt_tokens(system_prompt, full_prompt):
+    """估算一次对话请求的输入token数（系统提示词 + 用户提示词 + 格式开销）"""
+    return (estimate_tokens(system_prompt) + estimate_tokens(full_prompt)
+            + 2 * MESSAGE_OVERHEAD + REPLY_OVERHEAD)
+
+
+def plan_budget(model, system_prompt, full_prompt, script="", template=""):
+    """规划一次请求的token预算
+
+    返回字典：prompt_tokens（估算输入）、max_tokens（建议的输出上限）、
+    context_window、fits（输入加最小输出是否放得下）和 warning（不合适时的说明）。
+    fits 为False时 max_tokens 为0，这样的请求必然被服务端拒绝，调用方不应发送。
+    """
+    window = context_window(model)
+    prompt_tokens = estimate_prompt_tokens(system_prompt, full_prompt)
+
+    storyboard = any(k in template for k in STORYBOARD_KEYWORDS)
+    expansion = STORYBOARD_EXPANSION if storyboard else DEFAULT_EXPANSION
+    floor = STORYBOARD_MIN_OUTPUT if storyboard else MIN_OUTPUT_TOKENS
+    wanted = max(floor, int(estimate_tokens(script or full_prompt) * expansion))
+    available = window - prompt_tokens - SAFETY_MARGIN
+    fits = available >= MIN_OUTPUT_TOKENS
+    max_tokens = min(wanted, max_output_tokens(model), available) if fits else 0
+
+    warning = None
+    if not fits:
+        warning = (f"提示词约 {prompt_tokens} tokens，超出模型 {model} 的上下文窗口 {window} tokens 可用范围，"
+                   f"请开启\"长剧本分场景\"或更换上下文更大的模型")
+    elif max_tokens < wanted:
+        warning = f"预计输出约需 {wanted} tokens，但模型 {model} 最多只能输出 {max_tokens} tokens，结果可能被截断"
+
+    return {
+        "prompt_tokens": prompt_tokens,
+        "max_tokens": max_tokens,
+        "wanted_tokens": wanted,
+        "context_window": window,
+        "fits": fits,
+        "warning": warning,
+    }
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+工作线程到界面线程的事件总线（不依赖tkinter）
+
+工作线程只往线程安全的队列里发布事件，界面线程按固定间隔取出并执行。
+每次取出时合并冗余事件：同一键的状态/进度只保留最新一条，连续的文本追加拼接为一次，
+无论有多少任务在运行，每个周期的界面开销都有上限。
+"""
+
+import threading
+from collections import deque
+
+
+# 界面线程处理事件的间隔（毫秒）
+EVENT_TICK_MS = 50
+
+# 每个周期最多取出的事件数，剩余的留到下个周期
+DEFAULT_MAX_EVENTS = 1000
+
+_CALL = "call"
+_APPEND = "append"
+_LATEST = "latest"
+
+
+class UIEventBus:
+    """线程安全的界面事件队列"""
+    def __init__(self, max_events=DEFAULT_MAX_EVENTS):
+        self.max_events = max_events
+        self._queue = deque()
+        self._lock = threading.Lock()
+        self.published = 0
+        self.dispatched = 0
+
+    def _put(self, event):
+        with self._lock:
+            self._queue.append(event)
+            self.published += 1
+
+    def call(self, func, *args):
+        """按发布顺序执行 func(*args)（结果、错误提示、按钮状态等不能丢弃的事件）"""
+        self._put((_CALL, None, func, args))
+
+    def append(self, func, text):
+        """追加文本：同一周期内连续发往同一 func 的文本合并为一次 func(合并后的文本)"""
+        self._put((_APPEND, None, func, (text,)))
+
+    def latest(self, key, func, *args):
+        """状态/进度类事件：同一周期内相同 key 只执行最新的一条"""
+        self._put((_LATEST, key, func, args))
+
+    def status(self, func, text):
+        """状态栏文本（latest 的简写，key 为 func 本身）"""
+        self.latest(func, func, text)
+
+    def pending(self):
+        """返回尚未取出的事件数"""
+        with self._lock:
+            return len(self._queue)
+
+    def drain(self):
+        """取出本周期的事件并合并，返回待执行的 [(func, args), ...]
+
+        call/append 保持发布顺序（连续的 append 合并）；latest 事件放在最后，每个 key 一条。
+        """
+        with self._lock:
+            count = min(len(self._queue), self.max_events)
+            events = [self._queue.popleft() for _ in range(count)]
+
+        ordered = []
+        latest = {}
+        for kind, key, func, args in events:
+            if kind == _LATEST:
+                latest.pop(key, None)  # 重新插入，保持最新一次发布的顺序
+                latest[key] = (func, args)
+            elif kind == _APPEND and ordered and ordered[-1][0] == _APPEND and ordered[-1][1] == func:
+                ordered[-1][2].append(args[0])
+            elif kind == _APPEND:
+                ordered.append([_APPEND, func, [args[0]]])
+            else:
+                ordered.append([_CALL, func, args])
+
+        calls = [(func, ("".join(parts),)) if kind == _APPEND else (func, parts) for kind, func, parts in ordered]
+        calls.extend(latest.values())
+        self.dispatched += len(calls)
+        return calls
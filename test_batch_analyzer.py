@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+批量分析的输入收集与结果路径测试（API调用替换为本地函数）
+"""
+
+import os
+
+import pytest
+
+from src import batch_analyzer
+from src.batch_analyzer import collect_scripts, output_dirs_for, run_batch
+
+
+def test_collect_skips_results_and_same_names_do_not_collide(tmp_path, monkeypatch):
+    """收集剧本时跳过结果文件；不同目录的同名剧本结果写入对应子目录"""
+    for folder in ("a", "b"):
+        os.makedirs(tmp_path / folder)
+        (tmp_path / folder / "ep1.txt").write_text(f"场景1：{folder}", encoding="utf-8")
+    (tmp_path / "a" / "ep1.result.txt").write_text("上次的结果", encoding="utf-8")
+    (tmp_path / "a" / "ep2.txt").write_text("场景1：a2", encoding="utf-8")
+
+    paths = collect_scripts([str(tmp_path / "a"), str(tmp_path / "b")])
+    assert [os.path.relpath(p, tmp_path) for p in paths] == [os.path.join("a", "ep1.txt"),
+                                                             os.path.join("a", "ep2.txt"),
+                                                             os.path.join("b", "ep1.txt")]
+    assert len(collect_scripts([str(tmp_path / "a")], include_results=True)) == 2
+
+    monkeypatch.setattr(batch_analyzer, "analyze_script_detailed", lambda script, *args, **kwargs: {
+        "text": f"结果 {script}", "budget": {"prompt_tokens": 1, "max_tokens": 100, "warning": None}})
+    output = tmp_path / "results"
+    summary = run_batch(paths, str(output), "{script}", "http://x", "key", "gpt-4o", workers=2)
+    assert summary["succeeded"] == 3
+    assert (output / "a" / "ep1.result.txt").read_text(encoding="utf-8") == "结果 场景1：a"
+    assert (output / "b" / "ep1.result.txt").read_text(encoding="utf-8") == "结果 场景1：b"
+    assert (output / "a" / "ep2.result.txt").exists()
+
+    # 没有同名剧本时结果仍直接写在输出目录下
+    assert output_dirs_for(paths[:2], str(output)) == {paths[0]: str(output), paths[1]: str(output)}
+    with pytest.raises(ValueError, match="输出文件名冲突"):
+        output_dirs_for([str(tmp_path / "a" / "ep1.txt"), str(tmp_path / "a" / "ep1.md")], str(output))
+
+
+def test_split_only_prefers_result_files(tmp_path):
+    """拆分模式下剧本与结果文件同名时只拆分结果文件；无法区分的文件报告冲突"""
+    (tmp_path / "ep1.txt").write_text("剧本", encoding="utf-8")
+    (tmp_path / "ep1.result.txt").write_text("Shot 1\n结果", encoding="utf-8")
+    (tmp_path / "ep2.txt").write_text("Shot 1\n只有这一份", encoding="utf-8")
+    paths = collect_scripts([str(tmp_path)], include_results=True)
+    assert [os.path.basename(p) for p in paths] == ["ep1.result.txt", "ep2.txt"]
+    assert output_dirs_for(paths, str(tmp_path / "out")) == {p: str(tmp_path / "out") for p in paths}
+
+    with pytest.raises(ValueError, match="输出文件名冲突"):
+        output_dirs_for([str(tmp_path / "ep1.txt"), str(tmp_path / "ep1.result.txt")], str(tmp_path / "out"))
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+请求取消测试（使用本地的模拟服务，取消正在等待响应的请求）
+"""
+
+import threading
+import time
+
+import pytest
+
+from benchmarks.mock_server import MockHandler, start_mock_server
+from src.api_client import ProviderClient, analyze_script, stream_script
+from src.cancellation import CancelledError, CancelToken
+
+
+class StallingHandler(MockHandler):
+    """路径以 /stall 开头时卡住不返回：普通请求不发送响应，流式请求只发送一个数据块"""
+    release = threading.Event()
+
+    def do_POST(self):
+        if not self.path.startswith("/stall"):
+            super().do_POST()
+            return
+        length = int(self.headers.get("Content-Length", 0))
+        self.rfile.read(length)
+        if "stream" in self.path:
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            line = 'data: {"choices": [{"delta": {"content": "Shot 1"}}]}\n\n'.encode("utf-8")
+            self.wfile.write(f"{len(line):X}\r\n".encode("ascii") + line + b"\r\n")
+            self.wfile.flush()
+        self.release.wait(10)
+        self.close_connection = True
+
+
+@pytest.fixture
+def server():
+    server, base_url = start_mock_server(handler=StallingHandler)
+    yield base_url
+    StallingHandler.release.set()
+    server.shutdown()
+    server.server_close()
+    StallingHandler.release.clear()
+
+
+def cancel_after(token, delay):
+    timer = threading.Timer(delay, token.cancel)
+    timer.start()
+    return timer
+
+
+@pytest.mark.parametrize("streaming", [False, True])
+def test_cancel_interrupts_blocked_request_and_client_stays_usable(server, streaming):
+    """取消会让卡住的请求（或流式读取）立即抛出 CancelledError，之后同一客户端仍可正常请求"""
+    client = ProviderClient()
+    token = CancelToken()
+    deltas = []
+    try:
+        cancel_after(token, 0.2)
+        start = time.monotonic()
+        with pytest.raises(CancelledError):
+            if streaming:
+                stream_script("剧本", "{script}", f"{server}/stall/stream/v1/chat/completions", "key", "gpt-4o",
+                              deltas.append, verbose=False, client=client, cancel_token=token)
+            else:
+                analyze_script("剧本", "{script}", f"{server}/stall/v1/chat/completions", "key", "gpt-4o",
+                               verbose=False, client=client, cancel_token=token)
+        assert time.monotonic() - start < 2.0
+        assert client.retry_policy.counters["retries"] == 0
+        if streaming:
+            assert deltas == ["Shot 1"]
+
+        result = analyze_script("剧本", "{script}", f"{server}/v1/chat/completions", "key", "gpt-4o",
+                                verbose=False, client=client)
+        assert result == "模拟分析结果 (gpt-4o)"
+    finally:
+        client.close()
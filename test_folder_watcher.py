@@ -0,0 +1,34 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+监视文件夹测试
+"""
+
+import os
+
+from src.folder_watcher import FolderWatcher
+
+
+def test_only_new_or_changed_content_is_picked_up(tmp_path):
+    """内容未变的文件不会再次发送（包括只改了修改时间和程序重启后），结果文件被忽略"""
+    script = tmp_path / "第一集.txt"
+    script.write_text("场景1：雨夜", encoding="utf-8")
+    (tmp_path / "第一集.result.txt").write_text("结果", encoding="utf-8")
+
+    watcher = FolderWatcher(str(tmp_path), settle=0)
+    changed = watcher.scan()
+    assert [os.path.basename(path) for path, _, _ in changed] == ["第一集.txt"]
+    path, data, digest = changed[0]
+    assert data == "场景1：雨夜".encode("utf-8")
+    watcher.mark_done(path, digest, ok=True)
+    assert watcher.scan() == []
+
+    # 重新保存相同内容：修改时间变了，哈希没变
+    os.utime(script, (1, 1))
+    assert watcher.scan() == []
+    assert FolderWatcher(str(tmp_path), settle=0).scan() == []
+
+    script.write_text("场景1：雨夜（修订）", encoding="utf-8")
+    os.utime(script, (2, 2))
+    assert len(watcher.scan()) == 1
@@ -0,0 +1,28 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+分析历史记录测试
+"""
+
+from src.history_store import HistoryStore
+
+
+def test_add_search_and_delete(tmp_path):
+    """全文搜索覆盖剧本和结果，短关键词同样可以命中，删除后索引同步更新"""
+    store = HistoryStore(str(tmp_path / "history.db"))
+    first = store.add("场景1：咖啡馆，侦探推门而入", "Shot 1 特写咖啡杯", model="gpt-4",
+                      usage={"prompt_tokens": 10, "completion_tokens": 5, "total_tokens": 15})
+    second = store.add("场景1：地铁站台，雨夜", "Shot 1 远景列车进站", model="gpt-4o", template="分镜模板")
+
+    assert [run["id"] for run in store.search()] == [second, first]
+    assert [run["id"] for run in store.search("咖啡馆")] == [first]
+    assert [run["id"] for run in store.search("列车进站")] == [second]
+    assert [run["id"] for run in store.search("雨夜 远景")] == [second]
+    assert [run["id"] for run in store.search("特写")] == [first]  # 少于3个字符，不走trigram索引
+
+    run = store.get(first)
+    assert run["output"] == "Shot 1 特写咖啡杯" and run["total_tokens"] == 15
+    store.delete(first)
+    assert store.search("咖啡馆") == [] and store.count() == 1
+    store.close()
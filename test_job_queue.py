@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+分析任务队列测试
+"""
+
+import threading
+import time
+
+from benchmarks.mock_server import start_mock_server
+from src.api_client import ProviderClient, analyze_script
+from src.job_queue import CANCELLED, DONE, PRIORITY_BACKGROUND, PRIORITY_INTERACTIVE, JobManager
+
+
+def wait_finished(jobs, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not all(job.finished for job in jobs):
+        assert time.monotonic() < deadline, "任务未在限定时间内结束"
+        time.sleep(0.01)
+
+
+def test_priority_order_and_queued_cancel():
+    """交互任务排在已排队的后台任务之前，排队中取消的任务不会运行"""
+    release = threading.Event()
+    order = []
+    manager = JobManager(workers=1)
+    blocker = manager.submit("占位", lambda job: release.wait(5))
+    time.sleep(0.05)  # 确保占位任务已开始运行
+    background = [manager.submit(f"后台{i}", lambda job, i=i: order.append(f"后台{i}"), PRIORITY_BACKGROUND)
+                  for i in range(2)]
+    skipped = manager.submit("被取消", lambda job: order.append("被取消"), PRIORITY_BACKGROUND)
+    interactive = manager.submit("交互", lambda job: order.append("交互"), PRIORITY_INTERACTIVE)
+    assert manager.cancel(skipped.id)
+    release.set()
+    wait_finished([blocker, interactive, skipped] + background)
+    assert order == ["交互", "后台0", "后台1"]
+    assert skipped.state == CANCELLED and interactive.state == DONE
+    manager.shutdown()
+
+
+def test_cancel_aborts_running_request():
+    """取消运行中的任务会中断正在进行的HTTP请求，不必等待服务端响应"""
+    server, base_url = start_mock_server(delay=5.0)
+    client = ProviderClient()
+    manager = JobManager(workers=2)
+    try:
+        job = manager.submit("慢请求", lambda job: analyze_script(
+            "剧本", "提示词", f"{base_url}/v1/chat/completions", "key", "gpt-4",
+            verbose=False, client=client, cancel_token=job.token))
+        time.sleep(0.2)
+        start = time.monotonic()
+        assert manager.cancel(job.id)
+        wait_finished([job])
+        assert job.state == CANCELLED
+        assert time.monotonic() - start < 2.0
+        assert client.retry_policy.counters["retries"] == 0
+    finally:
+        manager.shutdown()
+        client.close()
+        server.shutdown()
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+多模型并发对比测试（API调用替换为本地的假客户端，不发送网络请求）
+"""
+
+import json
+import threading
+import time
+
+import pytest
+import requests
+
+from src.api_client import ProviderClient
+from src.model_compare import compare_models, parse_model_list
+
+
+@pytest.mark.parametrize("text, expected", [
+    (" gpt-4o , gpt-4 ", ["gpt-4o", "gpt-4"]),
+    ("gpt-4o\ngpt-4,gpt-4o\n\n", ["gpt-4o", "gpt-4"]),
+    ("gemini-3-pro,\n gpt-4 \n,gemini-3-pro", ["gemini-3-pro", "gpt-4"]),
+    (" ,\n ", []),
+])
+def test_parse_model_list(text, expected):
+    """逗号和换行混用时去掉空白和重复项，保持首次出现的顺序"""
+    assert parse_model_list(text) == expected
+
+
+class FakeClient(ProviderClient):
+    """按模型返回固定结果的假客户端：先提交的模型响应更慢，失败的模型返回HTTP 400"""
+
+    def __init__(self, delays, failing):
+        super().__init__()
+        self.delays = delays
+        self.failing = failing
+
+    def post(self, url, headers, payload, timeout=None, stream=False):
+        model = payload["model"]
+        time.sleep(self.delays.get(model, 0))
+        response = requests.Response()
+        response.url = url
+        if model in self.failing:
+            response.status_code = 400
+            response._content = b'{"error": "bad model"}'
+        else:
+            response.status_code = 200
+            response._content = json.dumps({
+                "choices": [{"message": {"content": f"{model} 的结果"}}],
+                "usage": {"prompt_tokens": 1, "completion_tokens": 2, "total_tokens": 3},
+            }).encode("utf-8")
+        return response
+
+
+def test_compare_models_keeps_order_and_isolates_failures():
+    """结果按传入顺序返回；单个模型失败不影响其它模型；每个模型完成时回调一次"""
+    models = ["gpt-4o", "gpt-4", "gpt-3.5-turbo"]
+    client = FakeClient({"gpt-4o": 0.2, "gpt-4": 0.1}, failing={"gpt-4"})
+    seen = []
+    lock = threading.Lock()
+
+    def on_result(result):
+        with lock:
+            seen.append(result["model"])
+
+    try:
+        results, elapsed = compare_models("剧本", "{script}", "https://api.example.com/v1/chat/completions",
+                                          "key", models, client=client, on_result=on_result)
+    finally:
+        client.close()
+
+    assert [r["model"] for r in results] == models
+    assert [r["ok"] for r in results] == [True, False, True]
+    assert results[0]["text"] == "gpt-4o 的结果" and results[0]["usage"]["total_tokens"] == 3
+    assert "400" in results[1]["error"] and results[1]["text"] == ""
+    # 回调按完成顺序到达：响应最快的模型最先回调
+    assert seen == ["gpt-3.5-turbo", "gpt-4", "gpt-4o"]
+    assert elapsed >= 0.2
@@ -0,0 +1,37 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+提示词模板编译与渲染测试
+"""
+
+import pytest
+
+from src.api_client import build_full_prompt
+from src.prompt_template import MissingVariablesError, compile_template, parse_variables, validate_template
+
+
+def test_render_variables_escapes_and_literal_braces():
+    """变量按位置填入，{{名称}} 和JSON示例中的花括号原样保留，缺少变量时报错"""
+    source = '时长{duration}，风格{style}，{{style}} 示例 {"index": 1} {1}\n{script}'
+    template = compile_template(source)
+    assert compile_template(source) is template
+    assert template.variables == ("duration", "style", "script")
+    assert template.render({"duration": 60, "style": "赛博朋克", "script": "剧本"}) == \
+        '时长60，风格赛博朋克，{style} 示例 {"index": 1} {1}\n剧本'
+    with pytest.raises(MissingVariablesError) as info:
+        template.render({"script": "剧本"})
+    assert info.value.missing == ["duration", "style"]
+
+    # 不含 {script} 时剧本附加在末尾，与原有行为一致
+    assert build_full_prompt("请分析", "剧本") == "请分析\n\n剧本内容：\n剧本"
+    assert build_full_prompt("场景 {scene}", "剧本", {"scene": "雨夜"}) == "场景 雨夜\n\n剧本内容：\n剧本"
+
+
+def test_validate_and_parse_variables():
+    """带空格的占位符给出提示；变量定义按行解析"""
+    assert validate_template("{script} {style}") == []
+    assert len(validate_template("{ style } {script}")) == 1
+    assert parse_variables("# 注释\nduration = 60秒\n\nstyle=a=b\n") == {"duration": "60秒", "style": "a=b"}
+    with pytest.raises(ValueError):
+        parse_variables("没有等号")
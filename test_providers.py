@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+服务商适配层测试：URL与模型组合对应的端点、请求格式和请求头
+"""
+
+import pytest
+
+from src.providers import GeminiAdapter, OpenAIAdapter, ProviderAdapter, gemini_stream_url, resolve_provider
+
+
+GEMINI_MODEL_URL = "https://generativelanguage.googleapis.com/v1beta/models/gemini-1.5-pro:generateContent"
+
+# (API URL, 模型, 适配器类型, 请求端点, 流式端点)
+CASES = [
+    ("https://api.openai.com", "gpt-4o", OpenAIAdapter,
+     "https://api.openai.com/v1/chat/completions", "https://api.openai.com/v1/chat/completions"),
+    ("https://api.comfly.chat/", "gpt-4", OpenAIAdapter,
+     "https://api.comfly.chat/v1/chat/completions", "https://api.comfly.chat/v1/chat/completions"),
+    ("https://proxy.example.com/api/v1/chat/completions", "deepseek-chat", OpenAIAdapter,
+     "https://proxy.example.com/api/v1/chat/completions", "https://proxy.example.com/api/v1/chat/completions"),
+    ("https://proxy.example.com/v1", "gpt-4o", OpenAIAdapter,
+     "https://proxy.example.com/v1", "https://proxy.example.com/v1"),
+    # gemini模型走第三方平台的chat/completions端点时使用OpenAI格式
+    ("https://api.comfly.chat", "gemini-2.5-pro", OpenAIAdapter,
+     "https://api.comfly.chat/v1/chat/completions", "https://api.comfly.chat/v1/chat/completions"),
+    ("https://proxy.example.com/v1/chat/completions", "gemini-1.5-flash", OpenAIAdapter,
+     "https://proxy.example.com/v1/chat/completions", "https://proxy.example.com/v1/chat/completions"),
+    # Gemini原生接口
+    (GEMINI_MODEL_URL, "gemini-1.5-pro", GeminiAdapter,
+     GEMINI_MODEL_URL, GEMINI_MODEL_URL.replace("generateContent", "streamGenerateContent") + "?alt=sse"),
+    (GEMINI_MODEL_URL + "?key=abc", "gemini-1.5-pro", GeminiAdapter,
+     GEMINI_MODEL_URL + "?key=abc",
+     GEMINI_MODEL_URL.replace("generateContent", "streamGenerateContent") + "?key=abc&alt=sse"),
+    ("https://gemini.example.com/v1beta", "gemini-pro", GeminiAdapter,
+     "https://gemini.example.com/v1beta/generateContent",
+     "https://gemini.example.com/v1beta/streamGenerateContent?alt=sse"),
+]
+
+
+@pytest.mark.parametrize("api_url, model, adapter_type, endpoint, stream_endpoint", CASES)
+def test_resolve_provider(api_url, model, adapter_type, endpoint, stream_endpoint):
+    adapter = resolve_provider(api_url, model)
+    assert type(adapter) is adapter_type
+    assert adapter.endpoint == endpoint
+    assert adapter.stream_endpoint == stream_endpoint
+    assert resolve_provider(api_url, model) is adapter
+
+
+def test_payload_and_headers_follow_adapter():
+    """OpenAI兼容端点上的gemini模型使用messages请求体；原生Gemini接口使用contents并带x-goog-api-key"""
+    compatible = resolve_provider("https://api.comfly.chat", "gemini-2.5-pro")
+    payload = compatible.build_payload("提示词", stream=True, max_tokens=1000)
+    assert payload["model"] == "gemini-2.5-pro" and payload["messages"][-1]["content"] == "提示词"
+    assert payload["stream"] is True and payload["max_tokens"] == 1000 and "contents" not in payload
+    assert compatible.build_headers("k") == {"Authorization": "Bearer k", "Content-Type": "application/json"}
+
+    native = resolve_provider(GEMINI_MODEL_URL, "gemini-1.5-pro")
+    payload = native.build_payload("提示词", stream=True, max_tokens=1000)
+    assert payload["contents"][0]["parts"][-1]["text"] == "提示词"
+    assert payload["generationConfig"]["maxOutputTokens"] == 1000 and "messages" not in payload
+    headers = native.build_headers("k")
+    assert headers["x-goog-api-key"] == "k" and headers["Authorization"] == "Bearer k"
+
+
+def test_adapter_base_is_abstract_and_unknown_gemini_stream_url_fails():
+    """适配器基类不能直接使用；无法推导Gemini流式端点时报告原URL而不是回退到普通端点"""
+    with pytest.raises(TypeError):
+        ProviderAdapter("https://api.example.com", "gpt-4o")
+
+    url = "https://gemini.example.com/v1beta/models/gemini-pro"
+    with pytest.raises(ValueError, match=url):
+        gemini_stream_url(url)
+    adapter = resolve_provider(url, "gemini-pro")
+    assert type(adapter) is GeminiAdapter and adapter.endpoint == url
+    with pytest.raises(ValueError, match=url):
+        adapter.stream_endpoint
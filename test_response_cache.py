@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+API响应磁盘缓存测试（使用可控的时钟）
+"""
+
+import os
+from types import SimpleNamespace
+
+from src import response_cache
+from src.response_cache import ResponseCache, make_cache_key
+
+
+def fake_clock(monkeypatch, start=1000.0):
+    """把缓存模块使用的时钟替换为可手动推进的时钟"""
+    clock = SimpleNamespace(now=start)
+    monkeypatch.setattr(response_cache, "time", SimpleNamespace(time=lambda: clock.now))
+    return clock
+
+
+def test_hit_miss_and_shard_layout(tmp_path):
+    """命中/未命中计数正确；条目按键的前两位分目录存放，重启后仍可读取"""
+    cache = ResponseCache(str(tmp_path))
+    key = make_cache_key("http://x", "gpt-4o", "系统", "提示词", 0.7, 1000)
+    assert key != make_cache_key("http://x", "gpt-4o", "系统", "提示词", 0.7, 2000)
+    assert cache.get(key) is None
+    cache.put(key, "结果")
+    assert cache.get(key) == "结果"
+    assert os.path.isfile(tmp_path / key[:2] / f"{key}.json")
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+    assert ResponseCache(str(tmp_path)).get(key) == "结果"
+
+
+def test_eviction_by_size_keeps_recently_used(tmp_path, monkeypatch):
+    """超出容量时淘汰最久未访问的条目"""
+    clock = fake_clock(monkeypatch)
+    cache = ResponseCache(str(tmp_path), max_bytes=250)
+    for key in ("aa1", "bb2"):
+        cache.put(key, "x" * 50)
+        clock.now += 1
+    cache.get("aa1")
+    cache.put("cc3", "x" * 50)
+    assert cache.get("bb2") is None
+    assert cache.get("aa1") == "x" * 50 and cache.get("cc3") == "x" * 50
+    assert cache.stats()["evictions"] == 1
+
+
+def test_busy_entry_still_expires_by_creation_time(tmp_path, monkeypatch):
+    """频繁命中的条目也会在创建后超过最长保留时间时过期，重启后同样如此"""
+    clock = fake_clock(monkeypatch)
+    cache = ResponseCache(str(tmp_path), max_age=100)
+    cache.put("aa1", "结果")
+    for _ in range(5):
+        clock.now += 30
+        if clock.now - 1000 <= 100:
+            assert cache.get("aa1") == "结果"
+    assert cache.get("aa1") is None
+    assert not os.path.exists(tmp_path / "aa" / "aa1.json")
+
+    cache.put("bb2", "结果")
+    clock.now += 60
+    assert cache.get("bb2") == "结果"
+    clock.now += 60
+    assert ResponseCache(str(tmp_path), max_age=100).get("bb2") is None
@@ -0,0 +1,73 @@
+import random
+
+from src.result_splitter import (IncrementalSplitter, MultiPatternMatcher, get_matcher, select_leftmost_longest, split_text,
+                                 to_chinese_number)
+
+
+def brute_force(text, patterns):
+    """逐位置逐模式比较，作为自动机结果的对照"""
+    raw = []
+    for i in range(len(text)):
+        for index, pattern in enumerate(patterns):
+            if pattern and text.startswith(pattern, i):
+                raw.append((i, i + len(pattern), index))
+    return select_leftmost_longest(raw)
+
+
+def test_matcher_agrees_with_brute_force():
+    """随机文本上自动机与暴力匹配结果一致"""
+    rng = random.Random(0)
+    for _ in range(500):
+        patterns = list({"".join(rng.choice("ab") for _ in range(rng.randint(1, 4))) for _ in range(rng.randint(1, 5))})
+        text = "".join(rng.choice("abx") for _ in range(rng.randint(0, 40)))
+        assert MultiPatternMatcher(patterns).finditer(text) == brute_force(text, patterns)
+
+
+def test_split_finds_every_repeated_separator():
+    """重复出现的分解词全部被拆分，且较长的分解词优先"""
+    text = "开头\nShot 1\n甲\nShot 12\n乙\nShot 1\n丙"
+    separators = [f"Shot {i}" for i in range(1, 41)]
+    sections = split_text(text, separators)
+    assert [s["separator"] for s in sections] == [None, "Shot 1", "Shot 12", "Shot 1"]
+    assert [s["content"] for s in sections] == ["开头", "甲", "乙", "丙"]
+    assert text[sections[2]["start"]:sections[2]["content_start"]] == "Shot 12"
+
+
+def test_split_without_matches_returns_whole_text():
+    """没有任何分解词时整段作为开头内容返回"""
+    assert split_text("没有分解词", ["场景1", ""]) == [
+        {"separator": None, "index": -1, "start": 0, "content_start": 0, "end": 5, "content": "没有分解词"}
+    ]
+
+
+def test_chinese_numbers_beyond_eight():
+    """中文数字分解词不再限于一到八"""
+    assert [to_chinese_number(n) for n in (8, 10, 12, 20, 105, 110)] == ["八", "十", "十二", "二十", "一百零五", "一百一十"]
+
+
+def test_incremental_split_matches_full_split():
+    """按任意块大小增量拆分，结果与整段拆分一致（含跨块的分解词）"""
+    rng = random.Random(11)
+    for _ in range(500):
+        patterns = list({"".join(rng.choice("ab") for _ in range(rng.randint(1, 4))) for _ in range(rng.randint(1, 5))})
+        text = "".join(rng.choice("abx \n") for _ in range(rng.randint(0, 60)))
+        splitter = IncrementalSplitter(patterns)
+        sections = []
+        position = 0
+        while position < len(text):
+            size = rng.randint(1, 7)
+            sections.extend(splitter.feed(text[position:position + size]))
+            position += size
+        sections.extend(splitter.finish())
+        assert sections == split_text(text, patterns)
+
+
+def test_regex_and_heading_modes():
+    """正则模式以匹配文本作标题；标题模式只在指定级别及以上的标题处拆分"""
+    text = "开头\n## 第一幕\n**Shot 1**\n甲\n### 细节\n镜头二\n乙\n# 第二幕\n丙"
+    regex = get_matcher("regex", (r"^\**Shot\s*\d+\**", r"^镜头[一二三四五六七八九十]+"))
+    assert [(s["separator"], s["content"]) for s in split_text(text, None, regex)][1:] == [
+        ("Shot 1", "甲\n### 细节"), ("镜头二", "乙\n# 第二幕\n丙")]
+    heading = get_matcher("heading", (), 2)
+    assert [s["separator"] for s in split_text(text, None, heading)] == [None, "第一幕", "第二幕"]
+    assert get_matcher("heading", (), 2) is heading
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+重试策略与熔断器测试（使用可控的时钟和等待函数，不发送网络请求）
+"""
+
+import email.utils
+from types import SimpleNamespace
+
+import pytest
+import requests
+
+from src import retry_policy
+from src.api_client import ProviderClient, post_with_retry
+from src.retry_policy import CircuitBreaker, CircuitOpenError, RetryPolicy, is_retryable, parse_retry_after
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """把重试模块使用的时钟替换为可手动推进的时钟"""
+    clock = SimpleNamespace(now=1000.0)
+    monkeypatch.setattr(retry_policy, "time", SimpleNamespace(time=lambda: clock.now, monotonic=lambda: clock.now))
+    return clock
+
+
+def http_error(status, retry_after=None):
+    """构造带响应的HTTP错误"""
+    response = requests.Response()
+    response.status_code = status
+    if retry_after is not None:
+        response.headers["Retry-After"] = retry_after
+    return requests.exceptions.HTTPError(f"{status} Error", response=response)
+
+
+def test_backoff_jitter_bounds_and_retry_after(clock, monkeypatch):
+    """全抖动退避的上限按指数增长并受 max_delay 限制；Retry-After 优先且同样受限"""
+    bounds = []
+    monkeypatch.setattr(retry_policy, "random", SimpleNamespace(uniform=lambda a, b: bounds.append((a, b)) or b))
+    policy = RetryPolicy(base_delay=1.0, max_delay=5.0)
+    assert [policy.backoff(attempt) for attempt in range(5)] == [1.0, 2.0, 4.0, 5.0, 5.0]
+    assert all(low == 0 for low, _ in bounds)
+
+    assert parse_retry_after("3") == 3.0
+    assert parse_retry_after("-2") == 0.0
+    assert parse_retry_after(email.utils.formatdate(clock.now + 4, usegmt=True)) == pytest.approx(4.0)
+    assert parse_retry_after("明天") is None and parse_retry_after(None) is None
+    assert policy.backoff(0, http_error(429, "2")) == 2.0
+    assert policy.backoff(0, http_error(429, "120")) == 5.0
+
+
+def test_retryable_and_fatal_errors():
+    """限流、服务端错误和网络错误重试；其它4xx立即失败且不计入熔断"""
+    assert is_retryable(http_error(429)) and is_retryable(http_error(503))
+    assert is_retryable(requests.exceptions.ReadTimeout()) and is_retryable(requests.exceptions.ConnectionError())
+    assert not is_retryable(http_error(400)) and not is_retryable(http_error(401)) and not is_retryable(ValueError())
+
+    sleeps = []
+    policy = RetryPolicy(max_retries=3, sleep=sleeps.append)
+    errors = [http_error(503, "1"), http_error(502, "1")]
+
+    def send():
+        if errors:
+            raise errors.pop(0)
+        return "ok"
+
+    assert policy.call("https://api.example.com/v1/chat", send) == "ok"
+    assert sleeps == [1.0, 1.0]
+
+    calls = []
+
+    def bad_request():
+        calls.append(1)
+        raise http_error(400)
+
+    with pytest.raises(requests.exceptions.HTTPError):
+        policy.call("https://api.example.com/v1/chat", bad_request)
+    assert len(calls) == 1
+    assert policy.stats()["fatal"] == 1 and policy.stats()["retries"] == 2
+    assert policy.stats()["breakers"] == {"https://api.example.com": "closed"}
+
+
+@pytest.mark.parametrize("status", [400, 401, 404, 409, 422])
+def test_client_errors_are_not_retried(status):
+    """冲突（409）等客户端错误重发同一请求不会成功，只发送一次"""
+    sleeps = []
+    calls = []
+    policy = RetryPolicy(max_retries=3, sleep=sleeps.append)
+
+    def send():
+        calls.append(1)
+        raise http_error(status)
+
+    assert not is_retryable(http_error(status))
+    with pytest.raises(requests.exceptions.HTTPError):
+        policy.call("https://api.example.com/v1/chat", send)
+    assert len(calls) == 1 and sleeps == []
+
+
+def test_breaker_transitions_with_single_probe(clock):
+    """连续失败后熔断；冷却后只放行一个试探请求，试探失败重新熔断，成功则恢复"""
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=30)
+    assert breaker.allow()
+    assert not breaker.record_failure()
+    assert breaker.record_failure() and breaker.state == "open"
+    assert not breaker.allow()
+
+    clock.now += 30
+    assert breaker.allow() and breaker.state == "half_open"
+    assert not breaker.allow()
+    assert breaker.record_failure() and breaker.state == "open"
+    assert not breaker.allow()
+
+    clock.now += 30
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == "closed" and breaker.allow() and breaker.allow()
+
+
+def test_open_breaker_surfaces_as_value_error(clock):
+    """熔断拒绝的请求在 post_with_retry 中转换为 ValueError"""
+    policy = RetryPolicy(max_retries=1, failure_threshold=1, sleep=lambda delay: None)
+    client = ProviderClient(retry_policy=policy)
+
+    def refuse(*args, **kwargs):
+        raise requests.exceptions.ConnectionError("拒绝连接")
+
+    client.post = refuse
+    with pytest.raises(requests.exceptions.ConnectionError):
+        post_with_retry("https://api.example.com/v1/chat", {}, {}, verbose=False, client=client)
+    with pytest.raises(ValueError, match="已熔断"):
+        post_with_retry("https://api.example.com/v1/chat", {}, {}, verbose=False, client=client)
+    assert policy.stats()["short_circuited"] == 1
+    with pytest.raises(CircuitOpenError):
+        policy.call("https://api.example.com/v1/chat", lambda: "ok")
+    client.close()
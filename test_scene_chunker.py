@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+长剧本按场景切分与结果拼接测试
+"""
+
+from src.scene_chunker import chunk_script, group_scenes, split_scenes, stitch_results, total_usage
+
+
+def test_split_scenes_on_markers_and_keeps_preamble():
+    """按各种场景标记切分，场景前的开头内容并入第一个场景"""
+    script = "片名：测试\n\n场景1：教室\n甲上课。\n第2场 走廊\n乙跑过。\nScene 3\nINT. HOUSE\n丙进门。"
+    assert split_scenes(script) == [
+        "片名：测试\n\n场景1：教室\n甲上课。",
+        "第2场 走廊\n乙跑过。",
+        "Scene 3",
+        "INT. HOUSE\n丙进门。",
+    ]
+    # 行中间出现的“场景”不算场景标记
+    assert split_scenes("这个场景1：不是开头") == ["这个场景1：不是开头"]
+
+
+def test_empty_script_and_script_without_markers():
+    """没有场景标记的剧本整体作为一个片段"""
+    assert split_scenes("") == [""]
+    assert chunk_script("") == [""]
+    assert chunk_script("只有一段对白") == ["只有一段对白"]
+
+
+def test_group_scenes_merges_small_scenes_and_keeps_long_scene_whole():
+    """相邻小场景合并到上限以内，单个超长场景不拆开而是单独成段"""
+    scenes = ["a" * 4, "b" * 4, "c" * 20, "d" * 4]
+    assert group_scenes(scenes, max_chars=10) == ["aaaa\n\nbbbb", "c" * 20, "dddd"]
+    assert group_scenes(["a" * 30], max_chars=10) == ["a" * 30]
+
+    script = "场景1：甲\n" + "长" * 50 + "\n场景2：乙\n短"
+    assert chunk_script(script, max_chars=20) == ["场景1：甲\n" + "长" * 50, "场景2：乙\n短"]
+
+
+def test_stitch_results_and_total_usage():
+    """结果按原顺序拼接，失败片段给出说明；用量按字段合计"""
+    results = [
+        {"ok": True, "text": "Shot 1\n", "error": None,
+         "usage": {"prompt_tokens": 10, "completion_tokens": 5, "total_tokens": 15}},
+        {"ok": False, "text": "", "error": "超时", "usage": None},
+        {"ok": True, "text": "Shot 2", "error": None,
+         "usage": {"prompt_tokens": 3, "completion_tokens": None, "total_tokens": 3}},
+    ]
+    assert stitch_results(results) == (
+        "===== 第 1/3 部分 =====\nShot 1\n\n"
+        "===== 第 2/3 部分 =====\n（该部分分析失败: 超时）\n\n"
+        "===== 第 3/3 部分 =====\nShot 2")
+    assert total_usage(results) == {"prompt_tokens": 13, "completion_tokens": 5, "total_tokens": 18}
+
+    assert stitch_results([{"ok": True, "text": "只有一段", "error": None}]) == "只有一段"
+    assert total_usage([{"usage": None}]) is None
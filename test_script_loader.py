@@ -0,0 +1,29 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+剧本文件读取测试
+"""
+
+from src import script_loader
+from src.script_loader import read_script_file
+
+
+def test_detects_encoding_once(tmp_path, monkeypatch):
+    """GBK、带BOM的UTF-8和UTF-16都能识别，换行统一为\\n，大文件走内存映射"""
+    cases = {
+        "gbk.txt": ("场景1：雨夜\r\n侦探登场".encode("gbk"), "gbk"),
+        "bom.txt": ("﻿场景1：雨夜\r\n侦探登场".encode("utf-8"), "utf-8-sig"),
+        "utf16.txt": ("场景1：雨夜\r\n侦探登场".encode("utf-16"), "utf-16"),
+    }
+    for name, (data, encoding) in cases.items():
+        (tmp_path / name).write_bytes(data)
+        assert read_script_file(str(tmp_path / name)) == ("场景1：雨夜\n侦探登场", encoding)
+
+    # 样本全是ASCII、后面才出现GBK字符时退回下一个编码
+    monkeypatch.setattr(script_loader, "MMAP_THRESHOLD", 1024)
+    monkeypatch.setattr(script_loader, "PROBE_BYTES", 1024)
+    data = b"Shot 1\n" * 1000 + "旁白：你好".encode("gbk")
+    (tmp_path / "mixed.txt").write_bytes(data)
+    content, encoding = read_script_file(str(tmp_path / "mixed.txt"))
+    assert encoding == "gbk" and content.endswith("旁白：你好")
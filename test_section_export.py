@@ -0,0 +1,35 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+拆分结果批量导出测试
+"""
+
+import json
+import os
+import zipfile
+
+from src.section_export import export_sections
+
+
+SECTIONS = [{"title": "Shot 1", "content": "甲"}, {"title": "Shot 2/?", "content": "乙"}]
+
+
+def test_export_formats(tmp_path):
+    """目录、ZIP和JSONL三种格式都包含全部段落和附加内容，且不留临时文件"""
+    progress = []
+    count = export_sections(SECTIONS, tmp_path / "dir", "dir", raw_result="原文",
+                            on_progress=lambda done, total: progress.append((done, total)))
+    assert count == 3 and progress[-1] == (3, 3)
+    assert sorted(os.listdir(tmp_path / "dir")) == ["01_Shot 1.txt", "02_Shot 2.txt", "raw_result.txt"]
+
+    export_sections(SECTIONS, tmp_path / "all.zip", "zip", script="剧本")
+    with zipfile.ZipFile(tmp_path / "all.zip") as archive:
+        assert archive.read("02_Shot 2.txt").decode("utf-8") == "乙"
+        assert "script.txt" in archive.namelist()
+
+    export_sections(SECTIONS, tmp_path / "all.jsonl", "jsonl")
+    lines = (tmp_path / "all.jsonl").read_text(encoding="utf-8").splitlines()
+    assert [json.loads(line)["title"] for line in lines] == ["Shot 1", "Shot 2/?"]
+
+    assert not [name for name in os.listdir(tmp_path) if name.endswith(".tmp")]
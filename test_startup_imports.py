@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+启动路径导入测试：界面启动不导入网络层，核心模块不依赖tkinter
+"""
+
+import os
+import subprocess
+import sys
+
+
+PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# 批处理和界面共用的核心模块
+CORE_MODULES = ["src.api_client", "src.batch_analyzer", "src.prompt_template", "src.result_splitter",
+                "src.scene_chunker", "src.storyboard_generator", "src.job_queue", "src.history_store",
+                "src.template_store", "src.folder_watcher", "src.model_compare"]
+
+
+def loaded_modules(code):
+    """在全新的解释器中执行代码，返回之后已加载的模块名集合"""
+    output = subprocess.run([sys.executable, "-c", f"{code}\nimport sys\nprint(' '.join(sys.modules))"],
+                            cwd=PROJECT_DIR, capture_output=True, text=True, check=True).stdout
+    return set(output.split())
+
+
+def test_gui_module_defers_network_layer():
+    """导入界面模块时不导入 requests，网络层在首帧之后或第一次请求时才导入"""
+    modules = loaded_modules("import src.script_analyzer")
+    assert "tkinter" in modules
+    assert "requests" not in modules and "src.api_client" not in modules
+
+
+def test_core_modules_import_without_tkinter():
+    """核心模块可在没有图形界面的环境中使用"""
+    modules = loaded_modules("\n".join(f"import {name}" for name in CORE_MODULES))
+    assert not [name for name in modules if name.split(".")[0] == "tkinter"]
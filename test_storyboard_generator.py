@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Sora分镜分段生成测试（API调用替换为本地函数）
+"""
+
+import pytest
+
+from src import storyboard_generator
+from src.storyboard_generator import generate_storyboard, normalize_durations, parse_plan, shot_durations
+
+
+PLAN_TEXT = '''```json
+{"theme": "雨夜", "style": "黑色电影", "total_duration": 30,
+ "segments": [{"index": 1, "beats": "侦探进门"}, {"index": 2, "beats": "对峙"}]}
+```'''
+
+
+def segment_text(*durations):
+    return "\n".join(f"Shot {i}\nDuration: {d} sec\nScene: 雨夜" for i, d in enumerate(durations, 1))
+
+
+def test_parse_plan_and_normalize_durations():
+    """规划兼容代码块包裹；修正后所有镜头按比例缩放且总和正好为15.0秒"""
+    plan = parse_plan(PLAN_TEXT)
+    assert [s["beats"] for s in plan["segments"]] == ["侦探进门", "对峙"]
+    assert plan["total_duration"] == 30
+    with pytest.raises(ValueError):
+        parse_plan('{"segments": []}')
+
+    fixed = shot_durations(normalize_durations(segment_text(5, 5, 10)))
+    assert fixed == [3.8, 3.7, 7.5] and round(sum(fixed), 1) == 15.0
+    # 最后一个镜头很短时也不会出现不足0.1秒的情况
+    fixed = shot_durations(normalize_durations(segment_text(20, 20, 0.01)))
+    assert min(fixed) >= 0.1 and round(sum(fixed), 1) == 15.0
+    with pytest.raises(ValueError):
+        normalize_durations("没有任何镜头")
+
+
+def test_retry_with_correction_and_failed_segment(monkeypatch):
+    """时长不符时带修正说明重试；单个片段失败不影响其它片段；模板中的剧本只发送一次"""
+    prompts = []
+
+    def fake_analyze(script, prompt, *args, **kwargs):
+        prompts.append(prompt)
+        if "只输出JSON" in prompt:
+            return {"text": PLAN_TEXT}
+        if "Segment 2 (" in prompt:
+            raise ValueError("服务端错误")
+        if "注意：上一次" in prompt:
+            return {"text": segment_text(7.5, 7.5)}
+        return {"text": segment_text(5, 5)}
+
+    monkeypatch.setattr(storyboard_generator, "analyze_script_detailed", fake_analyze)
+    result = generate_storyboard("剧本", "模板 Shot\n用户输入：{script}", "http://x", "key", "gpt-4o", max_workers=1)
+
+    assert result["failed"] == 1
+    assert [r["ok"] for r in result["segments"]] == [True, False]
+    assert "Duration: 7.5 sec" in result["text"] and "该片段生成失败: 服务端错误" in result["text"]
+    segment_prompts = [p for p in prompts if "Segment 1 (" in p]
+    assert len(segment_prompts) == 2 and "10.0 秒" in segment_prompts[1]
+    assert all(p.count("{script}") == 1 for p in segment_prompts)
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+分镜解析测试
+"""
+
+import csv
+import json
+
+from src.storyboard_parser import export_csv, export_json, parse_storyboard
+
+
+SAMPLE = """🎬 影片概览
+旁白: 中文
+📼 Segment 1 (00:00 - 00:15)
+本段总时长：15秒
+**Shot 1**
+Duration: [2.5] sec
+Scene (简述): 男孩在雨中奔跑
+Sora Prompt (详细): 雨夜街道，
+霓虹倒影，8k
+Camera: Close-up
+中文旁白：他终于回来了
+Shot 2
+- Duration: 12.5 sec
+- Scene（简述）: 远景
+- Camera: Wide shot
+### 📼 Segment 2 (00:15 - 00:30)
+Shot 1
+Duration: 15.0 sec
+Scene: 结束
+"""
+
+
+def test_parse_segments_and_shots():
+    """解析片段、镜头和多行字段，忽略 Markdown 修饰"""
+    segments = parse_storyboard(SAMPLE)
+    assert [(s.index, s.start, s.end, len(s.shots)) for s in segments] == [
+        (1, "00:00", "00:15", 2), (2, "00:15", "00:30", 1)]
+    first = segments[0].shots[0]
+    assert first.duration == 2.5
+    assert first.scene == "男孩在雨中奔跑"
+    assert first.prompt == "雨夜街道，\n霓虹倒影，8k"
+    assert first.camera == "Close-up"
+    assert first.narration == "他终于回来了"
+    assert segments[0].shots[1].camera == "Wide shot"
+    assert segments[0].total_duration() == 15.0
+
+
+def test_export_json_and_csv(tmp_path):
+    """导出的JSON与CSV包含全部镜头"""
+    segments = parse_storyboard(SAMPLE)
+    export_json(segments, tmp_path / "shots.json")
+    export_csv(segments, tmp_path / "shots.csv")
+
+    data = json.loads((tmp_path / "shots.json").read_text(encoding="utf-8"))
+    assert [len(s["shots"]) for s in data] == [2, 1]
+
+    with open(tmp_path / "shots.csv", encoding="utf-8-sig", newline="") as f:
+        rows = list(csv.DictReader(f))
+    assert [(r["segment"], r["shot"], r["duration"]) for r in rows] == [
+        ("1", "1", "2.5"), ("1", "2", "12.5"), ("2", "1", "15.0")]
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+流式分析的中断错误测试（使用本地的假响应，不发送网络请求）
+"""
+
+import pytest
+import requests
+from urllib3.exceptions import ProtocolError, ReadTimeoutError
+
+from src.api_client import ProviderClient, stream_script
+from src.response_cache import ResponseCache
+
+
+class FinishedStream:
+    """一次性返回完整结果的流式响应"""
+    status_code = 200
+    headers = {}
+    encoding = None
+
+    def iter_lines(self, decode_unicode=False):
+        yield 'data: {"choices": [{"delta": {"content": "Shot 1"}}]}'
+        yield "data: [DONE]"
+
+    def raise_for_status(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class BrokenStream:
+    """先返回一个数据块，随后以指定异常中断的流式响应"""
+    status_code = 200
+    headers = {}
+
+    def __init__(self, error):
+        self.error = error
+        self.encoding = None
+
+    def iter_lines(self, decode_unicode=False):
+        yield 'data: {"choices": [{"delta": {"content": "Shot 1"}}]}'
+        raise self.error
+
+    def raise_for_status(self):
+        pass
+
+    def close(self):
+        pass
+
+
+def run_stream(error):
+    client = ProviderClient()
+    client.post = lambda *args, **kwargs: BrokenStream(error)
+    try:
+        return stream_script("剧本", "{script}", "https://api.example.com/v1/chat/completions", "key", "gpt-4o",
+                             lambda delta: None, verbose=False, client=client, idle_timeout=5)
+    finally:
+        client.close()
+
+
+def test_idle_timeout_message_only_for_read_timeout():
+    """读取超时报告为空闲超时，其它连接错误按原样抛出"""
+    timeout = requests.exceptions.ConnectionError(ReadTimeoutError(None, None, "Read timed out."))
+    with pytest.raises(ValueError, match="5秒内未收到新数据"):
+        run_stream(timeout)
+
+    reset = requests.exceptions.ConnectionError(ProtocolError("Connection broken", ConnectionResetError()))
+    with pytest.raises(requests.exceptions.ConnectionError, match="Connection broken"):
+        run_stream(reset)
+
+
+def test_cache_hit_is_reported_explicitly(tmp_path):
+    """是否命中缓存由返回值明确给出，而不是从首字耗时推断"""
+    cache = ResponseCache(str(tmp_path))
+    client = ProviderClient()
+    client.post = lambda *args, **kwargs: FinishedStream()
+    deltas = []
+    try:
+        def run():
+            return stream_script("剧本", "{script}", "https://api.example.com/v1/chat/completions", "key",
+                                 "gpt-4o", deltas.append, verbose=False, client=client, cache=cache)
+
+        text, first_token_time, cached = run()
+        assert (text, cached) == ("Shot 1", False) and first_token_time is not None
+
+        client.post = None  # 命中缓存时不应再发送请求
+        assert run() == ("Shot 1", 0.0, True)
+        assert deltas == ["Shot 1", "Shot 1"]
+    finally:
+        client.close()
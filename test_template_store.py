@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+提示词模板存储测试
+"""
+
+import json
+import os
+
+import pytest
+
+from src.template_store import TemplateStore
+
+
+def test_cache_versions_and_external_edits(tmp_path):
+    """未变化时不重复读取文件，保存记录历史版本，外部修改后自动重新读取"""
+    path = str(tmp_path / "prompt_templates.json")
+    store = TemplateStore(path)
+    assert store.templates() == {}
+
+    assert store.save("分镜", "版本一 {script}") == 1
+    assert store.save("分镜", "版本二 {script}") == 2
+    assert store.save("分镜", "版本二 {script}") == 2  # 内容未变化不产生新版本
+    loads = store.loads
+    for _ in range(100):
+        assert store.get("分镜") == "版本二 {script}"
+    assert store.loads == loads
+    assert [item["version"] for item in store.history("分镜")] == [1, 2]
+    assert not [name for name in os.listdir(tmp_path) if name.endswith(".tmp")]
+
+    # 其他进程修改了文件
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"分镜": "外部修改"}, f, ensure_ascii=False)
+    os.utime(path, ns=(1, 1))
+    assert store.get("分镜") == "外部修改"
+
+    assert store.restore("分镜", 1) == 3
+    assert store.get("分镜") == "版本一 {script}"
+    assert store.delete("分镜") and store.names() == []
+    assert len(store.history("分镜")) == 3
+
+
+def test_existing_template_and_corrupt_files(tmp_path, capsys):
+    """没有历史的已有模板保存时先记录原内容；模板或历史文件损坏时拒绝写入，原文件保持不变"""
+    path = tmp_path / "prompt_templates.json"
+    path.write_text(json.dumps({"分镜": "原始 {script}"}, ensure_ascii=False), encoding="utf-8")
+    store = TemplateStore(str(path))
+    assert store.save("分镜", "新版 {script}") == 2
+    assert [item["content"] for item in store.history("分镜")] == ["原始 {script}", "新版 {script}"]
+
+    # 模板文件损坏：可以读取（为空），但拒绝写入，原文件内容保持不变
+    path.write_bytes("{损坏".encode("utf-8"))
+    store = TemplateStore(str(path))
+    assert store.templates() == {}
+    assert "加载模板失败" in capsys.readouterr().out
+    for write in (lambda: store.save("分镜", "恢复 {script}"), lambda: store.delete("分镜"),
+                  lambda: store.restore("分镜", 1)):
+        with pytest.raises(ValueError, match="损坏"):
+            write()
+    assert path.read_bytes() == "{损坏".encode("utf-8")
+    assert len(store.history("分镜")) == 2
+
+    # 历史文件损坏：同样拒绝保存，两个文件都保持不变
+    path.write_text(json.dumps({"分镜": "原始 {script}"}, ensure_ascii=False), encoding="utf-8")
+    history_path = tmp_path / "prompt_templates.history.json"
+    history_path.write_bytes(b"[1, 2")
+    store = TemplateStore(str(path))
+    with pytest.raises(ValueError, match="损坏"):
+        store.save("分镜", "新版二 {script}")
+    assert history_path.read_bytes() == b"[1, 2" and store.get("分镜") == "原始 {script}"
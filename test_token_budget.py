@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+token估算与输出预算测试
+"""
+
+import pytest
+
+from src.script_analyzer import MODEL_CHOICES
+from src.token_budget import (DEFAULT_CONTEXT, DEFAULT_MAX_OUTPUT, MIN_OUTPUT_TOKENS, MODEL_CONTEXT, MODEL_MAX_OUTPUT,
+                              STORYBOARD_MIN_OUTPUT, context_window, estimate_tokens, max_output_tokens, plan_budget)
+
+
+def test_estimate_tokens():
+    """汉字约1个token，ASCII约4个字符1个token"""
+    assert estimate_tokens("") == 0
+    assert estimate_tokens("镜头推进") == 4
+    assert estimate_tokens("abcd" * 10) == 10
+    assert estimate_tokens("雨夜abcde") == 2 + 2
+
+
+@pytest.mark.parametrize("model, window, output", [
+    ("gpt-4o-mini", 128000, 16384),
+    ("gpt-4-turbo-preview", 128000, 4096),
+    ("gpt-4-0613", 8192, 8192),
+    ("gpt-3.5-turbo", 16385, 4096),
+    ("gemini-2.5-pro", 1048576, 65536),
+    ("gemini-3-pro-preview", 1048576, 65536),
+    ("gemini-3-flash", 1048576, 65536),
+    ("gemini-2.0-flash", 1048576, 8192),
+    ("gemini-1.5-flash-8b", 1048576, 8192),
+    ("gemini-pro", 32760, 8192),
+    ("gemini-experimental", DEFAULT_CONTEXT, DEFAULT_MAX_OUTPUT),
+    ("some-local-model", DEFAULT_CONTEXT, DEFAULT_MAX_OUTPUT),
+])
+def test_model_tables(model, window, output):
+    """按模型系列查表，不认识的模型使用保守的默认值"""
+    assert context_window(model) == window
+    assert max_output_tokens(model) == output
+
+
+@pytest.mark.parametrize("model", MODEL_CHOICES)
+def test_selectable_models_have_table_entries(model):
+    """配置对话框中可选的模型都不会落到默认值"""
+    assert any(model.startswith(prefix) for prefix, _ in MODEL_CONTEXT)
+    assert any(model.startswith(prefix) for prefix, _ in MODEL_MAX_OUTPUT)
+
+
+def test_plan_budget_floors_and_overflow():
+    """短剧本也有最小输出，分镜模板不低于3000；放不下时不给出可发送的预算"""
+    budget = plan_budget("gpt-4o", "系统", "请分析：短剧本", "短剧本", "请分析")
+    assert budget["fits"] and budget["max_tokens"] == MIN_OUTPUT_TOKENS and budget["warning"] is None
+
+    budget = plan_budget("gpt-4o", "系统", "分镜：短剧本", "短剧本", "电影分镜头与提示词专家 Shot")
+    assert budget["max_tokens"] == STORYBOARD_MIN_OUTPUT
+
+    # 输出上限受模型限制时给出截断提示
+    script = "雨" * 5000
+    budget = plan_budget("gpt-3.5-turbo", "系统", script, script, "分镜")
+    assert budget["fits"] and budget["max_tokens"] == 4096 and "截断" in budget["warning"]
+
+    # 提示词超出上下文窗口
+    script = "雨" * 9000
+    budget = plan_budget("gpt-4", "系统", script, script, "请分析")
+    assert not budget["fits"] and budget["max_tokens"] == 0 and "长剧本分场景" in budget["warning"]
@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+界面事件总线测试
+"""
+
+import threading
+
+from src.ui_events import UIEventBus
+
+
+def test_drain_merges_status_and_appends():
+    """状态只保留最新一条，连续追加合并为一次，其它事件保持顺序"""
+    bus = UIEventBus()
+    log = []
+    bus.status(log.append, "进度 1")
+    bus.append(log.append, "甲")
+    bus.append(log.append, "乙")
+    bus.call(log.append, "完成")
+    bus.status(log.append, "进度 2")
+    for func, args in bus.drain():
+        func(*args)
+    assert log == ["甲乙", "完成", "进度 2"]
+    assert bus.drain() == []
+
+
+def test_publish_from_many_threads():
+    """多个线程同时发布时事件不丢失，单个周期的取出数量有上限"""
+    bus = UIEventBus(max_events=100)
+    received = []
+
+    def worker(n):
+        for i in range(50):
+            bus.call(received.append, (n, i))
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    while bus.pending():
+        calls = bus.drain()
+        assert len(calls) <= 100
+        for func, args in calls:
+            func(*args)
+    assert len(received) == 400